@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from __future__ import absolute_import
+from __future__ import absolute_import, print_function
 
 from .utils.visibility import getLogger
 logger = getLogger(__name__)
@@ -11,14 +11,13 @@ import base64
 import json
 import subprocess
 
-import requests.exceptions
-
 import container
 
-from . import core
 from . import exceptions
-from container.config import AnsibleContainerConductorConfig
-from container.utils import list_to_ordereddict
+from .engine import DEFAULT_ROLLOUT_TIMEOUT
+
+# container.core, the engines and their dependencies (requests, docker, ruamel, jsonschema)
+# are imported only once a subcommand actually needs them, keeping `help` and `version` fast.
 
 from logging import config
 LOGGING = {
@@ -43,6 +42,18 @@ LOGGING = {
         }
     }
 
+
+def positive_int(value):
+    """ An argparse type for counts that have to be at least 1 """
+    try:
+        result = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(u'invalid int value: {!r}'.format(value))
+    if result < 1:
+        raise argparse.ArgumentTypeError(u'must be at least 1, got {}'.format(result))
+    return result
+
+
 class HostCommand(object):
 
     AVAILABLE_COMMANDS = {'help': 'Display this help message',
@@ -56,6 +67,8 @@ class HostCommand(object):
                           'destroy': 'Stop all services and delete their containers & all built images',
                           'push': 'Push your built images to a Docker Hub compatible registry',
                           'import': 'Convert a Dockerfile to a container.yml and role.',
+                          'gc': 'Remove stale images and build containers, keeping recent builds',
+                          'cache': 'Report on the layers in the build cache, and how often builds reuse them',
                           # FIXME: implement purge command
                           # 'purge': 'Delete all Ansible Container instances, volumes, and images',
                           # FIXME: implement status command
@@ -104,6 +117,9 @@ class HostCommand(object):
             subparser.add_argument('--tag', action='store',
                                    help=u'Tag the images before pushing.',
                                    dest='tag', default=None)
+            subparser.add_argument('--push-workers', action='store', type=positive_int,
+                                   help=u'Number of images to push to the registry concurrently. Defaults to 4.',
+                                   dest='push_workers', default=4)
 
     def subcmd_init_parser(self, parser, subparser):
         subparser.add_argument('--server', '-s', action='store',
@@ -150,6 +166,10 @@ class HostCommand(object):
                                     u'changes have been made necessitating rebuild. '
                                     u'You may disable layer caching with this flag.',
                                dest='container_cache', default=True)
+        subparser.add_argument('--explain', action='store_true',
+                               help=u'When a role\'s cached layer can\'t be used, compare the inputs to its '
+                                    u'fingerprint with those of the previous build, and report which changed.',
+                               dest='explain', default=False)
         subparser.add_argument('--use-local-python', action='store_true',
                                help=u'Prevents Ansible Container from bringing its own Python runtime '
                                     u'into target containers in order to run Ansible. Use when the target '
@@ -181,6 +201,22 @@ class HostCommand(object):
         subparser.add_argument('--vault-file', action='store',
                                help=u'A vault file to use to populate secrets',
                                nargs='+', default=[], dest='vault_files')
+        subparser.add_argument('--incremental', action='store_true',
+                               help=u'Leave resources whose definitions haven\'t changed since the last deploy '
+                                    u'out of the start tasks, and list them in a manifest',
+                               default=False, dest='incremental')
+        subparser.add_argument('--manifests', action='store', choices=['yaml', 'json'],
+                               help=u'Also write the resources to deploy as plain Kubernetes manifests, '
+                                    u'in YAML or JSON, which can be applied with a single `kubectl apply`',
+                               default=None, dest='manifest_format')
+        subparser.add_argument('--batch-tasks', action='store_true',
+                               help=u'Submit each kind of resource with a single looping task, rather than '
+                                    u'a task per resource, keeping the generated playbook short',
+                               default=False, dest='batch_tasks')
+        subparser.add_argument('--playbook-format', action='store', choices=['yaml', 'json'],
+                               help=u'Write the deployment playbook as commented YAML, the default, or as JSON, '
+                                    u'which is written task by task and is faster for large deployments',
+                               default='yaml', dest='playbook_format')
         self.subcmd_common_parsers(parser, subparser, 'deploy')
 
     def subcmd_run_parser(self, parser, subparser):
@@ -198,6 +234,14 @@ class HostCommand(object):
         subparser.add_argument('--ask-vault-pass', action='store_true',
                                help=u'Asks for the fault file password at run time',
                                dest='ask_vault_pass')
+        subparser.add_argument('--startup-workers', action='store', type=positive_int,
+                               help=u'Start services in dependency order, up to this many at a time',
+                               dest='startup_workers', default=None)
+        subparser.add_argument('--wait', action='store', type=int, nargs='?', const=DEFAULT_ROLLOUT_TIMEOUT,
+                               help=u'For the K8s and OpenShift engines, wait up to this many seconds, %d by '
+                                    u'default, for every rollout to complete, and fail if any didn\'t'
+                                    % DEFAULT_ROLLOUT_TIMEOUT,
+                               dest='rollout_timeout', default=None, metavar='SECONDS')
         self.subcmd_common_parsers(parser, subparser, 'run')
 
 
@@ -251,6 +295,24 @@ class HostCommand(object):
 
 
 
+    def subcmd_gc_parser(self, parser, subparser):
+        subparser.add_argument('--keep', action='store', type=positive_int,
+                               help=u'Number of most recent builds to keep for each service, at least 1. '
+                                    u'The build tagged latest is kept as well, even if older. Defaults to 3.',
+                               dest='keep', default=3)
+        subparser.add_argument('--max-disk', action='store',
+                               help=u'Remove the oldest builds, other than latest, until the project\'s '
+                                    u'images fit within this size, e.g. 20G',
+                               dest='max_disk', default=None)
+        subparser.add_argument('--dry-run', action='store_true',
+                               help=u'Report what would be removed, without removing anything',
+                               dest='dry_run', default=False)
+
+    def subcmd_cache_parser(self, parser, subparser):
+        subparser.add_argument('action', action='store', choices=['stats'],
+                               help=u'stats: list each service\'s cached layers, their size and last use, '
+                                    u'and the cache hit ratio of each role over recent builds')
+
     @container.host_only
     def __call__(self):
         parser = argparse.ArgumentParser(description=u'Build, orchestrate, run, and '
@@ -294,10 +356,18 @@ class HostCommand(object):
             parser.print_help()
             sys.exit(0)
 
+        if args.subcommand == 'version' and not args.debug:
+            # Only --debug needs to query the engine
+            print('Ansible Container, version', container.__version__)
+            sys.exit(0)
+
         if args.debug and args.subcommand != 'version':
             LOGGING['loggers']['container']['level'] = 'DEBUG'
         config.dictConfig(LOGGING)
 
+        import requests.exceptions
+        from . import core
+
         try:
             getattr(core, u'hostcmd_{}'.format(args.subcommand))(**vars(args))
         except exceptions.AnsibleContainerAlreadyInitializedException as e:
@@ -410,6 +480,10 @@ def conductor_commandline():
         logger.error('Error copying build context: %s', p_obj.stderr.read())
         sys.exit(p_obj.returncode)
 
+    from . import core
+    from container.config import AnsibleContainerConductorConfig
+    from container.utils import list_to_ordereddict
+
     containers_config = decoding_fn(args.config)
     conductor_config = AnsibleContainerConductorConfig(list_to_ordereddict(containers_config),
                                                        skip_services=args.command in BYPASS_SERVICE_PROCESSING)
@@ -6,7 +6,6 @@ from .utils.visibility import getLogger
 logger = getLogger(__name__)
 
 from abc import ABCMeta, abstractproperty, abstractmethod
-from io import BytesIO
 import os
 from os import path
 import copy
@@ -21,16 +20,9 @@ from ruamel import yaml
 import jsonschema
 import container
 
-if container.ENV == 'conductor':
-    from ansible.template import Templar
-    try:
-        from ansible.utils.unsafe_proxy import AnsibleUnsafeText
-    except ImportError:
-        from ansible.vars.unsafe_proxy import AnsibleUnsafeText
-
 from .exceptions import (AnsibleContainerConfigException, AnsibleContainerNotInitializedException,
                          AnsibleContainerRequestException)
-from .utils import get_metadata_from_role, get_defaults_from_role
+from .utils import get_metadata_from_role, get_defaults_from_role, role_registry
 
 # jag: Division of labor between outer utility and conductor:
 #
@@ -46,6 +38,23 @@ from .utils import get_metadata_from_role, get_defaults_from_role
 
 DEFAULT_CONDUCTOR_BASE = 'centos:7'
 
+# Strings lacking all of these can't contain Jinja2, so there's no need to hand them to the Templar
+JINJA_MARKERS = ('{{', '{%', '{#')
+
+_unsafe_text_type = None
+
+
+def _get_unsafe_text_type():
+    """ Import Ansible's unsafe text type on first use, from wherever this version of Ansible keeps it """
+    global _unsafe_text_type
+    if _unsafe_text_type is None:
+        try:
+            from ansible.utils.unsafe_proxy import AnsibleUnsafeText
+        except ImportError:
+            from ansible.vars.unsafe_proxy import AnsibleUnsafeText
+        _unsafe_text_type = AnsibleUnsafeText
+    return _unsafe_text_type
+
 
 @add_metaclass(ABCMeta)
 class BaseAnsibleContainerConfig(Mapping):
@@ -351,6 +360,8 @@ class AnsibleContainerConductorConfig(Mapping):
 
     @container.conductor_only
     def __init__(self, container_config, skip_services=False):
+        # Ansible is imported here, rather than at module load, to keep conductor start-up lean
+        from ansible.template import Templar
         self._skip_services = skip_services
         self._config = container_config
         self._templar = Templar(loader=None, variables={})
@@ -358,27 +369,41 @@ class AnsibleContainerConductorConfig(Mapping):
         self._process_top_level_sections()
         self._process_services()
 
+    @classmethod
+    def _template_value(cls, value, templar):
+        """
+        Walk a nested structure, templating its strings, mapping keys included. Containers are
+        rebuilt with their original type and key order, and strings without Jinja markers are
+        returned untouched.
+        """
+        if isinstance(value, string_types):
+            if not any(marker in value for marker in JINJA_MARKERS):
+                return value
+            templated = templar.template(value)
+            if isinstance(templated, _get_unsafe_text_type()):
+                templated = str(templated)
+            return templated
+        elif isinstance(value, dict):
+            processed = value.__class__()
+            for key, item in value.items():
+                if isinstance(key, string_types):
+                    key = cls._template_value(key, templar)
+                processed[key] = cls._template_value(item, templar)
+            return processed
+        elif isinstance(value, list):
+            processed = value.__class__()
+            for item in value:
+                processed.append(cls._template_value(item, templar))
+            return processed
+        # ints, booleans, etc.
+        return value
+
     def _process_section(self, section_value, callback=None, templar=None):
         if not templar:
             templar = self._templar
         processed = ordereddict()
         for key, value in section_value.items():
-            if isinstance(value, string_types):
-                # strings can be templated
-                processed[key] = templar.template(value)
-                if isinstance(processed[key], AnsibleUnsafeText):
-                    processed[key] = str(processed[key])
-            elif isinstance(value, (list, dict)):
-                # if it's a dimensional structure, it's cheaper just to serialize
-                # it, treat it like a template, and then deserialize it again
-                buffer = BytesIO() # use bytes explicitly, not unicode
-                yaml.round_trip_dump(value, buffer)
-                processed[key] = yaml.round_trip_load(
-                    templar.template(buffer.getvalue())
-                )
-            else:
-                # ints, booleans, etc.
-                processed[key] = value
+            processed[key] = self._template_value(value, templar)
             if callback:
                 callback(processed)
         return processed
@@ -397,7 +422,14 @@ class AnsibleContainerConductorConfig(Mapping):
             setattr(self, section, dict(self._process_section(self._config.get(section, ordereddict()))))
 
     def _process_services(self):
+        from ansible.template import Templar
         services = ordereddict()
+        if not self._skip_services:
+            # Resolve and parse every referenced role once, rather than once per service. Each
+            # conductor command processes its config first, so this starts every build afresh.
+            role_registry.reset()
+            role_registry.index([role for service_data in self._config.get('services', ordereddict()).values()
+                                 for role in service_data.get('roles', [])])
         for service, service_data in self._config.get('services', ordereddict()).items():
             logger.debug('Processing service...', service=service, service_data=service_data)
             processed = ordereddict()
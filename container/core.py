@@ -13,7 +13,6 @@ import hashlib
 import io
 import os
 import re
-import ruamel
 import shutil
 import sys
 import subprocess
@@ -21,6 +20,8 @@ import tarfile
 import time
 import tempfile
 
+from multiprocessing.pool import ThreadPool
+
 try:
     from shlex import quote
 except ImportError:
@@ -37,13 +38,11 @@ from .exceptions import AnsibleContainerAlreadyInitializedException,\
                         AnsibleContainerConfigException
 from .utils import *
 from .utils import resolve_config_path
+from .utils.playbook import write_playbook
 from . import __version__, host_only, conductor_only, ENV
 from .config import DEFAULT_CONDUCTOR_BASE
 from container.utils.loader import load_engine
 
-if ENV == 'conductor':
-    from container.utils.galaxy import AnsibleContainerGalaxy
-
 
 REMOVE_HTTP = re.compile('^https?://')
 
@@ -203,6 +202,7 @@ def hostcmd_build(base_path, project_name, engine_name, vars_files=None, config_
 
     kwargs['cache'] = kwargs['cache'] and kwargs['container_cache']
     kwargs['config_vars'] = config.get('defaults')
+    kwargs['base_image_ttl'] = config.get('settings', {}).get('base_image_ttl')
     engine_obj.await_conductor_command(
         'build', dict(config), base_path, kwargs, save_container=save_container)
 
@@ -215,7 +215,10 @@ def hostcmd_deploy(base_path, project_name, engine_name, vars_files=None, cache=
     local_images = kwargs.get('local_images')
     output_path = kwargs.pop('deployment_output_path', None) or config.deployment_path
 
-    engine_obj = load_engine(['LOGIN', 'PUSH', 'DEPLOY'],
+    capabilities = ['LOGIN', 'PUSH', 'DEPLOY']
+    if kwargs.get('manifest_format'):
+        capabilities.append('MANIFESTS')
+    engine_obj = load_engine(capabilities,
                              engine_name, config.project_name,
                              config['services'], **kwargs)
 
@@ -256,7 +259,10 @@ def hostcmd_run(base_path, project_name, engine_name, vars_files=None, cache=Tru
 
     logger.debug('hostcmd_run configuration', config=config.__dict__)
 
-    engine_obj = load_engine(['RUN'],
+    capabilities = ['RUN']
+    if kwargs.get('rollout_timeout'):
+        capabilities.append('ROLLOUT')
+    engine_obj = load_engine(capabilities,
                              engine_name, config.project_name,
                              config['services'], **kwargs)
 
@@ -495,6 +501,31 @@ def hostcmd_version(base_path, project_name, engine_name, config_file=None, **kw
         engine_obj.print_version_info()
 
 
+@host_only
+def hostcmd_gc(base_path, project_name, engine_name, vars_files=None, config_file=None, keep=3, max_disk=None,
+               dry_run=False, **kwargs):
+    assert_initialized(base_path, config_file)
+    config = get_config(base_path, vars_files=vars_files, engine_name=engine_name, project_name=project_name,
+                        config_file=config_file)
+    engine_obj = load_engine(['GC'],
+                             engine_name, config.project_name,
+                             config['services'], **kwargs)
+    engine_obj.collect_garbage(keep=keep, max_disk=max_disk, dry_run=dry_run)
+
+
+@host_only
+def hostcmd_cache(base_path, project_name, engine_name, vars_files=None, config_file=None, action='stats',
+                  **kwargs):
+    assert_initialized(base_path, config_file)
+    config = get_config(base_path, vars_files=vars_files, engine_name=engine_name, project_name=project_name,
+                        config_file=config_file)
+    engine_obj = load_engine(['CACHE'],
+                             engine_name, config.project_name,
+                             config['services'], **kwargs)
+    if action == 'stats':
+        engine_obj.cache_stats()
+
+
 @host_only
 def hostcmd_import(base_path, project_name, engine_name, config_file=None, **kwargs):
     engine_obj = load_engine(['IMPORT'],
@@ -578,7 +609,7 @@ def run_playbook(playbook, engine, service_map, ansible_options='', local_python
         logger.debug("writing playbook to {}".format(playbook_path))
         logger.debug("playbook", playbook=playbook)
         with os.fdopen(playbook_fd, 'w') as ofs:
-            ofs.write(ruamel.yaml.round_trip_dump(playbook, indent=4, block_seq_indent=2, default_flow_style=False))
+            write_playbook(playbook, ofs)
 
         inventory_fd, inventory_path = tempfile.mkstemp(dir=output_dir, prefix='hosts-')
         with os.fdopen(inventory_fd, 'w') as ofs:
@@ -683,22 +714,15 @@ def apply_role_to_container(role, container_id, service_name, engine, vars={},
 
 #### BUILD UTILITY FUNCTIONS ####
 
-def _find_base_image_id(engine, service_name, service):
+def _find_base_image_id(engine, service_name, service, resolver):
+    """ Return the ID of the service's base image, and the manifest digest it's pinned to, if known """
     if not service.get('from'):
         raise AnsibleContainerConfigException(
             "Expecting service to have 'from' attribute. None found when "
             "evaluating "
             "service: {}.".format(service_name)
         )
-    image_id = engine.get_image_id_by_tag(service['from'])
-    if not image_id:
-        image_id = engine.pull_image_by_tag(service['from'])
-        if not image_id:
-            raise AnsibleContainerException(
-                "Failed to find image {}. Try `docker image pull {}`".format(
-                    service['from'])
-            )
-    return image_id
+    return resolver.get(service['from'])
 
 def _intermediate_build_container_name(engine, service_name, image_fingerprint, role_name):
     safe_role_name = re.sub(r"[^a-zA-Z0-9_.-]", "_", role_name)
@@ -778,6 +802,17 @@ def _run_intermediate_build_container(engine, container_name, cur_image_id, serv
     return container_id
 
 
+@conductor_only
+def _explain_cache_bust(engine, service_name, role_name, components):
+    previous = engine.get_fingerprint_components(service_name, role_name)
+    if not previous:
+        logger.info(u'No earlier build of role %s recorded its fingerprint inputs to compare with.',
+                    role_name, service=service_name)
+        return
+    for change in explain_fingerprint_change(previous, components):
+        logger.info(u'Cache busted for role %s: %s', role_name, change, service=service_name)
+
+
 @conductor_only
 def conductorcmd_build(engine_name, project_name, services, cache=True, local_python=False,
                        ansible_options='', debug=False, config_vars=None, **kwargs):
@@ -785,149 +820,175 @@ def conductorcmd_build(engine_name, project_name, services, cache=True, local_py
     logger.info(u'%s integration engine loaded. Build starting.', engine.display_name, project=project_name)
     services_to_build = kwargs.get('services_to_build') or services.keys()
     logger.debug("Services to build", services_to_build=services_to_build)
-    for service_name, service in services.items():
-        if service_name not in services_to_build:
-            logger.debug('Skipping service %s...', service_name)
-            continue
-        logger.info(u'Building service...', service=service_name, project=project_name)
-        cur_image_id = _find_base_image_id(engine, service_name, service)
-        artifact_breadcrumbs = []
-
-        # the fingerprint hash tracks cacheability
-        fingerprint_hash = hashlib.sha256('%s::' % cur_image_id)
-        # The variables handed to us are also important to cacheability
-        fingerprint_hash.update(text_type(config_vars))
-        logger.debug(u'Base fingerprint hash = %s', fingerprint_hash.hexdigest(),
-                     service=service_name, hash=fingerprint_hash.hexdigest())
-
-        # Presume cache is still good unless we're not caching at all
-        cache_busted = not cache
-
-        cur_container_id = engine.get_container_id_for_service(service_name)
-        if cur_container_id:
-            if engine.service_is_running(service_name):
-                engine.stop_container(cur_container_id, forcefully=True)
-
-        if service.get('roles'):
-            for role in service['roles']:
-                cur_image_fingerprint = fingerprint_hash.hexdigest()
-                role_name = role if not isinstance(role, dict) else role.get('role')
-                role_fingerprint = get_role_fingerprint(role, service_name, config_vars)
-                fingerprint_hash.update(role_fingerprint)
-                logger.info('Fingerprint for this layer: %s', fingerprint_hash.hexdigest(),
-                            service=service_name, role=role_name, parent_image_id=cur_image_id,
-                            parent_fingerprint=cur_image_fingerprint)
-
-                if not cache_busted:
-                    logger.debug(u'Still trying to keep cache.', service=service_name)
-                    cached_image_id = engine.get_image_id_by_fingerprint(
-                        fingerprint_hash.hexdigest())
-                    int_container_name = _intermediate_build_container_name(
-                        engine, service_name, cur_image_fingerprint, role_name
-                    )
-                    int_container_id = engine.get_container_id_by_name(
-                        int_container_name)
-                    if cached_image_id:
-                        # We can reuse the cached image
-                        logger.debug(u'Cached layer found for service',
-                                     service=service_name, fingerprint=fingerprint_hash.hexdigest())
-                        cur_image_id = cached_image_id
-                        logger.info(u'Applied role %s from cache', role_name,
-                                    service=service_name, role=role_name)
-                        # Nothing more to be done for this role, so move on to the
-                        # next one. Don't throw away the build container though.
-                        artifact_breadcrumbs.append(int_container_name)
-                        continue
-                    else:
-                        # This means the cache is busted. However we may still
-                        # be able to do an optimized rebuild, reusing the build
-                        # container from this layer and reapplying the role.
-                        logger.info(u'Cached layer for for role %s not found or '
-                                    u'invalid.', role_name, service=service_name,
-                                    fingerprint=fingerprint_hash.hexdigest(),
-                                    cur_image_id=cur_image_id)
-                        cache_busted = True
-                        if int_container_id:
-                            # There is still an intermediate build container.
-                            logger.info(u'Reusing intermediate build container '
-                                        u'%s to reapply role %s.',
-                                        int_container_name, role_name,
-                                        service=service_name)
-                            container_id = engine.start_container(int_container_id)
+    # The cache outcome of each role applied, for `ansible-container cache stats`
+    cache_events = []
+    # Pull every base image up front and concurrently, rather than as each service gets to it
+    base_images = engine.get_base_image_resolver(ttl=kwargs.get('base_image_ttl'),
+                                                 state_path=kwargs.get('state_path'))
+    base_images.start(service['from'] for service_name, service in services.items()
+                      if service_name in services_to_build and service.get('from'))
+    try:
+        for service_name, service in services.items():
+            if service_name not in services_to_build:
+                logger.debug('Skipping service %s...', service_name)
+                continue
+            logger.info(u'Building service...', service=service_name, project=project_name)
+            cur_image_id, base_digest = _find_base_image_id(engine, service_name, service, base_images)
+            artifact_breadcrumbs = []
+
+            # the fingerprint hash tracks cacheability, starting with the base image's digest, so the
+            # same base image yields the same fingerprint on any host. The variables handed to us are
+            # also important to cacheability, but each role's fingerprint accounts for those it uses.
+            fingerprint_hash = hashlib.sha256('%s::' % (base_digest or cur_image_id))
+            logger.debug(u'Base fingerprint hash = %s', fingerprint_hash.hexdigest(),
+                         service=service_name, hash=fingerprint_hash.hexdigest())
+            # The inputs to each layer's fingerprint are recorded with it, so `build --explain` can name
+            # what changed when a layer isn't found in the cache
+            base_components = {
+                u'base image': base_digest or cur_image_id,
+            }
+
+            # Presume cache is still good unless we're not caching at all
+            cache_busted = not cache
+
+            cur_container_id = engine.get_container_id_for_service(service_name)
+            if cur_container_id:
+                if engine.service_is_running(service_name):
+                    engine.stop_container(cur_container_id, forcefully=True)
+
+            if service.get('roles'):
+                for role in service['roles']:
+                    cur_image_fingerprint = fingerprint_hash.hexdigest()
+                    role_name = role if not isinstance(role, dict) else role.get('role')
+                    layer_components = dict(base_components)
+                    layer_components[u'parent layer'] = cur_image_fingerprint
+                    role_fingerprint = get_role_fingerprint(role, service_name, config_vars,
+                                                            components=layer_components)
+                    fingerprint_hash.update(role_fingerprint)
+                    logger.info('Fingerprint for this layer: %s', fingerprint_hash.hexdigest(),
+                                service=service_name, role=role_name, parent_image_id=cur_image_id,
+                                parent_fingerprint=cur_image_fingerprint)
+
+                    if not cache_busted:
+                        logger.debug(u'Still trying to keep cache.', service=service_name)
+                        cached_image_id = engine.get_image_id_by_fingerprint(
+                            fingerprint_hash.hexdigest())
+                        int_container_name = _intermediate_build_container_name(
+                            engine, service_name, cur_image_fingerprint, role_name
+                        )
+                        int_container_id = engine.get_container_id_by_name(
+                            int_container_name)
+                        if cached_image_id:
+                            # We can reuse the cached image
+                            logger.debug(u'Cached layer found for service',
+                                         service=service_name, fingerprint=fingerprint_hash.hexdigest())
+                            cur_image_id = cached_image_id
+                            logger.info(u'Applied role %s from cache', role_name,
+                                        service=service_name, role=role_name)
+                            cache_events.append((service_name, role_name, fingerprint_hash.hexdigest(), 'hit'))
+                            # Nothing more to be done for this role, so move on to the
+                            # next one. Don't throw away the build container though.
+                            artifact_breadcrumbs.append(int_container_name)
+                            continue
                         else:
-                            logger.info(u'Could not locate intermediate build '
-                                        u'container to reapply role %s. '
-                                        u'Applying role on image %s as '
-                                        u'container %s.',
-                                        role_name, cur_image_id, int_container_name,
-                                        cur_image_fingerprint=cur_image_fingerprint,
-                                        service=service_name)
-
-                            container_id = _run_intermediate_build_container(
-                                engine, int_container_name, cur_image_id, service_name, service,
-                                local_python=local_python
-                            )
-                else:
-                    int_container_name = _intermediate_build_container_name(
-                        engine, service_name, cur_image_fingerprint, role_name
-                    )
-                    logger.info(u'Applying role %s on image %s as container %s',
-                                role_name, cur_image_id, int_container_name,
-                                service=service_name)
-                    container_id = _run_intermediate_build_container(
-                        engine, int_container_name, cur_image_id, service_name, service,
-                        local_python=local_python
-                    )
-
-                artifact_breadcrumbs.append(int_container_name)
-                while not engine.service_is_running(service_name,
-                                                    container_id=container_id):
-                    time.sleep(0.2)
-                logger.debug('Container confirmed running', id=container_id)
-
-                rc = apply_role_to_container(role, container_id, service_name,
-                                             engine, vars=config_vars,
-                                             local_python=local_python,
-                                             ansible_options=ansible_options,
-                                             debug=debug)
-                logger.debug('Playbook run finished.', exit_code=rc)
-                if rc:
-                    raise RuntimeError('Build failed.')
-                logger.info(u'Applied role to service', service=service_name, role=role_name)
-
-                engine.stop_container(container_id, forcefully=True)
-                is_last_role = role is service['roles'][-1]
-                if is_last_role and kwargs.get('flatten'):
-                    logger.debug("Finished build, flattening image")
-                    image_id = engine.flatten_container(container_id, service_name, service)
-                    logger.info(u'Saved flattened image for service', service=service_name, image=image_id)
-                else:
-                    image_id = engine.commit_role_as_layer(container_id,
-                                                           service_name,
-                                                           fingerprint_hash.hexdigest(),
-                                                           role_name,
-                                                           service,
-                                                           with_name=is_last_role)
-                    logger.info(u'Committed layer as image', service=service_name,
-                                image=image_id, role=role_name,
-                                fingerprint=fingerprint_hash.hexdigest(),)
-                # engine.delete_container(container_id)
-                cur_image_id = image_id
-            # Tag the image also as latest:
-            engine.tag_image_as_latest(service_name, cur_image_id)
-            logger.info(u'Build complete.', service=service_name)
-            logger.info(u'Cleaning up stale build artifacts.', service=service_name)
-            intermediate_containers = list(engine.get_intermediate_containers_for_service(service_name))
-            logger.debug(u'Containers vs. artifacts', artifact_breadcrumbs=artifact_breadcrumbs,
-                         intermediate_containers=intermediate_containers)
-            for container_name in intermediate_containers:
-                if container_name not in artifact_breadcrumbs:
-                    logger.debug(u'Container name %s not found as part of this build. Cleansing it.',
-                                 container_name, service=service_name)
-                    engine.stop_container(container_name)
-                    engine.delete_container(container_name)
-        else:
-            logger.info(u'Service had no roles specified. Nothing to do.', service=service_name)
+                            # This means the cache is busted. However we may still
+                            # be able to do an optimized rebuild, reusing the build
+                            # container from this layer and reapplying the role.
+                            logger.info(u'Cached layer for for role %s not found or '
+                                        u'invalid.', role_name, service=service_name,
+                                        fingerprint=fingerprint_hash.hexdigest(),
+                                        cur_image_id=cur_image_id)
+                            cache_busted = True
+                            cache_events.append((service_name, role_name, fingerprint_hash.hexdigest(), 'bust'))
+                            if kwargs.get('explain'):
+                                _explain_cache_bust(engine, service_name, role_name, layer_components)
+                            if int_container_id:
+                                # There is still an intermediate build container.
+                                logger.info(u'Reusing intermediate build container '
+                                            u'%s to reapply role %s.',
+                                            int_container_name, role_name,
+                                            service=service_name)
+                                container_id = engine.start_container(int_container_id)
+                            else:
+                                logger.info(u'Could not locate intermediate build '
+                                            u'container to reapply role %s. '
+                                            u'Applying role on image %s as '
+                                            u'container %s.',
+                                            role_name, cur_image_id, int_container_name,
+                                            cur_image_fingerprint=cur_image_fingerprint,
+                                            service=service_name)
+
+                                container_id = _run_intermediate_build_container(
+                                    engine, int_container_name, cur_image_id, service_name, service,
+                                    local_python=local_python
+                                )
+                    else:
+                        if cache:
+                            cache_events.append((service_name, role_name, fingerprint_hash.hexdigest(), 'miss'))
+                        int_container_name = _intermediate_build_container_name(
+                            engine, service_name, cur_image_fingerprint, role_name
+                        )
+                        logger.info(u'Applying role %s on image %s as container %s',
+                                    role_name, cur_image_id, int_container_name,
+                                    service=service_name)
+                        container_id = _run_intermediate_build_container(
+                            engine, int_container_name, cur_image_id, service_name, service,
+                            local_python=local_python
+                        )
+
+                    artifact_breadcrumbs.append(int_container_name)
+                    while not engine.service_is_running(service_name,
+                                                        container_id=container_id):
+                        time.sleep(0.2)
+                    logger.debug('Container confirmed running', id=container_id)
+
+                    rc = apply_role_to_container(role, container_id, service_name,
+                                                 engine, vars=config_vars,
+                                                 local_python=local_python,
+                                                 ansible_options=ansible_options,
+                                                 debug=debug)
+                    logger.debug('Playbook run finished.', exit_code=rc)
+                    if rc:
+                        raise RuntimeError('Build failed.')
+                    logger.info(u'Applied role to service', service=service_name, role=role_name)
+
+                    engine.stop_container(container_id, forcefully=True)
+                    is_last_role = role is service['roles'][-1]
+                    if is_last_role and kwargs.get('flatten'):
+                        logger.debug("Finished build, flattening image")
+                        image_id = engine.flatten_container(container_id, service_name, service)
+                        logger.info(u'Saved flattened image for service', service=service_name, image=image_id)
+                    else:
+                        image_id = engine.commit_role_as_layer(container_id,
+                                                               service_name,
+                                                               fingerprint_hash.hexdigest(),
+                                                               role_name,
+                                                               service,
+                                                               with_name=is_last_role,
+                                                               components=layer_components)
+                        logger.info(u'Committed layer as image', service=service_name,
+                                    image=image_id, role=role_name,
+                                    fingerprint=fingerprint_hash.hexdigest(),)
+                    # engine.delete_container(container_id)
+                    cur_image_id = image_id
+                # Tag the image also as latest:
+                engine.tag_image_as_latest(service_name, cur_image_id)
+                logger.info(u'Build complete.', service=service_name)
+                logger.info(u'Cleaning up stale build artifacts.', service=service_name)
+                intermediate_containers = list(engine.get_intermediate_containers_for_service(service_name))
+                logger.debug(u'Containers vs. artifacts', artifact_breadcrumbs=artifact_breadcrumbs,
+                             intermediate_containers=intermediate_containers)
+                for container_name in intermediate_containers:
+                    if container_name not in artifact_breadcrumbs:
+                        logger.debug(u'Container name %s not found as part of this build. Cleansing it.',
+                                     container_name, service=service_name)
+                        engine.stop_container(container_name)
+                        engine.delete_container(container_name)
+            else:
+                logger.info(u'Service had no roles specified. Nothing to do.', service=service_name)
+    finally:
+        base_images.close()
+    engine.record_build_cache(cache_events, state_path=kwargs.get('state_path'))
     logger.info(u'All images successfully built.')
 
 
@@ -942,12 +1003,14 @@ def conductorcmd_run(engine_name, project_name, services, **kwargs):
         [service for service, service_desc in services.items()
          if service_desc.get('roles')])
 
-    playbook = engine.generate_orchestration_playbook(**kwargs)
+    playbook = engine.generate_orchestration_playbook(states=['start'], **kwargs)
     rc = run_playbook(playbook, engine, services, tags=['start'], **kwargs)
     if rc:
         raise AnsibleContainerException(
             'Error executing the run command. Not all containers may be running.'
         )
+    if kwargs.get('rollout_timeout'):
+        engine.await_rollouts(kwargs['rollout_timeout'])
     logger.info(u'All services running.', playbook_rc=rc)
 
 
@@ -956,7 +1019,7 @@ def conductorcmd_restart(engine_name, project_name, services, **kwargs):
     engine = load_engine(['RUN'], engine_name, project_name, services, **kwargs)
     logger.info(u'Engine integration loaded. Preparing to restart containers.',
                 engine=engine.display_name)
-    playbook = engine.generate_orchestration_playbook(**kwargs)
+    playbook = engine.generate_orchestration_playbook(states=['restart'], **kwargs)
     rc = run_playbook(playbook, engine, services, tags=['restart'], **kwargs)
     if rc:
         raise AnsibleContainerException(
@@ -970,7 +1033,7 @@ def conductorcmd_stop(engine_name, project_name, services, **kwargs):
     engine = load_engine(['RUN'], engine_name, project_name, services, **kwargs)
     logger.info(u'Engine integration loaded. Preparing to stop all containers.',
                 engine=engine.display_name)
-    playbook = engine.generate_orchestration_playbook(**kwargs)
+    playbook = engine.generate_orchestration_playbook(states=['stop'], **kwargs)
     rc = run_playbook(playbook, engine, services, tags=['stop'], **kwargs)
     if rc:
         raise AnsibleContainerException(
@@ -985,12 +1048,14 @@ def conductorcmd_destroy(engine_name, project_name, services, **kwargs):
     logger.info(u'Engine integration loaded. Preparing to stop+delete all '
                 u'containers and built images.',
                 engine=engine.display_name)
-    playbook = engine.generate_orchestration_playbook(**kwargs)
+    # The engine removes images in bulk once the playbook has removed the services
+    playbook = engine.generate_orchestration_playbook(states=['destroy'], remove_images=False, **kwargs)
     rc = run_playbook(playbook, engine, services, tags=['destroy'], **kwargs)
     if rc:
         raise AnsibleContainerException(
             'Error executing the destroy command. Not all containers and images may have been removed.'
         )
+    engine.post_destroy_cleanup(deployment_output_path=kwargs.get('deployment_output_path'))
     logger.info(u'All services destroyed.', playbook_rc=rc)
 
 @conductor_only
@@ -1013,12 +1078,16 @@ def conductorcmd_deploy(engine_name, project_name, services, **kwargs):
 
     deployment_output_path = kwargs.get('deployment_output_path')
     playbook = engine.generate_orchestration_playbook(**kwargs)
+    if kwargs.get('incremental'):
+        playbook = engine.prune_unchanged_resources(playbook, deployment_output_path)
+    if kwargs.get('manifest_format'):
+        engine.generate_manifests(deployment_output_path, manifest_format=kwargs['manifest_format'])
 
     engine.pre_deployment_setup(project_name, services, **kwargs)
 
     try:
         with open(os.path.join(deployment_output_path, '%s.yml' % project_name), 'w') as ofs:
-            ofs.write(ruamel.yaml.round_trip_dump(playbook, indent=4, block_seq_indent=2, default_flow_style=False))
+            write_playbook(playbook, ofs, playbook_format=kwargs.get('playbook_format') or 'yaml')
 
     except OSError:
         logger.error(u'Failure writing deployment playbook', exc_info=True)
@@ -1031,6 +1100,7 @@ def conductorcmd_install(engine_name, project_name, services, **kwargs):
     roles = kwargs.pop('roles', None)
     logger.debug("Installing roles", roles=roles)
     if roles:
+        from container.utils.galaxy import AnsibleContainerGalaxy
         galaxy = AnsibleContainerGalaxy()
         galaxy.install(roles)
 
@@ -1044,26 +1114,59 @@ def conductorcmd_push(engine_name, project_name, services, **kwargs):
     namespace = kwargs.pop('namespace')
     tag = kwargs.pop('tag')
     config_path = kwargs.pop('config_path')
+    state_path = kwargs.pop('state_path', None)
     repository_prefix =kwargs.pop('repository_prefix')
 
+    push_workers = max(kwargs.pop('push_workers', None) or 1, 1)
+
     engine = load_engine(['PUSH', 'LOGIN'], engine_name, project_name, services)
     logger.info(u'Engine integration loaded. Preparing push.',
                 engine=engine.display_name)
 
     # Verify that we can authenticate with the registry
-    username, password = engine.login(username, password, email, url, config_path)
+    started = time.time()
+    username, password = engine.login(username, password, email, url, config_path, state_path)
+    auth_seconds = round(time.time() - started, 2)
 
     # Push each image that has been built using Ansible roles
+    to_push = []
     for name, service in iteritems(services):
         if service.get('containers'):
             for c in service['containers']:
                 if 'roles' in c:
-                    cname = '%s-%s' % (name, c['container_name'])
-                    image_id = engine.get_latest_image_id_for_service(cname)
-                    engine.push(image_id, cname, url=url, tag=tag, namespace=namespace, username=username,
-                                password=password, repository_prefix=repository_prefix)
+                    to_push.append('%s-%s' % (name, c['container_name']))
         elif 'roles' in service:
             # if the service has roles, it's an image we should push
-            image_id = engine.get_latest_image_id_for_service(name)
-            engine.push(image_id, name, url=url, tag=tag, namespace=namespace, username=username,
-                        password=password, repository_prefix=repository_prefix)
+            to_push.append(name)
+
+    def _push_service(service_name):
+        started = time.time()
+        try:
+            image_id = engine.get_latest_image_id_for_service(service_name)
+            engine.push(image_id, service_name, url=url, tag=tag, namespace=namespace, username=username,
+                        password=password, repository_prefix=repository_prefix, state_path=state_path)
+        except Exception as exc:
+            logger.error(u'Failed to push image', service=service_name, error=text_type(exc))
+            return service_name, time.time() - started, exc
+        return service_name, time.time() - started, None
+
+    started = time.time()
+    pool = ThreadPool(min(push_workers, len(to_push)) or 1)
+    try:
+        results = pool.map(_push_service, to_push)
+    finally:
+        pool.close()
+        pool.join()
+
+    failures = [(service_name, exc) for service_name, _, exc in results if exc is not None]
+    for service_name, elapsed, exc in results:
+        logger.info(u'Push %s' % (u'failed' if exc else u'complete'), service=service_name,
+                    seconds=round(elapsed, 2))
+    logger.info(u'Pushed %d of %d images', len(results) - len(failures), len(results),
+                workers=push_workers, auth_seconds=auth_seconds, seconds=round(time.time() - started, 2))
+    if failures:
+        raise AnsibleContainerException(
+            u'Failed to push images for {}: {}'.format(
+                u', '.join(service_name for service_name, _ in failures),
+                u'; '.join(u'{}: {}'.format(service_name, exc) for service_name, exc in failures))
+        )
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from container.utils.visibility import getLogger
+logger = getLogger(__name__)
+
+import time
+from multiprocessing.pool import ThreadPool
+
+from container import exceptions
+from container.utils import text
+from .images import split_tag
+from .registry import StateRecord
+
+# How long, in seconds, a resolved base image is used before checking the registry for a newer one
+DEFAULT_BASE_IMAGE_TTL = 24 * 60 * 60
+
+# Base images pulled concurrently
+DEFAULT_PULL_WORKERS = 4
+
+
+class BaseImageRecord(StateRecord):
+    """
+    The local image and manifest digest each of a project's base image tags last resolved to,
+    and when, keyed by project name and tag.
+    """
+
+    RECORD_KEY = 'ansibleContainerBaseImages'
+
+    def get(self, project_name, tag):
+        return self._read().get(project_name, {}).get(tag)
+
+    def set(self, project_name, tag, image_id, digest, resolved_at):
+        def update(record):
+            record.setdefault(project_name, {})[tag] = {
+                'image_id': image_id,
+                'digest': digest,
+                'resolved_at': int(resolved_at),
+            }
+        self._write(update)
+
+
+class BaseImageResolver(object):
+    """
+    Resolves base image tags to a local image ID and the manifest digest it was pulled as.
+
+    A tag resolved within the last `ttl` seconds is used as is, provided the image it resolved to is
+    still present. Otherwise the tag is pulled again, so a floating tag like centos:7 picks up updates
+    without a manual pull. When the registry can't be reached, a local copy is still used. Tags passed
+    to start() are resolved in the background, `workers` at a time, and get() waits for one of them.
+    """
+
+    def __init__(self, engine, record, ttl=None, workers=DEFAULT_PULL_WORKERS, clock=time.time):
+        self.engine = engine
+        self.record = record
+        self.ttl = DEFAULT_BASE_IMAGE_TTL if ttl is None else ttl
+        self.workers = max(workers or DEFAULT_PULL_WORKERS, 1)
+        self._clock = clock
+        self._pool = None
+        self._results = {}
+
+    def start(self, tags):
+        for tag in sorted(set(tags)):
+            if tag not in self._results:
+                if self._pool is None:
+                    self._pool = ThreadPool(self.workers)
+                self._results[tag] = self._pool.apply_async(self.resolve, (tag,))
+
+    def get(self, tag):
+        """ Return the (image ID, digest) tag resolved to. The digest is None for an image never pulled. """
+        self.start([tag])
+        return self._results[tag].get()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _is_fresh(self, resolved, image_id):
+        return (resolved and image_id and resolved.get('image_id') == image_id and
+                0 <= self._clock() - resolved.get('resolved_at', 0) < self.ttl)
+
+    def resolve(self, tag):
+        project_name = self.engine.project_name
+        image_id = self.engine.get_image_id_by_tag(tag)
+        resolved = self.record.get(project_name, tag)
+        if self._is_fresh(resolved, image_id):
+            logger.debug(u'Using resolved base image', image=tag, digest=resolved.get('digest'))
+            return image_id, resolved.get('digest')
+
+        logger.info(u'Refreshing base image %s', tag)
+        try:
+            self.engine.pull_image_by_tag(tag)
+        except exceptions.AnsibleContainerException as exc:
+            if not image_id:
+                raise exceptions.AnsibleContainerException(
+                    u'Failed to find image {}. Try `docker image pull {}`: {}'.format(tag, tag, text.to_text(exc)))
+            logger.warning(u'Failed to refresh base image %s, using the local copy', tag, error=text.to_text(exc))
+        else:
+            image_id = self.engine.get_image_id_by_tag(tag)
+
+        digest = self.engine.get_repo_digest(image_id, split_tag(tag)[0])
+        logger.info(u'Resolved base image %s to %s', tag, digest or image_id)
+        # A failed pull is recorded too, so an image that only exists locally isn't pulled again
+        # on every build, only once the ttl runs out
+        self.record.set(project_name, tag, image_id, digest, self._clock())
+        return image_id, digest
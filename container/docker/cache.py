@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import time
+
+from six import iteritems
+
+from .images import split_tag
+from .registry import StateRecord
+
+# Builds of a project kept in the record, most recent last
+DEFAULT_HISTORY = 20
+
+# Outcomes of looking up a role's layer in the cache
+HIT = 'hit'
+MISS = 'miss'
+BUST = 'bust'
+
+
+class BuildRecord(StateRecord):
+    """
+    The layer cache outcome of each role in a project's recent builds, and when each fingerprinted
+    layer was last used by a build, keyed by project name.
+
+    A build's events are (service, role, fingerprint, outcome) tuples, where outcome is HIT when the
+    role's layer was found in the cache, BUST when it wasn't and so invalidated the layers after it,
+    and MISS for those later layers, which had to be rebuilt regardless.
+    """
+
+    RECORD_KEY = 'ansibleContainerBuilds'
+
+    def __init__(self, state_path, history=DEFAULT_HISTORY, clock=time.time):
+        super(BuildRecord, self).__init__(state_path)
+        self.history = history
+        self.clock = clock
+
+    def get(self, project_name):
+        return self._read().get(project_name, {})
+
+    def add(self, project_name, events):
+        now = int(self.clock())
+
+        def update(record):
+            project = record.setdefault(project_name, {})
+            builds = project.setdefault('builds', [])
+            builds.append({
+                'time': now,
+                'events': [[service, role, outcome] for service, role, _, outcome in events],
+            })
+            del builds[:-self.history]
+            last_used = project.setdefault('lastUsed', {})
+            for _, _, fingerprint, _ in events:
+                last_used[fingerprint] = now
+            # Layers no build in the history has used are forgotten, so the map stays as short as the history
+            oldest = builds[0]['time']
+            for fingerprint in [fingerprint for fingerprint, used in iteritems(last_used) if used < oldest]:
+                del last_used[fingerprint]
+        self._write(update)
+
+    def last_used(self, project_name):
+        """ Map each fingerprint to when a build last produced or reused its layer """
+        return self.get(project_name).get('lastUsed', {})
+
+    def role_stats(self, project_name):
+        """ Count the hits, misses and busts of each role over the recorded builds """
+        stats = {}
+        for build in self.get(project_name).get('builds', []):
+            for _, role, outcome in build.get('events', []):
+                counts = stats.setdefault(role, {HIT: 0, MISS: 0, BUST: 0})
+                if outcome in counts:
+                    counts[outcome] += 1
+        return stats
+
+    def builds(self, project_name):
+        return len(self.get(project_name).get('builds', []))
+
+
+def hit_ratio(counts):
+    total = sum(counts.values())
+    return float(counts.get(HIT, 0)) / total if total else 0.0
+
+
+class CacheLayer(object):
+    """ A fingerprinted layer in the local cache, and its size without the layers below it """
+
+    def __init__(self, image, size, last_used=None):
+        self.image = image
+        self.size = size
+        self.last_used = last_used
+
+    @property
+    def id(self):
+        return self.image['Id']
+
+    @property
+    def created(self):
+        return self.image.get('Created', 0)
+
+    def label(self, key):
+        return (self.image.get('Labels') or {}).get(key)
+
+
+def service_layers(images, repositories, roles, fingerprint_label, role_label, last_used=None):
+    """
+    Group the fingerprinted layers in a listing of every local image by the service repository whose
+    tagged images sit on top of them, newest first. Layers produced by one of the project's roles
+    that no tagged image uses are grouped under None.
+    """
+    by_id = dict((image['Id'], image) for image in images)
+    last_used = last_used or {}
+
+    def size(image):
+        parent = by_id.get(image.get('ParentId'))
+        return max(image.get('Size', 0) - (parent.get('Size', 0) if parent else 0), 0)
+
+    def layer(image):
+        fingerprint = (image.get('Labels') or {}).get(fingerprint_label)
+        return CacheLayer(image, size(image), last_used.get(fingerprint))
+
+    result = dict((repository, []) for repository in repositories)
+    seen = set()
+    for image_id, image in iteritems(by_id):
+        tagged = [split_tag(tag)[0] for tag in image.get('RepoTags') or []]
+        repository = next((repository for repository in tagged if repository in result), None)
+        if repository is None:
+            continue
+        while image_id in by_id:
+            if (repository, image_id) in seen:
+                break
+            seen.add((repository, image_id))
+            if fingerprint_label in (by_id[image_id].get('Labels') or {}):
+                result[repository].append(layer(by_id[image_id]))
+            image_id = by_id[image_id].get('ParentId')
+
+    used = set(image_id for _, image_id in seen)
+    result[None] = [layer(image) for image_id, image in iteritems(by_id)
+                    if image_id not in used and fingerprint_label in (image.get('Labels') or {})
+                    and (image.get('Labels') or {}).get(role_label) in roles]
+    for layers in result.values():
+        layers.sort(key=lambda layer: layer.created, reverse=True)
+    return result
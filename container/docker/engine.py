@@ -12,12 +12,14 @@ import datetime
 import functools
 import time
 import inspect
+import itertools
 import json
 import os
 import re
 import shutil
 import sys
 import tarfile
+from multiprocessing.pool import ThreadPool
 
 from ruamel.yaml.comments import CommentedMap
 from six import reraise, iteritems, string_types, PY3
@@ -35,10 +37,18 @@ from container.engine import BaseEngine
 from container import utils, exceptions
 from container.utils import (logmux, text, ordereddict_to_list, roles_to_install, modules_to_install,
                              ansible_config_exists, create_file)
+from .base_images import BaseImageResolver, BaseImageRecord
+from .cache import BuildRecord, service_layers, hit_ratio, HIT, MISS, BUST
+from .gc import GarbageCollector, build_containers, parse_size
+from .images import ImageIndex
+from .progress import PushProgress, human_size
+from .registry import RegistryClient, PushRecord, LoginRecord
 from .secrets import DockerSecretsMixin
+from .startup import StartupTasks, readiness_probe, compose_project_name, COMPOSE_PROJECT_LABEL
 
 try:
     import docker
+    import requests
     from docker import errors as docker_errors
     from docker.utils.ports import build_port_bindings
     from docker.errors import DockerException
@@ -72,8 +82,14 @@ DOCKER_CONFIG_FILEPATH_CASCADE = [
     os.path.join(os.environ.get('HOME', ''), '.dockercfg')
 ]
 
+# Where pushes, logins, builds and base images are recorded between runs
+STATE_PATH = os.path.join(os.environ.get('HOME', ''), '.ansible-container', 'state.json')
+
 REMOVE_HTTP = re.compile('^https?://')
 
+# Concurrent API calls when removing a project's containers and images
+DEFAULT_REMOVAL_WORKERS = 4
+
 # A map of distros and their aliases that we build pre-baked builders for
 PREBAKED_DISTROS = {
     'centos:7': ['centos:latest', 'centos:centos7'],
@@ -131,6 +147,8 @@ class Engine(BaseEngine, DockerSecretsMixin):
     CAP_BUILD_CONDUCTOR = True
     CAP_BUILD = True
     CAP_DEPLOY = True
+    CAP_CACHE = True
+    CAP_GC = True
     CAP_IMPORT = True
     CAP_INSTALL = True
     CAP_LOGIN = True
@@ -157,6 +175,7 @@ class Engine(BaseEngine, DockerSecretsMixin):
 
     FINGERPRINT_LABEL_KEY = 'com.ansible.container.fingerprint'
     ROLE_LABEL_KEY = 'com.ansible.container.role'
+    COMPONENTS_LABEL_KEY = 'com.ansible.container.fingerprint.components'
     LAYER_COMMENT = 'Built with Ansible Container (https://github.com/ansible/ansible-container)'
 
     @property
@@ -201,6 +220,10 @@ class Engine(BaseEngine, DockerSecretsMixin):
                 break
         return result
 
+    @property
+    def state_path(self):
+        return STATE_PATH
+
     @property
     def secrets_mount_path(self):
         return os.path.join(os.sep, 'docker', 'secrets')
@@ -414,6 +437,12 @@ class Engine(BaseEngine, DockerSecretsMixin):
             create_file(config_path, '{}')
             volumes[config_path] = {'bind': config_path,
                                     'mode': 'rw'}
+            # The state file is replaced on each update, so its directory is mounted rather than the file
+            state_path = params.get('state_path') or self.state_path
+            create_file(state_path, '{}')
+            volumes[os.path.dirname(state_path)] = {'bind': os.path.dirname(state_path),
+                                                    'mode': 'rw'}
+            params['state_path'] = state_path
 
         if not engine_name:
             engine_name = __name__.rsplit('.', 2)[-2]
@@ -659,10 +688,16 @@ class Engine(BaseEngine, DockerSecretsMixin):
             raise exceptions.AnsibleContainerConductorException(
                 "Unable to find image {}".format(image_id)
             )
-        if image and image.tags:
-            build_stamp = [tag for tag in image.tags if not tag.endswith(':latest')][0].split(':')[-1]
+        if image:
+            build_stamp = self.get_build_stamp_for_tags(image.tags)
         return build_stamp
 
+    @staticmethod
+    def get_build_stamp_for_tags(tags):
+        if tags:
+            return [tag for tag in tags if not tag.endswith(':latest')][0].split(':')[-1]
+        return None
+
     @conductor_only
     def pull_image_by_tag(self, image):
         repo = image
@@ -713,7 +748,8 @@ class Engine(BaseEngine, DockerSecretsMixin):
                              fingerprint,
                              role_name,
                              metadata,
-                             with_name=False):
+                             with_name=False,
+                             components=None):
         metadata = metadata.copy()
         to_commit = self.client.containers.get(container_id)
         image_name = self.image_name_for_service(service_name)
@@ -731,6 +767,8 @@ class Engine(BaseEngine, DockerSecretsMixin):
         image_config = utils.metadata_to_image_config(metadata)
         image_config.setdefault('Labels', {})[self.FINGERPRINT_LABEL_KEY] = fingerprint
         image_config['Labels'][self.ROLE_LABEL_KEY] = role_name
+        if components:
+            image_config['Labels'][self.COMPONENTS_LABEL_KEY] = json.dumps(components, sort_keys=True)
         commit_data = dict(
             repository=image_name if with_name else None,
             tag=image_version if with_name else None,
@@ -741,6 +779,22 @@ class Engine(BaseEngine, DockerSecretsMixin):
         logger.debug('Committing new layer', params=commit_data)
         return to_commit.commit(**commit_data).id
 
+    @conductor_only
+    def get_fingerprint_components(self, service_name, role_name):
+        image = self.get_latest_image_for_service(service_name)
+        while image is not None:
+            labels = image.attrs['Config'].get('Labels') or {}
+            if labels.get(self.ROLE_LABEL_KEY) == role_name:
+                try:
+                    return json.loads(labels.get(self.COMPONENTS_LABEL_KEY) or '{}')
+                except ValueError:
+                    return {}
+            try:
+                image = self.client.images.get(image.attrs['Parent']) if image.attrs.get('Parent') else None
+            except docker_errors.ImageNotFound:
+                image = None
+        return {}
+
     def tag_image_as_latest(self, service_name, image_id):
         image_obj = self.client.images.get(image_id)
         image_obj.tag(self.image_name_for_service(service_name), 'latest')
@@ -763,14 +817,23 @@ class Engine(BaseEngine, DockerSecretsMixin):
         return top_level_secrets
 
     @conductor_only
-    def generate_orchestration_playbook(self, url=None, namespace=None, vault_files=None, **kwargs):
+    def generate_orchestration_playbook(self, url=None, namespace=None, vault_files=None, states=None,
+                                        startup_workers=None, remove_images=True, **kwargs):
         """
         Generate an Ansible playbook to orchestrate services.
         :param url: registry URL where images will be pulled from
         :param namespace: registry namespace
+        :param states: lifecycle states to generate tasks for, defaults to ORCHESTRATION_STATES
+        :param startup_workers: when starting, start services along their dependencies, this many at a time
+        :param remove_images: on destroy, remove the project's images from within the playbook
         :return: playbook dict
         """
-        states = ['start', 'restart', 'stop', 'destroy']
+        # Services are only started one by one when a start is requested, not in the deployed playbook
+        parallel_startup = states is not None and (
+            startup_workers or any(readiness_probe(service) for service in self.services.values()))
+        states = list(states or self.ORCHESTRATION_STATES)
+        # One listing of local images serves every lookup below
+        image_index = ImageIndex.from_client(self.client)
         service_def = {}
         for service_name, service in iteritems(self.services):
             service_definition = {}
@@ -781,7 +844,7 @@ class Engine(BaseEngine, DockerSecretsMixin):
                                                                      self.image_name_for_service(service_name))
                 else:
                     # Check that the image was built
-                    image = self.get_latest_image_for_service(service_name)
+                    image = image_index.latest(self.image_name_for_service(service_name))
                     if image is None:
                         raise exceptions.AnsibleContainerConductorException(
                             u"No image found for service {}, make sure you've run `ansible-container "
@@ -789,11 +852,11 @@ class Engine(BaseEngine, DockerSecretsMixin):
                         )
                     service_definition[u'image'] = image.tags[0]
             else:
-                try:
-                    # Check if the image is already local
-                    image = self.client.images.get(service['from'])
+                # Check if the image is already local
+                image = image_index.get(service['from'])
+                if image is not None:
                     image_from = image.tags[0]
-                except docker.errors.ImageNotFound:
+                else:
                     image_from = service['from']
                     logger.warning(u"Image {} for service {} not found. "
                                    u"An attempt will be made to pull it.".format(service['from'], service_name))
@@ -852,11 +915,15 @@ class Engine(BaseEngine, DockerSecretsMixin):
                 task_params[u'state'] = u'absent'
                 task_params[u'remove_volumes'] = u'yes'
 
-            tasks.append({u'docker_service': task_params, u'tags': [desired_state]})
+            if desired_state == 'start' and parallel_startup:
+                tasks.extend(StartupTasks(self.project_name, self.container_name_for_service('conductor'),
+                                          task_params, self.services, workers=startup_workers))
+            else:
+                tasks.append({u'docker_service': task_params, u'tags': [desired_state]})
 
         playbook = []
 
-        if self.secrets and self.CAP_SIM_SECRETS:
+        if self.secrets and self.CAP_SIM_SECRETS and set(states) & {'start', 'restart', 'stop'}:
             playbook.append(self.generate_secrets_play(vault_files=vault_files))
 
         playbook.append(CommentedMap([
@@ -869,23 +936,20 @@ class Engine(BaseEngine, DockerSecretsMixin):
             playbook[len(playbook) - 1][u'vars_files'] = [os.path.normpath(os.path.abspath(v)) for v in vault_files]
         playbook[len(playbook) - 1][u'tasks'] = tasks
 
-        for service in list(self.services.keys()) + ['conductor']:
-            image_name = self.image_name_for_service(service)
-            for image in self.client.images.list(name=image_name):
-                logger.debug('Found image for service', tags=image.tags, id=image.short_id)
-                for tag in image.tags:
-                    if tag.startswith(self.project_name):
-                        logger.debug('Adding task to destroy image', tag=tag)
-                        playbook[len(playbook) - 1][u'tasks'].append({
-                            u'docker_image': {
-                                u'name': tag,
-                                u'state': u'absent',
-                                u'force': u'yes'
-                            },
-                            u'tags': u'destroy'
-                        })
-
-        if self.secrets and self.CAP_SIM_SECRETS:
+        image_tags = self.get_project_image_tags(image_index) if remove_images and 'destroy' in states else []
+        if image_tags:
+            logger.debug('Adding task to destroy images', tags=image_tags)
+            playbook[len(playbook) - 1][u'tasks'].append({
+                u'docker_image': {
+                    u'name': u'{{ item }}',
+                    u'state': u'absent',
+                    u'force': u'yes'
+                },
+                u'with_items': image_tags,
+                u'tags': u'destroy'
+            })
+
+        if self.secrets and self.CAP_SIM_SECRETS and 'destroy' in states:
             playbook.append(self.generate_remove_volume_play())
 
         logger.debug(u'Created playbook to run project', playbook=playbook)
@@ -893,9 +957,11 @@ class Engine(BaseEngine, DockerSecretsMixin):
 
     @conductor_only
     def push(self, image_id, service_name, tag=None, namespace=None, url=None, username=None, password=None,
-             repository_prefix=None, **kwargs):
+             repository_prefix=None, state_path=None, **kwargs):
         """
-        Push an image to a remote registry.
+        Push an image to a remote registry. When the digest this image was last pushed as is known,
+        and the registry still has that manifest, the push is skipped, or the tag is pointed at the
+        existing manifest remotely. Pushed digests are recorded in the state file at state_path.
         """
         auth_config = {
             'username': username,
@@ -904,6 +970,7 @@ class Engine(BaseEngine, DockerSecretsMixin):
 
         build_stamp = self.get_build_stamp_for_image(image_id)
         tag = tag or build_stamp
+        push_record = PushRecord(state_path) if state_path else None
 
         if repository_prefix:
             image_name = "{}-{}".format(repository_prefix, service_name)
@@ -911,7 +978,10 @@ class Engine(BaseEngine, DockerSecretsMixin):
             image_name = "{}-{}".format(self.project_name, service_name)
         elif repository_prefix == '':
             image_name = service_name
-        repository = "{}/{}".format(namespace, image_name)
+        registry_repository = "{}/{}".format(namespace, image_name)
+        repository = registry_repository
+        # The registry's API is reached with the scheme it was given, which the repository name drops
+        registry_url = url
 
         if url != self.default_registry_url:
             url = REMOVE_HTTP.sub('', url)
@@ -920,25 +990,82 @@ class Engine(BaseEngine, DockerSecretsMixin):
         logger.info('Tagging %s' % repository)
         self.client.api.tag(image_id, repository, tag=tag)
 
+        pushed_digest = self._get_pushed_digest(image_id, url, repository, push_record)
+        if pushed_digest:
+            registry = RegistryClient(registry_url, username=username, password=password)
+            try:
+                remote_digest = registry.get_manifest_digest(registry_repository, tag)
+                if remote_digest == pushed_digest:
+                    logger.info('Registry already has %s:%s. Skipping push.' % (repository, tag),
+                                digest=pushed_digest)
+                    return pushed_digest
+                if registry.get_manifest_digest(registry_repository, pushed_digest) and \
+                        registry.tag_manifest(registry_repository, pushed_digest, tag):
+                    logger.info('Registry already has the image for %s. Tagged it as %s remotely.' %
+                                (repository, tag), digest=pushed_digest)
+                    return pushed_digest
+            except requests.RequestException as exc:
+                logger.debug('Unable to query registry for existing manifest', repository=repository,
+                             error=str(exc))
+
         logger.info('Pushing %s:%s...' % (repository, tag))
-        stream = self.client.api.push(repository, tag=tag, stream=True, auth_config=auth_config)
-
-        last_status = None
-        for data in stream:
-            data = data.splitlines()
-            for line in data:
-                line = json.loads(line)
-                if type(line) is dict and 'error' in line:
-                    plainLogger.error(line['error'])
-                    raise exceptions.AnsibleContainerException(
-                        "Failed to push image. {}".format(line['error'])
-                    )
-                elif type(line) is dict and 'status' in line:
-                    if line['status'] != last_status:
-                        plainLogger.info(line['status'])
-                    last_status = line['status']
-                else:
-                    plainLogger.debug(line)
+        stream = self.client.api.push(repository, tag=tag, stream=True, decode=True, auth_config=auth_config)
+
+        # Several images may be pushing at once, so keep each image's progress identifiable
+        progress = PushProgress('%s:%s' % (repository, tag))
+        digest = None
+        for line in stream:
+            if type(line) is not dict:
+                plainLogger.debug(line)
+            elif 'error' in line:
+                plainLogger.error(line['error'])
+                raise exceptions.AnsibleContainerException(
+                    "Failed to push image. {}".format(line['error'])
+                )
+            elif 'status' in line:
+                progress.update(line)
+            elif line.get('aux', {}).get('Digest'):
+                digest = line['aux']['Digest']
+            else:
+                plainLogger.debug(line)
+        progress.report()
+
+        if digest and push_record:
+            push_record.set(url, repository, image_id, digest)
+        return digest
+
+    def _get_pushed_digest(self, image_id, url, repository, push_record=None):
+        """
+        Return the manifest digest image_id was last pushed to repository as. Falls back to the
+        image's RepoDigests, which the daemon records on every push and pull.
+        """
+        if push_record:
+            digest = push_record.get(url, repository, image_id)
+            if digest:
+                return digest
+        return self.get_repo_digest(image_id, repository, exact=True)
+
+    def get_repo_digest(self, image_id, repository, exact=False):
+        """
+        Return the manifest digest the daemon recorded for image_id when it was pushed to or pulled
+        from repository. Unless exact, falls back to the image's first recorded digest.
+        """
+        try:
+            image = self.client.images.get(image_id)
+        except docker_errors.ImageNotFound:
+            return None
+        repo_digests = image.attrs.get('RepoDigests') or []
+        for repo_digest in repo_digests:
+            name, _, digest = repo_digest.partition('@')
+            if name == repository:
+                return digest
+        if repo_digests and not exact:
+            return repo_digests[0].partition('@')[2]
+        return None
+
+    @conductor_only
+    def get_base_image_resolver(self, ttl=None, state_path=None):
+        return BaseImageResolver(self, BaseImageRecord(state_path), ttl=ttl)
 
     @staticmethod
     def _prepare_prebake_manifest(base_path, base_image, temp_dir, tarball):
@@ -1183,12 +1310,17 @@ class Engine(BaseEngine, DockerSecretsMixin):
         dfi.run()
 
     @conductor_only
-    def login(self, username, password, email, url, config_path):
+    def login(self, username, password, email, url, config_path, state_path=None):
         """
-        If username and password are provided, authenticate with the registry.
-        Otherwise, check the config file for existing authentication data.
+        If username and password are provided, authenticate with the registry, unless the config
+        file already holds them and they were verified with the registry recently. Otherwise,
+        check the config file for existing authentication data.
         """
-        if username and password:
+        login_record = LoginRecord(state_path)
+        if username and password and login_record.is_verified(config_path, url) and \
+                self._get_registry_auth(url, config_path) == (username, password):
+            logger.debug(u'Using recently verified login', registry=url)
+        elif username and password:
             try:
                 self.client.login(username=username, password=password, email=email,
                                   registry=url, reauth=True)
@@ -1200,6 +1332,7 @@ class Engine(BaseEngine, DockerSecretsMixin):
                 raise
 
             self._update_config_file(username, password, email, url, config_path)
+            login_record.verified(config_path, url)
 
         username, password = self._get_registry_auth(url, config_path)
         if not username:
@@ -1223,7 +1356,7 @@ class Engine(BaseEngine, DockerSecretsMixin):
         if not config['auths'].get(url):
             config['auths'][url] = dict()
         encoded_credentials = dict(
-            auth=base64.b64encode(username + b':' + password),
+            auth=text.to_text(base64.b64encode(text.to_bytes(u'%s:%s' % (username, password)))),
             email=email
         )
         config['auths'][url] = encoded_credentials
@@ -1252,9 +1385,230 @@ class Engine(BaseEngine, DockerSecretsMixin):
             docker_config = docker_config['auths']
         auth_key = docker_config.get(registry_url, {}).get('auth', None)
         if auth_key:
-            username, password = base64.b64decode(auth_key).split(':', 1)
+            username, password = text.to_text(base64.b64decode(auth_key)).split(u':', 1)
         return username, password
 
     @conductor_only
     def pre_deployment_setup(self, project_name, services, **kwargs):
         pass
+
+    def get_project_image_tags(self, image_index=None):
+        """ Return the tags of the project's service and conductor images """
+        image_index = image_index or ImageIndex.from_client(self.client)
+        tags = []
+        for service in list(self.services.keys()) + ['conductor']:
+            tags.extend(tag for tag in image_index.tags(self.image_name_for_service(service))
+                        if tag.startswith(self.project_name))
+        return tags
+
+    @conductor_only
+    def post_destroy_cleanup(self, workers=DEFAULT_REMOVAL_WORKERS, **kwargs):
+        """
+        Remove the project's leftover containers, such as those of intermediate builds, and all
+        of its images, making at most `workers` API calls at a time. Logs the disk space reclaimed.
+        """
+        started = time.time()
+        layers_size = self._get_layers_size()
+
+        conductor_name = self.container_name_for_service('conductor')
+        # Service containers carry Compose's project label, and build containers are named after their
+        # service. Matching on the project name alone would take in other projects sharing its prefix.
+        compose_project = compose_project_name(self.project_name)
+        build_names = set(self.container_name_for_service(service_name) for service_name in self.services)
+        build_prefixes = tuple(u'%s-' % name for name in build_names)
+
+        def _is_project_container(container):
+            if container.name == conductor_name:
+                return False
+            if (container.labels or {}).get(COMPOSE_PROJECT_LABEL) == compose_project:
+                return True
+            return container.name in build_names or container.name.startswith(build_prefixes)
+
+        containers = [c for c in self.client.containers.list(all=True) if _is_project_container(c)]
+
+        # Remove images by ID when every tag belongs to the project, otherwise remove only the project's
+        # tags. The image of the running conductor can only be untagged.
+        image_index = ImageIndex.from_client(self.client)
+        project_tags = set(self.get_project_image_tags(image_index))
+        conductor_image_id = self.get_image_id_for_container_id(conductor_name)
+        to_remove = set()
+        for tag in project_tags:
+            image = image_index.by_tag[tag]
+            if image.id != conductor_image_id and project_tags.issuperset(image.tags):
+                to_remove.add(image.id)
+            else:
+                to_remove.add(tag)
+
+        def _remove_container(container):
+            try:
+                container.remove(v=True, force=True)
+            except docker_errors.APIError as exc:
+                return container.name, exc
+            return container.name, None
+
+        def _remove_image(image):
+            try:
+                self.client.images.remove(image, force=True)
+            except docker_errors.ImageNotFound:
+                pass
+            except docker_errors.APIError as exc:
+                return image, exc
+            return image, None
+
+        pool = ThreadPool(max(workers, 1))
+        try:
+            failures = [result for result in pool.map(_remove_container, containers) if result[1]]
+            # Images can only be removed once the containers using them are gone
+            failures += [result for result in pool.map(_remove_image, sorted(to_remove)) if result[1]]
+        finally:
+            pool.close()
+            pool.join()
+
+        for name, exc in failures:
+            logger.warning(u'Failed to remove %s' % name, error=text.to_text(exc))
+
+        reclaimed = None
+        if layers_size is not None:
+            reclaimed = max(layers_size - (self._get_layers_size() or 0), 0)
+        logger.info(u'Removed %d containers and %d images%s' % (
+            len(containers), len(to_remove),
+            u', reclaiming %s' % human_size(reclaimed) if reclaimed is not None else u''),
+            failures=len(failures), seconds=round(time.time() - started, 2))
+        return reclaimed
+
+    def get_project_roles(self):
+        """ Return the names of the roles used to build the project's services """
+        roles = set()
+        for service in self.services.values():
+            for definition in service.get('containers') or [service]:
+                for role in definition.get('roles') or []:
+                    roles.add(role.get('role') if isinstance(role, dict) else role)
+        return roles
+
+    def get_service_repositories(self):
+        """ Return the image repository of each service, or of each container in a multi-container service """
+        repositories = []
+        for service_name, service in iteritems(self.services):
+            if service.get('containers'):
+                repositories.extend(self.image_name_for_service('%s-%s' % (service_name, c['container_name']))
+                                    for c in service['containers'])
+            else:
+                repositories.append(self.image_name_for_service(service_name))
+        return repositories
+
+    @conductor_only
+    def record_build_cache(self, events, state_path=None):
+        if state_path and events:
+            BuildRecord(state_path).add(self.project_name, events)
+
+    @host_only
+    def cache_stats(self, state_path=None):
+        """
+        Report each service's fingerprinted layers, with their size, role and when a build last used
+        them, then the hit ratio of each role over the builds kept in the record. Returns the layers
+        grouped by service repository, and the per-role counts.
+        """
+        record = BuildRecord(state_path or self.state_path)
+        # Every image, so each layer's size can be taken net of its parent's
+        layers = service_layers(self.client.api.images(all=True), self.get_service_repositories(),
+                                self.get_project_roles(), self.FINGERPRINT_LABEL_KEY, self.ROLE_LABEL_KEY,
+                                last_used=record.last_used(self.project_name))
+
+        def _when(timestamp):
+            if not timestamp:
+                return u'-'
+            return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+
+        plainLogger.info(u'%-14s %-10s %-20s %-16s %-16s' % (u'LAYER', u'SIZE', u'ROLE', u'CREATED', u'LAST USED'))
+        total = 0
+        for repository in sorted(layers, key=lambda repository: (repository is None, repository)):
+            if not layers[repository]:
+                continue
+            plainLogger.info(repository or u'(not used by any service image)')
+            for layer in layers[repository]:
+                plainLogger.info(u'%-14s %-10s %-20s %-16s %-16s' % (
+                    layer.id.split(':')[-1][:12], human_size(layer.size),
+                    layer.label(self.ROLE_LABEL_KEY) or u'<none>', _when(layer.created), _when(layer.last_used)))
+            total += sum(layer.size for layer in layers[repository])
+
+        stats = record.role_stats(self.project_name)
+        plainLogger.info(u'')
+        plainLogger.info(u'%-20s %6s %6s %6s %6s' % (u'ROLE', HIT.upper(), MISS.upper(), BUST.upper(), u'RATIO'))
+        for role in sorted(stats):
+            plainLogger.info(u'%-20s %6d %6d %6d %5.0f%%' % (
+                role, stats[role][HIT], stats[role][MISS], stats[role][BUST], hit_ratio(stats[role]) * 100))
+        logger.info(u'Cached layers take %s, over %d recorded builds' % (
+            human_size(total), record.builds(self.project_name)))
+        return layers, stats
+
+    @host_only
+    def collect_garbage(self, keep=3, max_disk=None, dry_run=False, workers=DEFAULT_REMOVAL_WORKERS):
+        """
+        Remove the project's stale images and intermediate build containers, keeping the last `keep`
+        builds of each service and everything tagged latest, and staying within the `max_disk` budget.
+        With dry_run, only report what would be removed.
+        """
+        started = time.time()
+        collector = GarbageCollector(self.client.api.images(all=True), self.get_service_repositories(),
+                                     self.get_project_roles(), self.FINGERPRINT_LABEL_KEY, self.ROLE_LABEL_KEY, keep=keep,
+                                     max_bytes=parse_size(max_disk) if max_disk else None)
+        removals = collector.plan()
+
+        service_container_names = [self.container_name_for_service(service_name) for service_name in self.services]
+        containers = build_containers(self.client.containers.list(all=True, filters={'status': 'exited'}),
+                                      service_container_names)
+
+        for c in containers:
+            plainLogger.info(u'%-14s %-10s %s' % (u'container', u'', c.name))
+        for removal in removals:
+            plainLogger.info(u'%-14s %-10s %s (%s)' % (
+                removal.id.split(':')[-1][:12], human_size(removal.size),
+                u', '.join(removal.tags) or removal.image.get('Labels', {}).get(self.ROLE_LABEL_KEY) or u'<none>',
+                removal.reason))
+
+        reclaimable = sum(removal.size for removal in removals)
+        if dry_run:
+            logger.info(u'Would remove %d containers and %d images, reclaiming %s' % (
+                len(containers), len(removals), human_size(reclaimable)))
+            return removals
+
+        def _remove_container(c):
+            try:
+                c.remove(v=True)
+            except docker_errors.APIError as exc:
+                return c.name, exc
+            return c.name, None
+
+        def _remove_image(removal):
+            try:
+                self.client.api.remove_image(removal.id, force=True, noprune=True)
+            except docker_errors.ImageNotFound:
+                pass
+            except docker_errors.APIError as exc:
+                return removal.id, exc
+            return removal.id, None
+
+        pool = ThreadPool(max(workers, 1))
+        try:
+            failures = [result for result in pool.map(_remove_container, containers) if result[1]]
+            # Images at the same depth can't depend on one another, so each depth is removed concurrently
+            for _, group in itertools.groupby(removals, key=lambda removal: removal.depth):
+                failures += [result for result in pool.map(_remove_image, list(group)) if result[1]]
+        finally:
+            pool.close()
+            pool.join()
+
+        failed = set(name for name, _ in failures)
+        for name, exc in failures:
+            logger.warning(u'Failed to remove %s' % name, error=text.to_text(exc))
+        logger.info(u'Removed %d containers and %d images, reclaiming %s' % (
+            len(containers), len(removals),
+            human_size(sum(removal.size for removal in removals if removal.id not in failed))),
+            failures=len(failures), seconds=round(time.time() - started, 2))
+        return removals
+
+    def _get_layers_size(self):
+        try:
+            return self.client.df().get('LayersSize')
+        except (docker_errors.APIError, AttributeError):
+            return None
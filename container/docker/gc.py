@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import re
+
+from six import iteritems
+
+from container import exceptions
+from .images import split_tag
+from .startup import COMPOSE_PROJECT_LABEL
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(size):
+    """ Parse a disk size such as 500M or 20G into bytes """
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$', str(size), re.IGNORECASE)
+    if not match:
+        raise exceptions.AnsibleContainerRequestException(
+            u'Invalid disk size {}. Expecting a number, optionally followed by K, M, G or T.'.format(size))
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def build_containers(containers, service_container_names):
+    """
+    Select the intermediate containers build leaves behind, named <project>_<service>-<fingerprint>-<role>
+    after one of service_container_names. Containers Compose created are never selected, even when a
+    service's name happens to extend another's, as web-api does web.
+    """
+    if not service_container_names:
+        return []
+    pattern = re.compile(r'^(%s)-[0-9a-f]{8}-[A-Za-z0-9_.-]+$' %
+                         u'|'.join(re.escape(name) for name in service_container_names))
+    return [c for c in containers
+            if COMPOSE_PROJECT_LABEL not in (c.labels or {}) and pattern.match(c.name)]
+
+
+class Removal(object):
+    """ An image the garbage collector plans to remove, and why """
+
+    def __init__(self, image, size, reason, depth=0):
+        self.image = image
+        self.size = size
+        self.reason = reason
+        self.depth = depth
+
+    @property
+    def id(self):
+        return self.image['Id']
+
+    @property
+    def tags(self):
+        return [tag for tag in self.image.get('RepoTags') or [] if tag != '<none>:<none>']
+
+    @property
+    def created(self):
+        return self.image.get('Created', 0)
+
+
+class GarbageCollector(object):
+    """
+    Plans which of a project's images to remove, from a single listing of every local image.
+
+    The project's images are those tagged in its service repositories, and the fingerprint labelled
+    layers below them or produced by its roles. Retention policy:
+
+    - Images tagged latest, and every layer below them, are always kept.
+    - The last `keep` builds of each service, by creation time, are kept, along with their layers.
+      When latest is among them, it counts towards `keep`.
+    - Every other project image is removed.
+    - If `max_bytes` is set and the kept images still take more space, the least recently created
+      builds, other than latest, are removed until they fit.
+    """
+
+    def __init__(self, images, repositories, roles, fingerprint_label, role_label, keep=3, max_bytes=None):
+        self.images = dict((image['Id'], image) for image in images)
+        self.repositories = set(repositories)
+        self.roles = set(roles)
+        self.fingerprint_label = fingerprint_label
+        self.role_label = role_label
+        self.keep = keep
+        self.max_bytes = max_bytes
+
+    def size(self, image):
+        """ The disk space used by the image itself, without its parent layers """
+        parent = self.images.get(image.get('ParentId'))
+        return max(image.get('Size', 0) - (parent.get('Size', 0) if parent else 0), 0)
+
+    def ancestors(self, image_ids):
+        """ Return image_ids, and every image below them """
+        result = set()
+        for image_id in image_ids:
+            while image_id in self.images and image_id not in result:
+                result.add(image_id)
+                image_id = self.images[image_id].get('ParentId')
+        return result
+
+    def _labels(self, image):
+        return image.get('Labels') or {}
+
+    def builds(self):
+        """ Return each service repository's images, newest first, and the set of images tagged latest """
+        builds = dict((repository, []) for repository in self.repositories)
+        latest = set()
+        for image_id, image in iteritems(self.images):
+            for tag in image.get('RepoTags') or []:
+                repository, tag_name = split_tag(tag)
+                if repository in builds:
+                    if image_id not in builds[repository]:
+                        builds[repository].append(image_id)
+                    if tag_name == 'latest':
+                        latest.add(image_id)
+        for repository in builds:
+            builds[repository].sort(key=lambda image_id: self.images[image_id].get('Created', 0), reverse=True)
+        return builds, latest
+
+    def project_images(self, builds):
+        """ The project's tagged builds, the fingerprint labelled layers below them, and its roles' layers """
+        tagged = set(image_id for image_ids in builds.values() for image_id in image_ids)
+        result = set(tagged)
+        for image_id in self.ancestors(tagged):
+            if self.fingerprint_label in self._labels(self.images[image_id]):
+                result.add(image_id)
+        for image_id, image in iteritems(self.images):
+            labels = self._labels(image)
+            if self.fingerprint_label in labels and labels.get(self.role_label) in self.roles:
+                result.add(image_id)
+        return result
+
+    def plan(self):
+        """ Return the list of removals, ordered so that images are removed before the layers below them """
+        builds, latest = self.builds()
+        project = self.project_images(builds)
+        tagged = set(image_id for image_ids in builds.values() for image_id in image_ids)
+        kept_builds = set(latest)
+        for image_ids in builds.values():
+            kept_builds.update(image_ids[:self.keep])
+
+        reasons = {}
+        kept = self.ancestors(kept_builds) & project
+        for image_id in project - kept:
+            reasons[image_id] = u'old build' if image_id in tagged else u'unused layer'
+
+        if self.max_bytes is not None:
+            protected = self.ancestors(latest)
+            footprint = sum(self.size(self.images[image_id]) for image_id in kept)
+            # Least recently created first
+            evictable = sorted(kept_builds - latest, key=lambda image_id: self.images[image_id].get('Created', 0))
+            for image_id in evictable:
+                if footprint <= self.max_bytes:
+                    break
+                kept_builds.discard(image_id)
+                still_kept = (self.ancestors(kept_builds) | protected) & project
+                for evicted in kept - still_kept:
+                    reasons[evicted] = u'over disk budget'
+                    footprint -= self.size(self.images[evicted])
+                kept = still_kept
+
+        removals = [Removal(self.images[image_id], self.size(self.images[image_id]), reason,
+                            depth=len(self.ancestors([image_id])))
+                    for image_id, reason in iteritems(reasons)]
+        # Deepest first, as Docker won't remove an image with children
+        removals.sort(key=lambda removal: (removal.depth, removal.created), reverse=True)
+        return removals
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from collections import defaultdict
+
+
+def split_tag(reference):
+    """
+    Split an image reference into repository and tag. A colon only separates a tag when nothing
+    after it contains a slash, otherwise it belongs to a registry host:port.
+    """
+    repository, sep, tag = reference.rpartition(':')
+    if not sep or '/' in tag:
+        return reference, None
+    return repository, tag
+
+
+class ImageIndex(object):
+    """
+    Local images, by tag and by repository, from a single listing. Lets playbook generation look
+    up every service's images without asking the daemon once per service.
+    """
+
+    def __init__(self, images):
+        self.by_tag = {}
+        self.by_repository = defaultdict(list)
+        for image in images:
+            for image_tag in image.tags:
+                self.by_tag[image_tag] = image
+                repository, tag = split_tag(image_tag)
+                self.by_repository[repository].append((tag, image))
+
+    @classmethod
+    def from_client(cls, client):
+        return cls(client.images.list())
+
+    def get(self, reference):
+        """ Return the image for reference, or None. A reference without a tag means latest. """
+        if split_tag(reference)[1] is None:
+            reference = '%s:latest' % reference
+        return self.by_tag.get(reference)
+
+    def tags(self, repository):
+        """ Return the full tags of every image in repository. """
+        return ['%s:%s' % (repository, tag) for tag, _ in self.by_repository.get(repository, [])]
+
+    def latest(self, repository):
+        """
+        Return the image tagged latest in repository, or failing that, the one with the
+        highest tag.
+        """
+        tagged = dict(self.by_repository.get(repository, []))
+        if not tagged:
+            return None
+        if 'latest' in tagged:
+            return tagged['latest']
+        return tagged[sorted(tagged)[-1]]
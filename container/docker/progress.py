@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import logging
+plainLogger = logging.getLogger(__name__)
+
+import time
+
+# Layer statuses meaning the registry already had the layer, and nothing was uploaded
+SKIPPED_STATUSES = ('Layer already exists', 'Mounted from')
+
+
+def human_size(num_bytes):
+    size = float(num_bytes)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            break
+        size /= 1024
+    return '%.1f %s' % (size, unit) if unit != 'B' else '%d B' % size
+
+
+class PushProgress(object):
+    """
+    Aggregates the progress messages of a push stream into per-layer byte counts, and logs a one
+    line summary at most every `interval` seconds, rather than a line for every status change.
+    """
+
+    def __init__(self, name, interval=5.0, clock=time.time):
+        self.name = name
+        self.interval = interval
+        self._clock = clock
+        self.started = self._clock()
+        self._last_report = self.started
+        self.layers = {}
+        self.pushed = set()
+        self.skipped = set()
+
+    @property
+    def bytes_pushed(self):
+        return sum(current for current, _ in self.layers.values())
+
+    @property
+    def bytes_total(self):
+        return sum(total for _, total in self.layers.values())
+
+    @property
+    def elapsed(self):
+        return self._clock() - self.started
+
+    def update(self, line):
+        """ Record a decoded status message from the push stream. """
+        layer_id = line.get('id')
+        status = line.get('status', '')
+        if not layer_id or status.startswith('The push refers to'):
+            return
+        if status.startswith(SKIPPED_STATUSES):
+            self.skipped.add(layer_id)
+            self.layers.pop(layer_id, None)
+        elif status == 'Pushing':
+            detail = line.get('progressDetail') or {}
+            current, total = self.layers.get(layer_id, (0, 0))
+            self.layers[layer_id] = (detail.get('current', current), detail.get('total', total))
+        elif status == 'Pushed':
+            self.pushed.add(layer_id)
+            current, total = self.layers.get(layer_id, (0, 0))
+            self.layers[layer_id] = (max(current, total), max(current, total))
+
+        now = self._clock()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            plainLogger.info(self.summary())
+
+    def summary(self):
+        elapsed = self.elapsed
+        rate = self.bytes_pushed / elapsed if elapsed > 0 else 0
+        total = self.bytes_total
+        return '%s: %d/%d layers pushed, %s%s at %s/s' % (
+            self.name,
+            len(self.pushed),
+            len(self.layers),
+            human_size(self.bytes_pushed),
+            ' of %s' % human_size(total) if total > self.bytes_pushed else '',
+            human_size(rate))
+
+    def report(self):
+        """ Log the final summary of the push. """
+        plainLogger.info('%s: pushed %d layers (%s), %d already existed, in %.1fs' % (
+            self.name,
+            len(self.pushed),
+            human_size(self.bytes_pushed),
+            len(self.skipped),
+            self.elapsed))
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from container.utils.visibility import getLogger
+logger = getLogger(__name__)
+
+import errno
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from six.moves.urllib.parse import urlparse
+
+
+DOCKER_HUB_INDEX_URL = u'https://index.docker.io/v1/'
+DOCKER_HUB_REGISTRY_URL = u'https://registry-1.docker.io'
+
+MANIFEST_MEDIA_TYPES = [
+    'application/vnd.docker.distribution.manifest.v2+json',
+    'application/vnd.docker.distribution.manifest.list.v2+json',
+    'application/vnd.oci.image.manifest.v1+json',
+    'application/vnd.docker.distribution.manifest.v1+prettyjws',
+]
+
+REQUEST_TIMEOUT = 30
+
+
+class RegistryClient(object):
+    """
+    Just enough of the Docker Registry HTTP API V2 to find out whether a registry already holds
+    a manifest, and to point a tag at a manifest it already has, without pushing any layers.
+    """
+
+    def __init__(self, url, username=None, password=None):
+        self.base_url = self.api_url(url)
+        self._auth = (username, password) if username else None
+        self._token = None
+        self._session = requests.Session()
+
+    @staticmethod
+    def api_url(url):
+        """ Translate a registry URL, as given to push, into the base URL of its V2 API. """
+        if not url or url.rstrip('/') == DOCKER_HUB_INDEX_URL.rstrip('/'):
+            return DOCKER_HUB_REGISTRY_URL
+        if not re.match(r'^https?://', url):
+            url = u'https://' + url
+        parsed = urlparse(url)
+        return u'%s://%s' % (parsed.scheme, parsed.netloc)
+
+    def _fetch_token(self, challenge):
+        params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+        realm = params.pop('realm', None)
+        if not realm:
+            return False
+        response = self._session.get(realm, params=params, auth=self._auth, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            logger.debug(u'Registry token request refused', realm=realm, status=response.status_code)
+            return False
+        body = response.json()
+        self._token = body.get('token') or body.get('access_token')
+        return bool(self._token)
+
+    def _request(self, method, path, headers=None, **kwargs):
+        headers = dict(headers or {})
+        url = u'%s/v2/%s' % (self.base_url, path)
+        for attempt in range(2):
+            request_headers = dict(headers)
+            auth = self._auth
+            if self._token:
+                request_headers['Authorization'] = u'Bearer %s' % self._token
+                auth = None
+            response = self._session.request(method, url, headers=request_headers, auth=auth,
+                                             timeout=REQUEST_TIMEOUT, **kwargs)
+            challenge = response.headers.get('WWW-Authenticate', '')
+            if response.status_code != 401 or attempt or not challenge.lower().startswith('bearer'):
+                break
+            # Token scopes are per repository and action, so a new one may be needed for each call
+            if not self._fetch_token(challenge):
+                break
+        return response
+
+    def get_manifest_digest(self, repository, reference):
+        """
+        Return the digest of the manifest for repository:reference, or None if the registry
+        doesn't have it.
+        """
+        response = self._request('HEAD', u'%s/manifests/%s' % (repository, reference),
+                                 headers={'Accept': ', '.join(MANIFEST_MEDIA_TYPES)})
+        if response.status_code != 200:
+            return None
+        return response.headers.get('Docker-Content-Digest')
+
+    def tag_manifest(self, repository, digest, tag):
+        """
+        Point tag at the existing manifest identified by digest. Returns True on success.
+        """
+        response = self._request('GET', u'%s/manifests/%s' % (repository, digest),
+                                 headers={'Accept': ', '.join(MANIFEST_MEDIA_TYPES)})
+        if response.status_code != 200:
+            return False
+        response = self._request('PUT', u'%s/manifests/%s' % (repository, tag),
+                                 data=response.content,
+                                 headers={'Content-Type': response.headers.get('Content-Type',
+                                                                               MANIFEST_MEDIA_TYPES[0])})
+        return response.status_code in (200, 201)
+
+
+class StateRecord(object):
+    """
+    A record kept between runs, under a key of its own, in a state file of ansible-container's own,
+    apart from the engine's registry credentials. The conductor gets the file's directory mounted
+    for login, push and build.
+    """
+
+    RECORD_KEY = None
+
+    # Images are pushed from several threads, each of which may update the record
+    _lock = threading.Lock()
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+
+    def _load(self):
+        """ Return the state file's contents, {} if there is none yet, or None if it can't be read. """
+        try:
+            with open(self.state_path) as ifs:
+                state = json.load(ifs)
+        except (IOError, OSError) as exc:
+            if exc.errno == errno.ENOENT:
+                return {}
+            logger.warning(u'Failed to read state file', path=self.state_path, error=str(exc))
+            return None
+        except ValueError as exc:
+            logger.warning(u'Ignoring malformed state file', path=self.state_path, error=str(exc))
+            return None
+        if not isinstance(state, dict):
+            logger.warning(u'Ignoring malformed state file', path=self.state_path)
+            return None
+        return state
+
+    def _read(self):
+        if not self.state_path:
+            return {}
+        with self._lock:
+            return (self._load() or {}).get(self.RECORD_KEY, {})
+
+    def _write(self, update):
+        """
+        Call update with the record, and save the state file with whatever it changed. A state file
+        that can't be read is left as it is, rather than replaced by this record alone.
+        """
+        if not self.state_path:
+            return
+        with self._lock:
+            state = self._load()
+            if state is None:
+                return
+            update(state.setdefault(self.RECORD_KEY, {}))
+            state_dir = os.path.dirname(self.state_path)
+            temp_path = None
+            try:
+                if not os.path.isdir(state_dir):
+                    os.makedirs(state_dir, 0o750)
+                # Written aside and renamed over the state file, so a reader never sees half of it
+                fd, temp_path = tempfile.mkstemp(dir=state_dir, prefix='.state-')
+                with os.fdopen(fd, 'w') as ofs:
+                    json.dump(state, ofs, sort_keys=True)
+                os.rename(temp_path, self.state_path)
+            except (IOError, OSError) as exc:
+                logger.warning(u'Failed to update state file', path=self.state_path, error=str(exc))
+                if temp_path and os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+
+class PushRecord(StateRecord):
+    """
+    Manifest digests of previously pushed images, keyed by registry, repository and local image ID.
+    """
+
+    RECORD_KEY = 'ansibleContainerPushes'
+
+    def get(self, registry, repository, image_id):
+        return self._read().get(registry, {}).get(repository, {}).get(image_id)
+
+    def set(self, registry, repository, image_id, digest):
+        def update(record):
+            record.setdefault(registry, {}).setdefault(repository, {})[image_id] = digest
+        self._write(update)
+
+
+class LoginRecord(StateRecord):
+    """
+    When the auth entry each Docker config file holds for a registry was last verified with it,
+    keyed by config file and registry. Nothing derived from the credentials is kept: a verified
+    login is only trusted while the config file still holds the credentials being used.
+    """
+
+    RECORD_KEY = 'ansibleContainerLogins'
+
+    # How long, in seconds, a verified login is trusted without going back to the registry
+    DEFAULT_TTL = 3600
+
+    def __init__(self, state_path, ttl=DEFAULT_TTL, clock=time.time):
+        super(LoginRecord, self).__init__(state_path)
+        self.ttl = ttl
+        self._clock = clock
+
+    def is_verified(self, config_path, registry):
+        login = self._read().get(config_path, {}).get(registry)
+        if not login:
+            return False
+        return 0 <= self._clock() - login.get('verified_at', 0) < self.ttl
+
+    def verified(self, config_path, registry):
+        def update(record):
+            record.setdefault(config_path, {})[registry] = {'verified_at': int(self._clock())}
+        self._write(update)
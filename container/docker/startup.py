@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import re
+
+from six import iteritems, string_types
+
+from container import exceptions
+
+# Defaults for a readiness probe, in seconds
+DEFAULT_READINESS_TIMEOUT = 60
+DEFAULT_READINESS_INTERVAL = 1
+
+# Services starting concurrently, when parallel startup is used without a limit
+DEFAULT_STARTUP_WORKERS = 4
+
+# Labels Compose sets on the containers it creates
+COMPOSE_PROJECT_LABEL = 'com.docker.compose.project'
+COMPOSE_SERVICE_LABEL = 'com.docker.compose.service'
+
+
+def compose_project_name(project_name):
+    """ The project name as normalized by Compose when naming containers and networks """
+    return re.sub(r'[^-_a-z0-9]', '', project_name.lower())
+
+
+def service_dependencies(service):
+    """ Return the names of the services a service definition depends on or links to """
+    depends_on = service.get('depends_on') or []
+    dependencies = set(depends_on)
+    for link in service.get('links') or []:
+        dependencies.add(link.split(':', 1)[0])
+    return dependencies
+
+
+def startup_levels(services):
+    """
+    Group services into levels, each of which depends only on services in earlier levels, so the
+    services in a level can be started concurrently. Dependencies outside of services are ignored,
+    since they're either already running, or weren't requested.
+    """
+    pending = dict((name, service_dependencies(service) & set(services))
+                   for name, service in iteritems(services))
+    levels = []
+    while pending:
+        level = sorted(name for name, dependencies in iteritems(pending) if not dependencies)
+        if not level:
+            raise exceptions.AnsibleContainerConfigException(
+                u'Services have circular dependencies: {}'.format(u', '.join(sorted(pending))))
+        levels.append(level)
+        for name in level:
+            del pending[name]
+        for dependencies in pending.values():
+            dependencies.difference_update(level)
+    return levels
+
+
+def readiness_probe(service):
+    """
+    Return the readiness probe for a service, defined in its docker section as either a TCP port
+    or a command to exec in the container, or None.
+    """
+    probe = (service.get('docker') or {}).get('readiness')
+    if not probe:
+        return None
+    if not isinstance(probe, dict) or not (probe.get('port') or probe.get('command')):
+        raise exceptions.AnsibleContainerConfigException(
+            u"Expecting a readiness probe to define either 'port' or 'command', got {}".format(probe))
+    probe = dict(probe)
+    probe.setdefault('timeout', DEFAULT_READINESS_TIMEOUT)
+    probe.setdefault('interval', DEFAULT_READINESS_INTERVAL)
+    return probe
+
+
+def service_networks(project_name, service):
+    """ The names of the networks a service joins, as Compose names them """
+    networks = service.get('networks') or ['default']
+    if isinstance(networks, dict):
+        networks = sorted(networks)
+    return [u'%s_%s' % (compose_project_name(project_name), network) for network in networks]
+
+
+def service_network(project_name, service):
+    """ The name of the network a service can first be reached on by its name """
+    return service_networks(project_name, service)[0]
+
+
+class StartupTasks(object):
+    """
+    Builds the tasks that start services level by level, at most `workers` at a time, with each
+    service started by its own asynchronous docker_service task. The project's networks and volumes
+    are created first, so concurrent tasks don't race to create them. A service with a readiness
+    probe is only considered started once the probe passes. The time each service took to become
+    ready is reported at the end.
+    """
+
+    def __init__(self, project_name, conductor_name, task_params, services, workers=None, tags=None):
+        self.project_name = project_name
+        self.conductor_name = conductor_name
+        self.task_params = task_params
+        self.services = services
+        self.workers = max(workers or DEFAULT_STARTUP_WORKERS, 1)
+        self.tags = tags or ['start']
+        self._connected_networks = set()
+
+    def _task(self, task):
+        task[u'tags'] = self.tags
+        return task
+
+    @staticmethod
+    def _var(prefix, service_name):
+        return u'%s_%s' % (prefix, re.sub(r'\W', '_', service_name))
+
+    def _resource_tasks(self):
+        networks = set()
+        for service in self.services.values():
+            networks.update(service_networks(self.project_name, service))
+        for network in sorted(networks):
+            yield self._task({
+                u'name': u'Create network {}'.format(network),
+                u'docker_network': {u'name': network},
+            })
+        volumes = self.task_params.get(u'definition', {}).get(u'volumes') or {}
+        for volume_name in sorted(volumes):
+            volume = volumes[volume_name] or {}
+            if volume.get('external'):
+                continue
+            params = {
+                u'name': volume.get('name') or u'%s_%s' % (compose_project_name(self.project_name), volume_name),
+            }
+            if volume.get('driver'):
+                params[u'driver'] = volume['driver']
+            if volume.get('driver_opts'):
+                params[u'driver_options'] = volume['driver_opts']
+            yield self._task({
+                u'name': u'Create volume {}'.format(params[u'name']),
+                u'docker_volume': params,
+            })
+
+    def _start_tasks(self, service_name):
+        params = dict(self.task_params)
+        params[u'services'] = [service_name]
+        params[u'dependencies'] = False
+        yield self._task({
+            u'name': u'Start {}'.format(service_name),
+            u'docker_service': params,
+            u'async': 3600,
+            u'poll': 0,
+            u'register': self._var(u'startup_job', service_name),
+        })
+
+    def _await_tasks(self, service_name):
+        yield self._task({
+            u'name': u'Wait for {} to start'.format(service_name),
+            u'async_status': {
+                u'jid': u'{{ %s.ansible_job_id }}' % self._var(u'startup_job', service_name),
+            },
+            u'register': self._var(u'startup_result', service_name),
+            u'until': u'%s.finished' % self._var(u'startup_result', service_name),
+            u'retries': 3600,
+            u'delay': 1,
+        })
+
+    def _probe_tasks(self, service_name, probe):
+        retries = max(int(probe['timeout'] // probe['interval']), 1)
+        if probe.get('port'):
+            network = service_network(self.project_name, self.services[service_name])
+            if network not in self._connected_networks:
+                # The conductor has to join the service's network to reach it by name
+                self._connected_networks.add(network)
+                yield self._task({
+                    u'name': u'Connect the conductor to {}'.format(network),
+                    u'docker_network': {
+                        u'name': network,
+                        u'connected': [self.conductor_name],
+                        u'appends': True,
+                    },
+                })
+            yield self._task({
+                u'name': u'Wait for {} to accept connections on port {}'.format(service_name, probe['port']),
+                u'wait_for': {
+                    u'host': service_name,
+                    u'port': probe['port'],
+                    u'timeout': probe['timeout'],
+                },
+            })
+        else:
+            # Compose labels its containers, which finds them whatever they are named
+            container = self._var(u'container', service_name)
+            yield self._task({
+                u'name': u'Find the container of {}'.format(service_name),
+                u'command': u'docker ps --quiet --no-trunc --filter label=%s=%s --filter label=%s=%s' % (
+                    COMPOSE_PROJECT_LABEL, compose_project_name(self.project_name),
+                    COMPOSE_SERVICE_LABEL, service_name),
+                u'register': container,
+                u'failed_when': u'not %s.stdout' % container,
+                u'changed_when': False,
+            })
+            register = self._var(u'readiness', service_name)
+            yield self._task({
+                u'name': u'Wait for {} to be ready'.format(service_name),
+                u'raw': probe['command'],
+                u'delegate_to': u'{{ %s.stdout_lines[0] }}' % container,
+                u'vars': {u'ansible_connection': u'docker'},
+                u'register': register,
+                u'until': u'%s.rc == 0' % register,
+                u'retries': retries,
+                u'delay': probe['interval'],
+                u'changed_when': False,
+            })
+
+    def _ready_task(self, service_name):
+        return self._task({
+            u'name': u'Record when {} was ready'.format(service_name),
+            u'set_fact': {
+                self._var(u'ready_at', service_name): u"{{ lookup('pipe', 'date +%s') }}",
+            },
+        })
+
+    def __iter__(self):
+        yield self._task({
+            u'name': u'Record when startup began',
+            u'set_fact': {u'startup_began': u"{{ lookup('pipe', 'date +%s') }}"},
+        })
+        for task in self._resource_tasks():
+            yield task
+        started = []
+        for level in startup_levels(self.services):
+            for offset in range(0, len(level), self.workers):
+                batch = level[offset:offset + self.workers]
+                for service_name in batch:
+                    for task in self._start_tasks(service_name):
+                        yield task
+                for service_name in batch:
+                    for task in self._await_tasks(service_name):
+                        yield task
+                    probe = readiness_probe(self.services[service_name])
+                    if probe:
+                        for task in self._probe_tasks(service_name, probe):
+                            yield task
+                    yield self._ready_task(service_name)
+                started.extend(batch)
+        yield self._task({
+            u'name': u'Report service startup times',
+            u'debug': {
+                u'msg': [u'%s ready after {{ %s|int - startup_began|int }}s' %
+                         (service_name, self._var(u'ready_at', service_name)) for service_name in started],
+            },
+        })
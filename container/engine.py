@@ -6,14 +6,21 @@ logger = getLogger(__name__)
 
 from container import host_only, conductor_only
 
+# Seconds run waits for every rollout to complete, when --wait is given without a value
+DEFAULT_ROLLOUT_TIMEOUT = 300
+
 CAPABILITIES = dict(
     BUILD='building container images',
     BUILD_CONDUCTOR='building the Conductor image',
+    CACHE='reporting on the build cache',
     DEPLOY='pushing and orchestrating containers remotely',
+    GC='removing stale images and build containers',
     IMPORT='importing as Ansible Container project',
+    MANIFESTS='writing plain Kubernetes manifests',
     LOGIN='authenticate with registry',
     PUSH='push images to registry',
     RUN='orchestrating containers locally',
+    ROLLOUT='following rollouts until services are ready',
  )
 
 class BaseEngine(object):
@@ -25,15 +32,22 @@ class BaseEngine(object):
     # Capabilities of engine implementations
     CAP_BUILD_CONDUCTOR = False
     CAP_BUILD = False
+    CAP_CACHE = False
     CAP_DEPLOY = False
+    CAP_GC = False
     CAP_IMPORT = False
     CAP_INSTALL = False
     CAP_LOGIN = False
+    CAP_MANIFESTS = False
     CAP_PUSH = False
     CAP_RUN = False
+    CAP_ROLLOUT = False
     CAP_VERSION = False
     CAP_SIM_SECRETS = False
 
+    # Lifecycle states an orchestration playbook can manage, each selected by a tag of the same name
+    ORCHESTRATION_STATES = ('start', 'restart', 'stop', 'destroy')
+
     def __init__(self, project_name, services, debug=False, selinux=True, devel=False, **kwargs):
         self.project_name = project_name
         self.services = services
@@ -85,6 +99,11 @@ class BaseEngine(object):
         """Path to config file where the engine stores registry authentication"""
         raise NotImplementedError()
 
+    @property
+    def state_path(self):
+        """Path to the file where pushes, logins and builds are recorded between runs"""
+        raise NotImplementedError()
+
     @host_only
     def print_version_info(self):
         raise NotImplementedError()
@@ -172,19 +191,38 @@ class BaseEngine(object):
                              fingerprint,
                              role,
                              metadata,
-                             with_name=False):
+                             with_name=False,
+                             components=None):
+        raise NotImplementedError()
+
+    @conductor_only
+    def get_base_image_resolver(self, ttl=None, state_path=None):
+        """
+        Return an object whose start(tags) begins resolving base image tags, and whose get(tag)
+        returns the (image ID, manifest digest) a tag resolved to. Resolved tags are reused for
+        ttl seconds, recorded in the state file at state_path.
+        """
+        raise NotImplementedError()
+
+    @conductor_only
+    def get_fingerprint_components(self, service_name, role_name):
+        """
+        Return the fingerprint components recorded on the layer the role produced in the service's
+        latest build, or an empty dict.
+        """
         raise NotImplementedError()
 
     def tag_image_as_latest(self, service_name, image_id):
         raise NotImplementedError()
 
     @conductor_only
-    def generate_orchestration_playbook(self, url=None, namespace=None, local_images=True):
+    def generate_orchestration_playbook(self, url=None, namespace=None, local_images=True, states=None):
         """
         Generate an Ansible playbook to orchestrate services.
         :param url: registry URL where images will be pulled from
         :param namespace: registry namespace
         :param local_images: bypass pulling images, and use local copies
+        :param states: lifecycle states to generate tasks for, defaults to ORCHESTRATION_STATES
         :return: playbook dict
         """
         raise NotImplementedError()
@@ -208,8 +246,33 @@ class BaseEngine(object):
     def import_project(self, base_path, import_from, bundle_files=False, **kwargs):
         raise NotImplementedError()
 
+    @host_only
+    def collect_garbage(self, keep=3, max_disk=None, dry_run=False):
+        """
+        Remove the project's stale images and intermediate build containers, keeping the last `keep`
+        builds of each service and everything tagged latest, and staying within the `max_disk` budget.
+        With dry_run, only report what would be removed.
+        """
+        raise NotImplementedError()
+
+    @conductor_only
+    def record_build_cache(self, events, state_path=None):
+        """
+        Record the cache outcome of each role applied by a build, as a list of (service, role,
+        fingerprint, outcome) tuples. Engines without a build cache report ignore it.
+        """
+        pass
+
+    @host_only
+    def cache_stats(self):
+        """
+        Report each service's cached layers, their size and when they were last used, and how often
+        each role's layer was found in the cache over recent builds.
+        """
+        raise NotImplementedError()
+
     @conductor_only
-    def login(self, username, password, email, url, config_path):
+    def login(self, username, password, email, url, config_path, state_path=None):
         """
         Authenticate with a registry, and update the engine's config file. Otherwise,
         verify there is an existing authentication record within the config file for
@@ -226,6 +289,38 @@ class BaseEngine(object):
         """
         raise NotImplementedError()
 
+    @conductor_only
+    def post_destroy_cleanup(self, **kwargs):
+        """
+        Remove whatever the destroy playbook leaves to the engine, such as built images.
+        return None
+        """
+        pass
+
+    @conductor_only
+    def generate_manifests(self, deployment_output_path, manifest_format='yaml'):
+        """
+        Write the resources a deployment creates to deployment_output_path as plain manifests, in
+        manifest_format, and return the path written.
+        """
+        raise NotImplementedError()
+
+    @conductor_only
+    def await_rollouts(self, timeout):
+        """
+        Wait up to timeout seconds for the services started by run to be ready, reporting the
+        time each took. Raise an exception naming the services that weren't.
+        """
+        raise NotImplementedError()
+
+    @conductor_only
+    def prune_unchanged_resources(self, playbook, deployment_output_path):
+        """
+        Leave resources unchanged since the last deploy out of a deployment playbook. Engines that
+        don't submit resources return the playbook as is.
+        """
+        return playbook
+
     @conductor_only
     def pre_deployment_setup(self, **kwargs):
         """
@@ -2,17 +2,20 @@
 from __future__ import absolute_import
 
 import copy
+import hashlib
+import json
 import os
+import pickle
 import re
 import shlex
-import string_utils
 
 from abc import ABCMeta, abstractmethod
 
-from six import iteritems, string_types, add_metaclass
+from six import iteritems, string_types, text_type, add_metaclass
 from ruamel.yaml.comments import CommentedMap, CommentedSeq
 
 from container.utils.visibility import getLogger
+from .casing import snake_to_camel
 logger = getLogger(__name__)
 
 """
@@ -20,7 +23,6 @@ Translate the container.yml derived config into an Ansible playbook/role
 to deploy the services.
 """
 
-
 @add_metaclass(ABCMeta)
 class K8sBaseDeploy(object):
 
@@ -37,6 +39,7 @@ class K8sBaseDeploy(object):
         self._volumes = volumes
         self._secrets = secrets
         self._auth = auth
+        self._template_memo = {}
 
     @property
     def auth(self):
@@ -74,6 +77,50 @@ class K8sBaseDeploy(object):
     def get_namespace_task(self, state='present', tags=[]):
         pass
 
+    def get_namespace_template(self):
+        """ Generate the namespace, annotated with the display name and description if set """
+        template = CommentedMap()
+        template['apiVersion'] = self.DEFAULT_API_VERSION
+        template['kind'] = 'Namespace'
+        template['metadata'] = CommentedMap([('name', self._namespace_name)])
+        annotations = CommentedMap()
+        if self._namespace_display_name:
+            annotations['openshift.io/display-name'] = self._namespace_display_name
+        if self._namespace_description:
+            annotations['openshift.io/description'] = self._namespace_description
+        if annotations:
+            template['metadata']['annotations'] = annotations
+        return template
+
+    @staticmethod
+    def to_manifest(template):
+        """
+        Turn a template meant for a module's resource_definition into a plain API object: drop the
+        module's force option, spell the kind the way the API does, and drop the container state.
+        """
+        template.pop('force', None)
+        kind = template.get('kind')
+        if kind and kind[0].islower():
+            template['kind'] = ''.join(part.capitalize() for part in kind.split('_'))
+        pod_spec = template.get('spec', {}).get('template', {}).get('spec', {})
+        for container in pod_spec.get('containers', []):
+            container.pop('state', None)
+        return template
+
+    def get_manifest_templates(self):
+        """
+        Generate every resource the deployment creates as a plain API object, in the order they're
+        applied, one at a time. Secrets are left out, since their data comes from vault files when
+        the playbook runs.
+        """
+        yield self.get_namespace_template()
+        for template in self.get_services_templates():
+            yield self.to_manifest(template)
+        for template in self.get_deployment_templates():
+            yield self.to_manifest(template)
+        for template in self.get_pvc_templates():
+            yield self.to_manifest(template)
+
     def get_services_templates(self):
         """ Generate a service configuration """
         def _create_service(name, service):
@@ -149,12 +196,46 @@ class K8sBaseDeploy(object):
                                     templates.append(new_service)
         return templates
 
-    def get_service_tasks(self, tags=[]):
-        module_name='k8s_v1_service'
+    def get_auth_environment(self):
+        """ Return auth as the K8S_AUTH_* environment variables the modules fall back to """
+        environment = CommentedMap()
+        for key in sorted(self._auth or {}):
+            if key == 'config_file':
+                environment['K8S_AUTH_KUBECONFIG'] = self._auth[key]
+            else:
+                environment['K8S_AUTH_{}'.format(key.upper())] = self._auth[key]
+        return environment
+
+    def get_resource_tasks(self, task_name, module_name, templates, tags=[], batch=False):
+        """
+        Return tasks that submit each of the resource templates with module_name. By default that's a
+        task per resource. With batch, it's a single task looping over the resources, leaving auth to
+        be set once on the play through get_auth_environment().
+        """
         tasks = CommentedSeq()
-        for template in self.get_services_templates():
+        if batch:
+            items = CommentedSeq()
+            for template in templates:
+                items.append(CommentedMap([
+                    ('force', template.pop('force', False)),
+                    ('resource_definition', template)
+                ]))
+            if items:
+                task = CommentedMap()
+                task['name'] = task_name
+                task[module_name] = CommentedMap()
+                task[module_name]['state'] = 'present'
+                task[module_name]['force'] = '{{ item.force }}'
+                task[module_name]['resource_definition'] = '{{ item.resource_definition }}'
+                task['with_items'] = items
+                task['loop_control'] = CommentedMap([('label', '{{ item.resource_definition.metadata.name }}')])
+                if tags:
+                    task['tags'] = copy.copy(tags)
+                tasks.append(task)
+            return tasks
+        for template in templates:
             task = CommentedMap()
-            task['name'] = 'Create service'
+            task['name'] = task_name
             task[module_name] = CommentedMap()
             task[module_name]['state'] = 'present'
             if self._auth:
@@ -165,6 +246,12 @@ class K8sBaseDeploy(object):
             if tags:
                 task['tags'] = copy.copy(tags)
             tasks.append(task)
+        return tasks
+
+    def get_service_tasks(self, tags=[], batch=False):
+        module_name='k8s_v1_service'
+        tasks = self.get_resource_tasks('Create service', module_name, self.get_services_templates(),
+                                        tags=tags, batch=batch)
         if self._services:
             # Remove an services where state is 'absent'
             for name, service in iteritems(self._services):
@@ -277,192 +364,204 @@ class K8sBaseDeploy(object):
 
     @abstractmethod
     def get_deployment_templates(self, default_api=None, default_kind=None, default_strategy=None, engine_state=None):
-
-        def _service_to_k8s_container(name, config, container_name=None):
-            container = CommentedMap()
-
-            if container_name:
-                container['name'] = container_name
-            else:
-                container['name'] = container['name'] if config.get('container_name') else name
-
-            container['securityContext'] = CommentedMap()
-            container['state'] = 'present'
-            volumes = []
-
-            for key, value in iteritems(config):
-                if key in self.IGNORE_DIRECTIVES:
-                    pass
-                elif key == 'cap_add':
-                    if not container['securityContext'].get('Capabilities'):
-                        container['securityContext']['Capabilities'] = dict(add=[], drop=[])
-                    for cap in value:
-                        if self.DOCKER_TO_KUBE_CAPABILITY_MAPPING[cap]:
-                            container['securityContext']['Capabilities']['add'].append(
-                                self.DOCKER_TO_KUBE_CAPABILITY_MAPPING[cap])
-                elif key == 'cap_drop':
-                    if not container['securityContext'].get('Capabilities'):
-                        container['securityContext']['Capabilities'] = dict(add=[], drop=[])
-                    for cap in value:
-                        if self.DOCKER_TO_KUBE_CAPABILITY_MAPPING[cap]:
-                            container['securityContext']['Capabilities']['drop'].append(
-                                self.DOCKER_TO_KUBE_CAPABILITY_MAPPING[cap])
-                elif key == 'command':
-                    if isinstance(value, string_types):
-                        container['args'] = shlex.split(value)
-                    else:
-                        container['args'] = copy.copy(value)
-                elif key == 'container_name':
-                    pass
-                elif key == 'entrypoint':
-                    if isinstance(value, string_types):
-                        container['command'] = shlex.split(value)
-                    else:
-                        container['command'] = copy.copy(value)
-                elif key == 'environment':
-                    expanded_vars = self.expand_env_vars(value)
-                    if expanded_vars:
-                        if 'env' not in container:
-                            container['env'] = []
-
-                        container['env'].extend(expanded_vars)
-                elif key in ('ports', 'expose'):
-                    if not container.get('ports'):
-                        container['ports'] = []
-                    self.add_container_ports(value, container['ports'])
-                elif key == 'privileged':
-                    container['securityContext']['privileged'] = value
-                elif key == 'read_only':
-                    container['securityContext']['readOnlyRootFileSystem'] = value
-                elif key == 'stdin_open':
-                    container['stdin'] = value
-                elif key == 'volumes':
-                    vols, vol_mounts = self.get_k8s_volumes(value)
-                    if vol_mounts:
-                        if 'volumeMounts' not in container:
-                            container['volumeMounts'] = []
-
-                        container['volumeMounts'].extend(vol_mounts)
-                    if vols:
-                        volumes += vols
-                elif key == 'secrets':
-                    for secret, secret_config in iteritems(value):
-                        if self.CONFIG_KEY in secret_config:
-                            vols, vol_mounts, env_variables = self.get_k8s_secrets(secret, secret_config[self.CONFIG_KEY])
-
-                            if vol_mounts:
-                                if 'volumeMounts' not in container:
-                                    container['volumeMounts'] = []
-
-                                container['volumeMounts'].extend(vol_mounts)
-
-                            if vols:
-                                volumes += vols
-
-                            if env_variables:
-                                if 'env' not in container:
-                                    container['env'] = []
-
-                                container['env'].extend(env_variables)
-                elif key == 'working_dir':
-                    container['workingDir'] = value
-                else:
-                    container[key] = value
-            return container, volumes
-
-        def _update_volumes(existing_volumes, new_volumes):
-            existing_names = {}
-            for vol in existing_volumes:
-                existing_names[vol['name']] = 1
-            for vol in new_volumes:
-                if vol['name'] not in existing_names:
-                    existing_volumes.append(vol)
-
+        """
+        Return the deployment templates of the services, in the order they're defined. Each is
+        generated once per service config, and served from a memo afterwards.
+        """
+        options = (default_api, default_kind, default_strategy, engine_state)
         templates = CommentedSeq()
         for name, service_config in iteritems(self._services):
-            containers = []
-            volumes = []
-            pod = {}
-            if service_config.get('containers'):
-                for c in service_config['containers']:
-                    cname = "{}-{}".format(name, c['container_name'])
-                    k8s_container, k8s_volumes, = _service_to_k8s_container(name, c, container_name=cname)
-                    containers.append(k8s_container)
-                    _update_volumes(volumes, k8s_volumes)
+            key = self._template_key(name, service_config, options)
+            if key in self._template_memo:
+                template = pickle.loads(self._template_memo[key])
             else:
-                k8s_container, k8s_volumes = _service_to_k8s_container(name, service_config)
+                template = self.get_deployment_template(name, service_config, *options)
+                # Callers modify templates, so the memo keeps a pickled copy, which loads faster than a deepcopy
+                self._template_memo[key] = pickle.dumps(template, pickle.HIGHEST_PROTOCOL)
+            if template is not None:
+                templates.append(template)
+        return templates
+
+    def _template_key(self, name, service_config, options):
+        return hashlib.sha256(json.dumps([self.CONFIG_KEY, self._namespace_name, name, service_config, options],
+                                         sort_keys=True, default=text_type).encode('utf-8')).hexdigest()
+
+    def get_deployment_template(self, name, service_config, default_api=None, default_kind=None,
+                                default_strategy=None, engine_state=None):
+        """ Return the deployment template of a service, or None when its state is absent """
+        containers = []
+        volumes = []
+        pod = {}
+        if service_config.get('containers'):
+            for c in service_config['containers']:
+                cname = "{}-{}".format(name, c['container_name'])
+                k8s_container, k8s_volumes, = self._service_to_k8s_container(name, c, container_name=cname)
                 containers.append(k8s_container)
-                volumes += k8s_volumes
-
-            if service_config.get(self.CONFIG_KEY):
-                for key, value in iteritems(service_config[self.CONFIG_KEY]):
-                    if key == 'deployment':
-                        for deployment_key, deployment_value in iteritems(value):
-                            if deployment_key != 'force':
-                                self.copy_attribute(pod, deployment_key, deployment_value)
-
-            labels = CommentedMap([
-                ('app', self._namespace_name),
-                ('service', name)
+                self._update_volumes(volumes, k8s_volumes)
+        else:
+            k8s_container, k8s_volumes = self._service_to_k8s_container(name, service_config)
+            containers.append(k8s_container)
+            volumes += k8s_volumes
+
+        if service_config.get(self.CONFIG_KEY):
+            for key, value in iteritems(service_config[self.CONFIG_KEY]):
+                if key == 'deployment':
+                    for deployment_key, deployment_value in iteritems(value):
+                        if deployment_key != 'force':
+                            self.copy_attribute(pod, deployment_key, deployment_value)
+
+        labels = CommentedMap([
+            ('app', self._namespace_name),
+            ('service', name)
+        ])
+
+        state = service_config.get(self.CONFIG_KEY, {}).get('state', 'present')
+        if state == 'present':
+            template = CommentedMap()
+            template['apiVersion'] = default_api
+            template['kind'] = default_kind
+            template['force'] = service_config.get(self.CONFIG_KEY, {}).get('deployment', {}).get('force', False)
+            template['metadata'] = CommentedMap([
+                ('name', name),
+                ('labels', copy.deepcopy(labels)),
+                ('namespace', self._namespace_name)
+            ])
+            template['spec'] = CommentedMap()
+            template['spec']['template'] = CommentedMap()
+            template['spec']['template']['metadata'] = CommentedMap([('labels', copy.deepcopy(labels))])
+            template['spec']['template']['spec'] = CommentedMap([
+                ('containers', containers)
             ])
+            # When the engine requests a 'stop', set replicas to 0, stopping all containers
+            template['spec']['replicas'] = 1 if not engine_state == 'stop' else 0
+            if default_strategy:
+                template['spec']['strategy'] = {}
+                for service_key, service_value in iteritems(default_strategy):
+                    self.copy_attribute(template['spec']['strategy'], service_key, service_value)
+
+            if volumes:
+                template['spec']['template']['spec']['volumes'] = volumes
+
+            if pod:
+                for key, value in iteritems(pod):
+                    if key == 'securityContext':
+                        template['spec']['template']['spec'][key] = value
+                    elif key != 'replicas' or (key == 'replicas' and engine_state != 'stop'):
+                        # Leave replicas at 0 when engine_state is 'stop'
+                        template['spec'][key] = value
+            return template
+        return None
 
-            state = service_config.get(self.CONFIG_KEY, {}).get('state', 'present')
-            if state == 'present':
-                template = CommentedMap()
-                template['apiVersion'] = default_api
-                template['kind'] = default_kind
-                template['force'] = service_config.get(self.CONFIG_KEY, {}).get('deployment', {}).get('force', False)
-                template['metadata'] = CommentedMap([
-                    ('name', name),
-                    ('labels', copy.deepcopy(labels)),
-                    ('namespace', self._namespace_name)
-                ])
-                template['spec'] = CommentedMap()
-                template['spec']['template'] = CommentedMap()
-                template['spec']['template']['metadata'] = CommentedMap([('labels', copy.deepcopy(labels))])
-                template['spec']['template']['spec'] = CommentedMap([
-                    ('containers', containers)
-                ])
-                # When the engine requests a 'stop', set replicas to 0, stopping all containers
-                template['spec']['replicas'] = 1 if not engine_state == 'stop' else 0
-                if default_strategy:
-                    template['spec']['strategy'] = {}
-                    for service_key, service_value in iteritems(default_strategy):
-                        self.copy_attribute(template['spec']['strategy'], service_key, service_value)
-
-                if volumes:
-                    template['spec']['template']['spec']['volumes'] = volumes
-
-                if pod:
-                    for key, value in iteritems(pod):
-                        if key == 'securityContext':
-                            template['spec']['template']['spec'][key] = value
-                        elif key != 'replicas' or (key == 'replicas' and engine_state != 'stop'):
-                            # Leave replicas at 0 when engine_state is 'stop'
-                            template['spec'][key] = value
-                templates.append(template)
-        return templates
+    def _service_to_k8s_container(self, name, config, container_name=None):
+        container = CommentedMap()
 
-    @abstractmethod
-    def get_deployment_tasks(self, module_name=None, engine_state=None, tags=[]):
-        tasks = CommentedSeq()
-        for template in self.get_deployment_templates(engine_state=engine_state):
-            task = CommentedMap()
-            if engine_state is None:
-                task_name = 'Create deployment, and scale replicas up'
+        if container_name:
+            container['name'] = container_name
+        else:
+            container['name'] = container['name'] if config.get('container_name') else name
+
+        container['securityContext'] = CommentedMap()
+        container['state'] = 'present'
+        volumes = []
+
+        for key, value in iteritems(config):
+            if key in self.IGNORE_DIRECTIVES:
+                pass
+            elif key == 'cap_add':
+                if not container['securityContext'].get('Capabilities'):
+                    container['securityContext']['Capabilities'] = dict(add=[], drop=[])
+                for cap in value:
+                    if self.DOCKER_TO_KUBE_CAPABILITY_MAPPING[cap]:
+                        container['securityContext']['Capabilities']['add'].append(
+                            self.DOCKER_TO_KUBE_CAPABILITY_MAPPING[cap])
+            elif key == 'cap_drop':
+                if not container['securityContext'].get('Capabilities'):
+                    container['securityContext']['Capabilities'] = dict(add=[], drop=[])
+                for cap in value:
+                    if self.DOCKER_TO_KUBE_CAPABILITY_MAPPING[cap]:
+                        container['securityContext']['Capabilities']['drop'].append(
+                            self.DOCKER_TO_KUBE_CAPABILITY_MAPPING[cap])
+            elif key == 'command':
+                if isinstance(value, string_types):
+                    container['args'] = shlex.split(value)
+                else:
+                    container['args'] = copy.copy(value)
+            elif key == 'container_name':
+                pass
+            elif key == 'entrypoint':
+                if isinstance(value, string_types):
+                    container['command'] = shlex.split(value)
+                else:
+                    container['command'] = copy.copy(value)
+            elif key == 'environment':
+                expanded_vars = self.expand_env_vars(value)
+                if expanded_vars:
+                    if 'env' not in container:
+                        container['env'] = []
+
+                    container['env'].extend(expanded_vars)
+            elif key in ('ports', 'expose'):
+                if not container.get('ports'):
+                    container['ports'] = []
+                self.add_container_ports(value, container['ports'])
+            elif key == 'privileged':
+                container['securityContext']['privileged'] = value
+            elif key == 'read_only':
+                container['securityContext']['readOnlyRootFileSystem'] = value
+            elif key == 'stdin_open':
+                container['stdin'] = value
+            elif key == 'volumes':
+                vols, vol_mounts = self.get_k8s_volumes(value)
+                if vol_mounts:
+                    if 'volumeMounts' not in container:
+                        container['volumeMounts'] = []
+
+                    container['volumeMounts'].extend(vol_mounts)
+                if vols:
+                    volumes += vols
+            elif key == 'secrets':
+                for secret, secret_config in iteritems(value):
+                    if self.CONFIG_KEY in secret_config:
+                        vols, vol_mounts, env_variables = self.get_k8s_secrets(secret, secret_config[self.CONFIG_KEY])
+
+                        if vol_mounts:
+                            if 'volumeMounts' not in container:
+                                container['volumeMounts'] = []
+
+                            container['volumeMounts'].extend(vol_mounts)
+
+                        if vols:
+                            volumes += vols
+
+                        if env_variables:
+                            if 'env' not in container:
+                                container['env'] = []
+
+                            container['env'].extend(env_variables)
+            elif key == 'working_dir':
+                container['workingDir'] = value
             else:
-                task_name = 'Stop running containers by scaling replicas down to 0'
-            task['name'] = task_name
-            task[module_name] = CommentedMap()
-            task[module_name]['state'] = 'present'
-            if self._auth:
-                for key in self._auth:
-                    task[module_name][key] = self._auth[key]
-            task[module_name]['force'] = template.pop('force', False)
-            task[module_name]['resource_definition'] = template
-            if tags:
-                task['tags'] = copy.copy(tags)
-            tasks.append(task)
+                container[key] = value
+        return container, volumes
+
+    @staticmethod
+    def _update_volumes(existing_volumes, new_volumes):
+        existing_names = {}
+        for vol in existing_volumes:
+            existing_names[vol['name']] = 1
+        for vol in new_volumes:
+            if vol['name'] not in existing_names:
+                existing_volumes.append(vol)
+
+    @abstractmethod
+    def get_deployment_tasks(self, module_name=None, engine_state=None, tags=[], batch=False):
+        if engine_state is None:
+            task_name = 'Create deployment, and scale replicas up'
+        else:
+            task_name = 'Stop running containers by scaling replicas down to 0'
+        tasks = self.get_resource_tasks(task_name, module_name,
+                                        self.get_deployment_templates(engine_state=engine_state),
+                                        tags=tags, batch=batch)
         if engine_state != 'stop':
             for name, service_config in iteritems(self._services):
                 # Remove deployment for any services where state is 'absent'
@@ -525,22 +624,9 @@ class K8sBaseDeploy(object):
                         templates.append(volume)
         return templates
 
-    def get_pvc_tasks(self, tags=[]):
+    def get_pvc_tasks(self, tags=[], batch=False):
         module_name='k8s_v1_persistent_volume_claim'
-        tasks = CommentedSeq()
-        for template in self.get_pvc_templates():
-            task = CommentedMap()
-            task['name'] = 'Create PVC'
-            task[module_name] = CommentedMap()
-            task[module_name]['state'] = 'present'
-            if self._auth:
-                for key in self._auth:
-                    task[module_name][key] = self._auth[key]
-            task[module_name]['force'] = template.pop('force', False)
-            task[module_name]['resource_definition'] = template
-            if tags:
-                task['tags'] = copy.copy(tags)
-            tasks.append(task)
+        tasks = self.get_resource_tasks('Create PVC', module_name, self.get_pvc_templates(), tags=tags, batch=batch)
         if self._volumes:
             # Remove any volumes where state is 'absent'
             for volname, vol_config in iteritems(self._volumes):
@@ -588,25 +674,10 @@ class K8sBaseDeploy(object):
 
         return templates
 
-    def get_secret_tasks(self, tags=[]):
+    def get_secret_tasks(self, tags=[], batch=False):
         module_name='k8s_v1_secret'
-        tasks = CommentedSeq()
-
-        for template in self.get_secret_templates():
-            task = CommentedMap()
-            task['name'] = 'Create Secret'
-            task[module_name] = CommentedMap()
-            task[module_name]['state'] = 'present'
-            if self._auth:
-                for key in self._auth:
-                    task[module_name][key] = self._auth[key]
-            task[module_name]['force'] = template.pop('force', False)
-            task[module_name]['resource_definition'] = template
-            if tags:
-                task['tags'] = copy.copy(tags)
-            tasks.append(task)
-
-        return tasks
+        return self.get_resource_tasks('Create Secret', module_name, self.get_secret_templates(),
+                                       tags=tags, batch=batch)
 
     @staticmethod
     def get_service_ports(service):
@@ -794,12 +865,12 @@ class K8sBaseDeploy(object):
     @classmethod
     def copy_attribute(cls, target, src_key, src_value):
         """ copy values from src_value to target[src_key], converting src_key and sub keys to camel case """
-        src_key_camel = string_utils.snake_case_to_camel(src_key, upper_case_first=False)
+        src_key_camel = snake_to_camel(src_key)
         if isinstance(src_value, dict):
             if not target.get(src_key_camel):
                 target[src_key_camel] = {}
             for key, value in iteritems(src_value):
-                camel_key = string_utils.snake_case_to_camel(key, upper_case_first=False)
+                camel_key = snake_to_camel(key)
                 if isinstance(value, dict):
                     target[src_key_camel][camel_key] = {}
                     cls.copy_attribute(target[src_key_camel], key, value)
@@ -812,7 +883,7 @@ class K8sBaseDeploy(object):
                 if isinstance(element, dict):
                     new_item = {}
                     for key, value in iteritems(element):
-                        camel_key = string_utils.snake_case_to_camel(key, upper_case_first=False)
+                        camel_key = snake_to_camel(key)
                         cls.copy_attribute(new_item, camel_key, value)
                     target[src_key_camel].append(new_item)
                 else:
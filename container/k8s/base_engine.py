@@ -5,19 +5,28 @@ import logging
 plainLogger = logging.getLogger(__name__)
 
 import os
+import shutil
 import subprocess
 
 from abc import ABCMeta, abstractproperty, abstractmethod
+from ruamel import yaml
 from ruamel.yaml.comments import CommentedMap, CommentedSeq
 from six import add_metaclass, iteritems
 
 from container import conductor_only, host_only
 from container import exceptions
 from container.docker.engine import Engine as DockerEngine, log_runs
+from container.docker.images import ImageIndex
 from container.utils.visibility import getLogger
+from .incremental import ResourceHashes
+from .manifests import write_manifests, MANIFEST_EXTENSIONS
+from .rollout import ApiClient, RolloutWatcher
 
 logger = getLogger(__name__)
 
+# Where the conductor image installs the ansible.kubernetes-modules role, per conductor-requirements.yml
+VENDORED_K8S_MODULES_PATH = '/etc/ansible/roles/kubernetes-modules'
+
 
 @add_metaclass(ABCMeta)
 class K8sBaseEngine(DockerEngine):
@@ -29,12 +38,17 @@ class K8sBaseEngine(DockerEngine):
     CAP_IMPORT = False
     CAP_INSTALL = False
     CAP_LOGIN = True
+    CAP_MANIFESTS = True
     CAP_PUSH = True
     CAP_RUN = True
+    CAP_ROLLOUT = True
     CAP_VERSION = False
 
     display_name = u'K8s'
 
+    # The API collection holding the deployments generated for services
+    ROLLOUT_PATH = '/apis/apps/v1beta1/namespaces/{namespace}/deployments'
+
     _k8s_client = None
     _deploy = None
 
@@ -64,17 +78,84 @@ class K8sBaseEngine(DockerEngine):
     def k8s_config_path(self):
         return os.path.normpath(os.path.expanduser('~/.kube/config'))
 
+    @conductor_only
+    def post_destroy_cleanup(self, deployment_output_path=None, **kwargs):
+        # Images are left in place, as destroying only removes objects from the cluster. Every
+        # resource has to be submitted again on the next deploy, though.
+        if deployment_output_path:
+            ResourceHashes(deployment_output_path, self.project_name).clear()
+
+    @conductor_only
+    def generate_manifests(self, deployment_output_path, manifest_format='yaml'):
+        # Expects generate_orchestration_playbook to have set each service's image already
+        path = os.path.join(deployment_output_path, '%s-manifests.%s' % (
+            self.project_name, MANIFEST_EXTENSIONS[manifest_format]))
+        count = write_manifests(self.deploy.get_manifest_templates(), path, manifest_format=manifest_format)
+        if self.secrets:
+            logger.warning(u'Secrets are not included in the manifests, since their data comes from vault files '
+                           u'when the playbook runs')
+        logger.info(u'Wrote %d resources to %s', count, path)
+        return path
+
+    @conductor_only
+    def await_rollouts(self, timeout):
+        # Expects generate_orchestration_playbook to have run, so the templates come from the memo
+        names = [template['metadata']['name'] for template in self.deploy.get_deployment_templates()]
+        client = ApiClient.from_environment()
+        try:
+            watcher = RolloutWatcher(client, self.ROLLOUT_PATH.format(namespace=self.namespace_name), timeout=timeout)
+            ready, failed = watcher.wait(names)
+        finally:
+            client.close()
+        for name in names:
+            if name in ready:
+                logger.info(u'Service %s ready in %.1fs', name, ready[name])
+            else:
+                logger.error(u'Service %s not ready: %s', name, failed[name])
+        if failed:
+            raise exceptions.AnsibleContainerException(
+                u'Rollout of {} did not complete within {}s'.format(u', '.join(sorted(failed)), timeout))
+
+    @conductor_only
+    def prune_unchanged_resources(self, playbook, deployment_output_path):
+        hashes = ResourceHashes(deployment_output_path, self.project_name)
+        for play in playbook:
+            play['tasks'], _ = hashes.prune(play['tasks'])
+        return playbook
+
+    @staticmethod
+    def _get_role_version(role_path):
+        """ Return the version ansible-galaxy recorded when it installed the role at role_path, or None """
+        try:
+            with open(os.path.join(role_path, 'meta', '.galaxy_install_info')) as ifs:
+                return (yaml.safe_load(ifs) or {}).get('version')
+        except (IOError, OSError, yaml.YAMLError):
+            return None
+
     @conductor_only
     def pre_deployment_setup(self, project_name, services, deployment_output_path=None, **kwargs):
-        # Prior to running the playbook, install the ansible.kubernetes-modules role
+        # Prior to running the playbook, put the ansible.kubernetes-modules role in place
 
         if not os.path.isdir(os.path.join(deployment_output_path, 'roles')):
             # Create roles subdirectory
             os.mkdir(os.path.join(deployment_output_path, 'roles'), 0o777)
 
         role_path = os.path.join(deployment_output_path, 'roles', 'ansible.kubernetes-modules')
-        if deployment_output_path and not os.path.exists(role_path):
-            # Install the role, if not already installed
+        if os.path.isdir(VENDORED_K8S_MODULES_PATH):
+            # The conductor image comes with a copy of the role, so no network access is needed. The
+            # playbook may be run from the host, so the role is copied rather than linked.
+            vendored_version = self._get_role_version(VENDORED_K8S_MODULES_PATH)
+            if os.path.exists(role_path):
+                installed_version = self._get_role_version(role_path)
+                if installed_version is None or installed_version == vendored_version:
+                    logger.debug('Role ansible.kubernetes-modules is up to date', version=installed_version)
+                    return
+                logger.info(u'Replacing ansible.kubernetes-modules %s with %s', installed_version, vendored_version)
+                shutil.rmtree(role_path)
+            logger.debug('Copying ansible.kubernetes-modules from the conductor', version=vendored_version)
+            shutil.copytree(VENDORED_K8S_MODULES_PATH, role_path, symlinks=True)
+        elif deployment_output_path and not os.path.exists(role_path):
+            # A conductor image built without the role has to install it
             ansible_cmd = "ansible-galaxy -vvv install -p ./roles ansible.kubernetes-modules"
             logger.debug('Running ansible-galaxy', command=ansible_cmd, cwd=deployment_output_path)
             process = subprocess.Popen(ansible_cmd,
@@ -133,7 +214,7 @@ class K8sBaseEngine(DockerEngine):
 
     @conductor_only
     def generate_orchestration_playbook(self, url=None, namespace=None, settings=None, repository_prefix=None,
-                                        pull_from_url=None, tag=None, vault_files=None, **kwargs):
+                                        pull_from_url=None, tag=None, vault_files=None, states=None, **kwargs):
         """
         Generate an Ansible playbook to orchestrate services.
         :param url: registry URL where images were pushed.
@@ -141,19 +222,26 @@ class K8sBaseEngine(DockerEngine):
         :param repository_prefix: prefix to use for the image name
         :param settings: settings dict from container.yml
         :param pull_from_url: if url to pull from is different than url
+        :param states: lifecycle states to generate tasks for, defaults to ORCHESTRATION_STATES
+        :param batch_tasks: submit each kind of resource with one looping task, rather than a task per resource
         :return: playbook dict
         """
+        states = set(states or self.ORCHESTRATION_STATES)
+        batch = kwargs.get('batch_tasks', False)
+
+        # One listing of local images serves every service's lookup
+        image_index = ImageIndex.from_client(self.client)
 
         def _update_service(service_name, service_config):
+            image = image_index.latest(self.image_name_for_service(service_name))
             if url and namespace:
                 # Reference previously pushed image
-                image_id = self.get_latest_image_id_for_service(service_name)
-                if not image_id:
+                if image is None:
                     raise exceptions.AnsibleContainerConductorException(
                         u"Unable to get image ID for service {}. Did you forget to run "
                         u"`ansible-container build`?".format(service_name)
                     )
-                image_tag = tag or self.get_build_stamp_for_image(image_id)
+                image_tag = tag or self.get_build_stamp_for_tags(image.tags)
                 if repository_prefix:
                     image_name = "{}-{}".format(repository_prefix, service_name)
                 elif repository_prefix is None:
@@ -166,7 +254,6 @@ class K8sBaseEngine(DockerEngine):
                 service_config['image'] = "{}/{}".format(pull_url.rstrip('/'), image_name)
             else:
                 # We're using a local image, so check that the image was built
-                image = self.get_latest_image_for_service(service_name)
                 if image is None:
                     raise exceptions.AnsibleContainerConductorException(
                         u"No image found for service {}, make sure you've run `ansible-container "
@@ -196,6 +283,8 @@ class K8sBaseEngine(DockerEngine):
         play['roles'] = CommentedSeq()
         play['vars_files'] = CommentedSeq()
         play['tasks'] = CommentedSeq()
+        if batch and self.deploy.auth:
+            play['environment'] = self.deploy.get_auth_environment()
         role = CommentedMap([
             ('role', 'ansible.kubernetes-modules')
         ])
@@ -206,13 +295,20 @@ class K8sBaseEngine(DockerEngine):
             'roles', before='Include Ansible Kubernetes and OpenShift modules', indent=4)
         play.yaml_set_comment_before_after_key('tasks', before='Tasks for setting the application state. '
                                                'Valid tags include: start, stop, restart, destroy', indent=4)
-        play['tasks'].append(self.deploy.get_namespace_task(state='present', tags=['start']))
-        play['tasks'].append(self.deploy.get_namespace_task(state='absent', tags=['destroy']))
-        play['tasks'].extend(self.deploy.get_secret_tasks(tags=['start']))
-        play['tasks'].extend(self.deploy.get_service_tasks(tags=['start']))
-        play['tasks'].extend(self.deploy.get_deployment_tasks(engine_state='stop', tags=['stop', 'restart']))
-        play['tasks'].extend(self.deploy.get_deployment_tasks(tags=['start', 'restart']))
-        play['tasks'].extend(self.deploy.get_pvc_tasks(tags=['start']))
+        if 'start' in states:
+            play['tasks'].append(self.deploy.get_namespace_task(state='present', tags=['start']))
+        if 'destroy' in states:
+            play['tasks'].append(self.deploy.get_namespace_task(state='absent', tags=['destroy']))
+        if 'start' in states:
+            play['tasks'].extend(self.deploy.get_secret_tasks(tags=['start'], batch=batch))
+            play['tasks'].extend(self.deploy.get_service_tasks(tags=['start'], batch=batch))
+        if states & {'stop', 'restart'}:
+            play['tasks'].extend(self.deploy.get_deployment_tasks(engine_state='stop', tags=['stop', 'restart'],
+                                                                  batch=batch))
+        if states & {'start', 'restart'}:
+            play['tasks'].extend(self.deploy.get_deployment_tasks(tags=['start', 'restart'], batch=batch))
+        if 'start' in states:
+            play['tasks'].extend(self.deploy.get_pvc_tasks(tags=['start'], batch=batch))
 
         playbook = CommentedSeq()
         playbook.append(play)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import string_utils
+
+# Options container.yml passes through to Deployments, DeploymentConfigs, pods, services and routes,
+# spelled the way string_utils.snake_case_to_camel converts them
+KNOWN_FIELDS = {
+    'active_deadline_seconds': 'activeDeadlineSeconds',
+    'alternate_backends': 'alternateBackends',
+    'automount_service_account_token': 'automountServiceAccountToken',
+    'ca_certificate': 'caCertificate',
+    'cluster_ip': 'clusterIp',
+    'custom_params': 'customParams',
+    'destination_ca_certificate': 'destinationCaCertificate',
+    'dns_policy': 'dnsPolicy',
+    'external_ips': 'externalIps',
+    'external_name': 'externalName',
+    'external_traffic_policy': 'externalTrafficPolicy',
+    'fs_group': 'fsGroup',
+    'generate_name': 'generateName',
+    'health_check_node_port': 'healthCheckNodePort',
+    'host_ipc': 'hostIpc',
+    'host_network': 'hostNetwork',
+    'host_pid': 'hostPid',
+    'image_pull_secrets': 'imagePullSecrets',
+    'insecure_edge_termination_policy': 'insecureEdgeTerminationPolicy',
+    'interval_seconds': 'intervalSeconds',
+    'load_balancer_ip': 'loadBalancerIp',
+    'load_balancer_source_ranges': 'loadBalancerSourceRanges',
+    'match_expressions': 'matchExpressions',
+    'match_labels': 'matchLabels',
+    'max_surge': 'maxSurge',
+    'max_unavailable': 'maxUnavailable',
+    'min_ready_seconds': 'minReadySeconds',
+    'node_name': 'nodeName',
+    'node_selector': 'nodeSelector',
+    'priority_class_name': 'priorityClassName',
+    'progress_deadline_seconds': 'progressDeadlineSeconds',
+    'publish_not_ready_addresses': 'publishNotReadyAddresses',
+    'recreate_params': 'recreateParams',
+    'restart_policy': 'restartPolicy',
+    'revision_history_limit': 'revisionHistoryLimit',
+    'rolling_params': 'rollingParams',
+    'rolling_update': 'rollingUpdate',
+    'run_as_group': 'runAsGroup',
+    'run_as_non_root': 'runAsNonRoot',
+    'run_as_user': 'runAsUser',
+    'scheduler_name': 'schedulerName',
+    'se_linux_options': 'seLinuxOptions',
+    'security_context': 'securityContext',
+    'service_account': 'serviceAccount',
+    'service_account_name': 'serviceAccountName',
+    'session_affinity': 'sessionAffinity',
+    'supplemental_groups': 'supplementalGroups',
+    'termination_grace_period_seconds': 'terminationGracePeriodSeconds',
+    'timeout_seconds': 'timeoutSeconds',
+    'update_period_seconds': 'updatePeriodSeconds',
+    'wildcard_policy': 'wildcardPolicy',
+}
+
+# Other keys converted, kept until there are this many, then forgotten all at once
+MEMO_SIZE = 4096
+
+_memo = {}
+
+
+def snake_to_camel(key):
+    """
+    Convert a snake_case key to lowerCamelCase, as string_utils.snake_case_to_camel does with
+    upper_case_first=False, returning keys that aren't snake case as they are. Known fields are
+    looked up, and other keys are converted once and memoized.
+    """
+    try:
+        return KNOWN_FIELDS[key]
+    except KeyError:
+        pass
+    try:
+        return _memo[key]
+    except KeyError:
+        pass
+    camel = string_utils.snake_case_to_camel(key, upper_case_first=False)
+    if len(_memo) >= MEMO_SIZE:
+        _memo.clear()
+    _memo[key] = camel
+    return camel
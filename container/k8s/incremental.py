@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from container.utils.visibility import getLogger
+logger = getLogger(__name__)
+
+import copy
+import hashlib
+import json
+import os
+
+from ruamel import yaml
+from ruamel.yaml.comments import CommentedMap, CommentedSeq
+from six import iteritems, text_type
+
+# The tag whose tasks submit resources that are skipped when unchanged
+START_TAG = 'start'
+
+
+def resource_params(task):
+    """
+    Return the module name and parameters of a task that submits a resource definition, or None.
+    Only tasks that start the application are considered, since stop, restart and destroy have to
+    act whether or not a definition changed.
+    """
+    if START_TAG not in (task.get('tags') or []):
+        return None
+    for key, value in iteritems(task):
+        if isinstance(value, dict) and value.get('resource_definition') and value.get('state') == 'present':
+            return key, value
+    return None
+
+
+def batched_params(task):
+    """
+    Return the module name, parameters and loop items of a start task that submits a batch of
+    resource definitions, or None.
+    """
+    found = resource_params(task)
+    if found is None or not isinstance(task.get('with_items'), list):
+        return None
+    return found + (task['with_items'],)
+
+
+def item_params(params, item):
+    """ The parameters a batched task submits one of its items with """
+    result = dict((key, value) for key, value in iteritems(params) if key not in item)
+    result.update(item)
+    return result
+
+
+def resource_key(module_name, params):
+    metadata = params['resource_definition'].get('metadata') or {}
+    return u'%s/%s/%s' % (module_name, metadata.get('namespace') or u'', metadata.get('name') or u'')
+
+
+def resource_digest(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=text_type).encode('utf-8')).hexdigest()
+
+
+class ResourceHashes(object):
+    """
+    The content hash of each resource submitted by the last generated deployment playbook, kept under
+    deployment_output_path, so that a deploy can leave out the resources whose definitions haven't
+    changed since.
+
+    Unchanged resources lose their start tag. A task that's also tagged restart keeps that tag, so
+    restarting still scales deployments back up. The resources left out are listed in a manifest next
+    to the playbook.
+    """
+
+    def __init__(self, deployment_output_path, project_name):
+        self.path = os.path.join(deployment_output_path, '.%s-resources.json' % project_name)
+        self.manifest_path = os.path.join(deployment_output_path, '%s-skipped.yml' % project_name)
+
+    def load(self):
+        try:
+            with open(self.path) as ifs:
+                return json.load(ifs)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def clear(self):
+        for path in (self.path, self.manifest_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def prune(self, tasks):
+        """ Return tasks without the start tag on unchanged resources, and the skipped resource definitions """
+        previous = self.load()
+        current = {}
+        pruned = CommentedSeq()
+        skipped = []
+        for task in tasks:
+            batched = batched_params(task)
+            if batched is not None:
+                pruned.extend(self._prune_batch(task, previous, current, skipped, *batched))
+                continue
+            found = resource_params(task)
+            if found is None:
+                pruned.append(task)
+                continue
+            key = resource_key(*found)
+            current[key] = resource_digest(found[1])
+            if previous.get(key) != current[key]:
+                pruned.append(task)
+                continue
+            skipped.append(found[1]['resource_definition'])
+            tags = [tag for tag in task['tags'] if tag != START_TAG]
+            if tags:
+                task['tags'] = tags
+                pruned.append(task)
+        self._save(current, skipped)
+        logger.info(u'Skipping %d unchanged resources', len(skipped), changed=len(current) - len(skipped))
+        return pruned, skipped
+
+    def _prune_batch(self, task, previous, current, skipped, module_name, params, items):
+        """ Split a batched task into one looping over changed items, and one without the start tag """
+        changed, unchanged = CommentedSeq(), CommentedSeq()
+        for item in items:
+            resolved = item_params(params, item)
+            key = resource_key(module_name, resolved)
+            current[key] = resource_digest(resolved)
+            if previous.get(key) != current[key]:
+                changed.append(item)
+            else:
+                unchanged.append(item)
+                skipped.append(item['resource_definition'])
+        tasks = []
+        if changed:
+            task_changed = copy.copy(task)
+            task_changed['with_items'] = changed
+            tasks.append(task_changed)
+        tags = [tag for tag in task['tags'] if tag != START_TAG]
+        if unchanged and tags:
+            task_unchanged = copy.copy(task)
+            task_unchanged['with_items'] = unchanged
+            task_unchanged['tags'] = tags
+            tasks.append(task_unchanged)
+        return tasks
+
+    def _save(self, current, skipped):
+        with open(self.path, 'w') as ofs:
+            json.dump(current, ofs, indent=2, sort_keys=True)
+        manifest = CommentedSeq()
+        for definition in skipped:
+            metadata = definition.get('metadata') or {}
+            manifest.append(CommentedMap([
+                ('kind', definition.get('kind')),
+                ('name', metadata.get('name')),
+                ('namespace', metadata.get('namespace')),
+            ]))
+        with open(self.manifest_path, 'w') as ofs:
+            ofs.write(u'# Resources unchanged since the last deploy, left out of the start tasks\n')
+            ofs.write(yaml.round_trip_dump(manifest, default_flow_style=False) if manifest else u'[]\n')
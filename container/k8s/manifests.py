@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from container.utils.visibility import getLogger
+logger = getLogger(__name__)
+
+import json
+
+from ruamel import yaml
+from six import text_type
+
+MANIFEST_FORMATS = ('yaml', 'json')
+
+MANIFEST_EXTENSIONS = dict(yaml='yml', json='json')
+
+
+def write_manifests(templates, path, manifest_format='yaml'):
+    """
+    Write resource definitions to path as they're generated, either as a multi-document YAML file,
+    or as a JSON List object, either of which can be applied in one operation with `kubectl apply -f`.
+    Returns the number of resources written.
+    """
+    count = 0
+    with open(path, 'w') as ofs:
+        if manifest_format == 'json':
+            ofs.write(u'{"apiVersion": "v1", "kind": "List", "items": [\n')
+        for template in templates:
+            if manifest_format == 'json':
+                if count:
+                    ofs.write(u',\n')
+                ofs.write(json.dumps(template, indent=2, default=text_type))
+            else:
+                ofs.write(u'---\n')
+                ofs.write(yaml.round_trip_dump(template, indent=2, default_flow_style=False))
+            count += 1
+        if manifest_format == 'json':
+            ofs.write(u'\n]}\n')
+    logger.debug(u'Wrote manifests', path=path, resources=count)
+    return count
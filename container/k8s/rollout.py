@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from container.utils.visibility import getLogger
+logger = getLogger(__name__)
+
+import base64
+import json
+import math
+import os
+import tempfile
+import time
+
+import requests
+from ruamel import yaml
+
+from container import exceptions
+from container.engine import DEFAULT_ROLLOUT_TIMEOUT
+
+DEFAULT_KUBECONFIG = '~/.kube/config'
+
+READY = 'ready'
+PROGRESSING = 'progressing'
+STALLED = 'stalled'
+
+
+def rollout_status(resource):
+    """
+    Return the rollout status of a Deployment or DeploymentConfig, READY, PROGRESSING or STALLED,
+    and what it's waiting on. The checks follow `kubectl rollout status`.
+    """
+    metadata = resource.get('metadata') or {}
+    spec = resource.get('spec') or {}
+    status = resource.get('status') or {}
+    for condition in status.get('conditions') or []:
+        if condition.get('type') == 'Progressing' and condition.get('status') == 'False':
+            return STALLED, condition.get('message') or condition.get('reason') or u'rollout stalled'
+    if status.get('observedGeneration', 0) < metadata.get('generation', 0):
+        return PROGRESSING, u'waiting for the rollout to start'
+    wanted = spec.get('replicas', 1)
+    updated = status.get('updatedReplicas', 0)
+    if updated < wanted:
+        return PROGRESSING, u'{} of {} replicas updated'.format(updated, wanted)
+    if status.get('replicas', 0) > updated:
+        return PROGRESSING, u'{} old replicas pending termination'.format(status['replicas'] - updated)
+    if status.get('availableReplicas', 0) < updated:
+        return PROGRESSING, u'{} of {} updated replicas available'.format(status.get('availableReplicas', 0), updated)
+    return READY, None
+
+
+class ApiClient(object):
+    """
+    A minimal client for listing and watching resources on the cluster's API server, authenticated
+    the way the K8s and OpenShift modules are: with the K8S_AUTH_* environment variables the
+    Conductor gets from the k8s_auth setting, on top of the current context of a kubeconfig.
+    """
+
+    def __init__(self, host, api_key=None, username=None, password=None, ssl_ca_cert=None, cert_file=None,
+                 key_file=None, verify_ssl=True, temp_files=None):
+        self.host = host.rstrip('/')
+        self.session = requests.Session()
+        self._temp_files = temp_files or []
+        if api_key:
+            self.session.headers['Authorization'] = api_key if api_key.startswith('Bearer ') else 'Bearer ' + api_key
+        elif username:
+            self.session.auth = (username, password or '')
+        self.session.verify = (ssl_ca_cert or True) if verify_ssl else False
+        if cert_file:
+            self.session.cert = (cert_file, key_file) if key_file else cert_file
+
+    @classmethod
+    def from_environment(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        config_file = os.path.expanduser(environ.get('K8S_AUTH_KUBECONFIG') or DEFAULT_KUBECONFIG)
+        params = {}
+        if os.path.isfile(config_file):
+            params = load_kubeconfig(config_file, context=environ.get('K8S_AUTH_CONTEXT'))
+        for key in ('host', 'api_key', 'username', 'password', 'ssl_ca_cert', 'cert_file', 'key_file'):
+            if environ.get('K8S_AUTH_' + key.upper()):
+                params[key] = environ['K8S_AUTH_' + key.upper()]
+        if environ.get('K8S_AUTH_VERIFY_SSL'):
+            params['verify_ssl'] = environ['K8S_AUTH_VERIFY_SSL'].lower() not in ('false', 'no', '0')
+        if not params.get('host'):
+            raise exceptions.AnsibleContainerException(
+                u'Unable to find the API server. Set k8s_auth in the settings of container.yml.')
+        return cls(**params)
+
+    def close(self):
+        self.session.close()
+        for path in self._temp_files:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def get(self, path, **params):
+        response = self.session.get(self.host + path, params=params)
+        if response.status_code != 200:
+            raise exceptions.AnsibleContainerException(
+                u'Failed to get {}: {} {}'.format(path, response.status_code, response.text))
+        return response.json()
+
+    def watch(self, path, timeout, **params):
+        """ Yield the events of a watch on path, until the server ends it, at most timeout seconds later """
+        params.update(watch='true', timeoutSeconds=int(math.ceil(timeout)))
+        try:
+            response = self.session.get(self.host + path, params=params, stream=True, timeout=(10, timeout + 10))
+            if response.status_code != 200:
+                raise exceptions.AnsibleContainerException(
+                    u'Failed to watch {}: {} {}'.format(path, response.status_code, response.text))
+            try:
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line.decode('utf-8'))
+            finally:
+                response.close()
+        except requests.exceptions.RequestException as exc:
+            # A dropped or timed out watch is listed and watched again while time remains
+            logger.debug(u'Watch ended', path=path, error=str(exc))
+
+
+def load_kubeconfig(config_file, context=None):
+    """ Return the ApiClient parameters of a context in a kubeconfig, by default its current one """
+    with open(config_file) as ifs:
+        config = yaml.safe_load(ifs) or {}
+
+    def named(section, name):
+        for entry in config.get(section) or []:
+            if entry.get('name') == name:
+                return entry.get(section[:-1]) or {}
+        return {}
+
+    context = named('contexts', context or config.get('current-context'))
+    cluster = named('clusters', context.get('cluster'))
+    user = named('users', context.get('user'))
+    temp_files = []
+
+    def file_for(section, key):
+        # Credentials embedded in the kubeconfig are written out for requests, and removed on close
+        if section.get(key + '-data'):
+            fd, path = tempfile.mkstemp(prefix='kubeconfig-')
+            with os.fdopen(fd, 'wb') as ofs:
+                ofs.write(base64.b64decode(section[key + '-data']))
+            temp_files.append(path)
+            return path
+        if section.get(key):
+            return os.path.join(os.path.dirname(config_file), os.path.expanduser(section[key]))
+        return None
+
+    return dict(
+        host=cluster.get('server'),
+        api_key=user.get('token'),
+        username=user.get('username'),
+        password=user.get('password'),
+        ssl_ca_cert=file_for(cluster, 'certificate-authority'),
+        cert_file=file_for(user, 'client-certificate'),
+        key_file=file_for(user, 'client-key'),
+        verify_ssl=not cluster.get('insecure-skip-tls-verify', False),
+        temp_files=temp_files,
+    )
+
+
+class RolloutWatcher(object):
+    """
+    Follows the rollouts of named resources in a collection, listing it once and then watching it,
+    rather than polling each resource. Gives up on all of them once timeout seconds have passed.
+    """
+
+    def __init__(self, client, path, timeout=DEFAULT_ROLLOUT_TIMEOUT, clock=time.time, sleep=time.sleep):
+        self.client = client
+        self.path = path
+        self.timeout = timeout
+        self._clock = clock
+        self._sleep = sleep
+
+    def wait(self, names):
+        """
+        Return the seconds each named resource took to be ready, and the reason each of the rest
+        didn't: a stalled rollout, or what it was still waiting on when time ran out.
+        """
+        started = self._clock()
+        deadline = started + self.timeout
+        pending = set(names)
+        ready, failed, waiting = {}, {}, {}
+
+        def observe(resource):
+            name = (resource.get('metadata') or {}).get('name')
+            if name not in pending:
+                return
+            status, reason = rollout_status(resource)
+            if status == READY:
+                pending.discard(name)
+                ready[name] = self._clock() - started
+                logger.debug(u'Rollout ready', name=name, seconds=ready[name])
+            elif status == STALLED:
+                pending.discard(name)
+                failed[name] = reason
+                logger.debug(u'Rollout stalled', name=name, reason=reason)
+            else:
+                waiting[name] = reason
+
+        while pending and self._clock() < deadline:
+            listing = self.client.get(self.path)
+            for resource in listing.get('items') or []:
+                observe(resource)
+            if not pending:
+                break
+            resource_version = (listing.get('metadata') or {}).get('resourceVersion')
+            events = 0
+            for event in self.client.watch(self.path, deadline - self._clock(), resourceVersion=resource_version):
+                events += 1
+                if event.get('type') == 'ERROR':
+                    # Most likely the resource version expired, so list again
+                    break
+                if event.get('type') in ('ADDED', 'MODIFIED'):
+                    observe(event.get('object') or {})
+                if not pending or self._clock() >= deadline:
+                    break
+            if pending and not events:
+                self._sleep(max(min(1, deadline - self._clock()), 0))
+
+        for name in pending:
+            failed[name] = u'timed out, {}'.format(waiting.get(name, u'not found'))
+        return ready, failed
@@ -48,10 +48,11 @@ class Deploy(K8sBaseDeploy):
                                                             default_strategy=strategy,
                                                             engine_state=engine_state)
 
-    def get_deployment_tasks(self, module_name=None, engine_state=None, tags=[]):
+    def get_deployment_tasks(self, module_name=None, engine_state=None, tags=[], batch=False):
         return super(Deploy, self).get_deployment_tasks(module_name='openshift_v1_deployment_config',
                                                         engine_state=engine_state,
-                                                        tags=tags)
+                                                        tags=tags,
+                                                        batch=batch)
 
     def get_route_templates(self):
         """
@@ -116,22 +117,16 @@ class Deploy(K8sBaseDeploy):
 
         return templates
 
-    def get_route_tasks(self, tags=[]):
-        module_name = 'openshift_v1_route'
-        tasks = []
+    def get_manifest_templates(self):
+        for template in super(Deploy, self).get_manifest_templates():
+            yield template
         for template in self.get_route_templates():
-            task = CommentedMap()
-            task['name'] = 'Create route'
-            task[module_name] = CommentedMap()
-            task[module_name]['state'] = 'present'
-            if self._auth:
-                for key in self._auth:
-                    task[module_name][key] = self._auth[key]
-            task[module_name]['force'] = template.pop('force', False)
-            task[module_name]['resource_definition'] = template
-            if tags:
-                task['tags'] = copy.copy(tags)
-            tasks.append(task)
+            yield self.to_manifest(template)
+
+    def get_route_tasks(self, tags=[], batch=False):
+        module_name = 'openshift_v1_route'
+        tasks = self.get_resource_tasks('Create route', module_name, self.get_route_templates(),
+                                        tags=tags, batch=batch)
         for name, service_config in self._services.items():
             # Remove routes where state is 'absent'
             if service_config.get(self.CONFIG_KEY, {}).get('state', 'present') == 'absent':
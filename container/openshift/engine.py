@@ -23,6 +23,8 @@ class Engine(K8sBaseEngine):
 
     display_name = u'OpenShift\u2122'
 
+    ROLLOUT_PATH = '/oapi/v1/namespaces/{namespace}/deploymentconfigs'
+
     @property
     def deploy(self):
         if not self._deploy:
@@ -45,12 +47,15 @@ class Engine(K8sBaseEngine):
         return super(Engine, self).run_conductor(command, config, base_path, params, engine_name=engine_name)
 
     @conductor_only
-    def generate_orchestration_playbook(self, url=None, namespace=None, local_images=True, **kwargs):
+    def generate_orchestration_playbook(self, url=None, namespace=None, local_images=True, states=None, **kwargs):
         playbook = super(Engine, self).generate_orchestration_playbook(url=url,
                                                                        namespace=namespace,
                                                                        local_images=local_images,
+                                                                       states=states,
                                                                        **kwargs)
-        routes = self.deploy.get_route_tasks(tags=['start'])
+        routes = []
+        if 'start' in (states or self.ORCHESTRATION_STATES):
+            routes = self.deploy.get_route_tasks(tags=['start'], batch=kwargs.get('batch_tasks', False))
         if routes:
             playbook[0]['tasks'].extend(routes)
         return playbook
@@ -4,14 +4,13 @@ from __future__ import absolute_import
 from .visibility import getLogger
 logger = getLogger(__name__)
 
+import copy
 import os
 import hashlib
 import importlib
 import json
 
 from datetime import datetime
-from distutils import dir_util
-from jinja2 import Environment, FileSystemLoader
 from ruamel import yaml
 from six import iteritems, string_types, text_type
 
@@ -20,27 +19,18 @@ from ..exceptions import AnsibleContainerException, \
     AnsibleContainerNotInitializedException
 from .temp import MakeTempDir
 from . import _text as text
+from . import references
 import container
 
-if container.ENV == 'conductor':
-    from ansible.playbook.role.include import RoleInclude
-    try:
-        from ansible.vars.manager import VariableManager
-    except ImportError:
-        # Prior to ansible/ansible@8f97aef1a365, this was not in its own module
-        from ansible.vars import VariableManager
-    from ansible.parsing.dataloader import DataLoader
-    from ansible.playbook.play import Play
-    from ansible.playbook.play_context import PlayContext
-    from ansible.executor.play_iterator import PlayIterator
-    from ansible.inventory.manager import InventoryManager
-    from ansible.inventory.host import Host
+# Ansible is only available inside the conductor, and importing its playbook, inventory and
+# executor machinery is expensive. The functions that need it import it when first called, so
+# conductor commands that never resolve roles or fingerprint layers don't pay for it.
 
 __all__ = ['conductor_dir', 'make_temp_dir', 'get_config', 'assert_initialized',
            'create_path', 'jinja_template_path', 'jinja_render_to_temp',
            'metadata_to_image_config', 'create_role_from_templates',
-           'resolve_role_to_path', 'generate_playbook_for_role',
-           'get_role_fingerprint', 'get_content_from_role',
+           'RoleRegistry', 'role_registry', 'resolve_role_to_path', 'generate_playbook_for_role',
+           'get_role_fingerprint', 'explain_fingerprint_change', 'get_content_from_role',
            'get_metadata_from_role', 'get_defaults_from_role', 'text',
            'ordereddict_to_list', 'list_to_ordereddict', 'modules_to_install',
            'roles_to_install', 'ansible_config_exists', 'create_file']
@@ -98,6 +88,7 @@ def jinja_template_path():
 
 
 def jinja_render_to_temp(template_dir, template_file, temp_dir, dest_file, **context):
+    from jinja2 import Environment, FileSystemLoader
     j2_env = Environment(loader=FileSystemLoader(template_dir))
     j2_tmpl = j2_env.get_template(template_file)
     rendered = j2_tmpl.render(dict(temp_dir=temp_dir, **context))
@@ -189,6 +180,7 @@ def create_role_from_templates(role_name=None, role_path=None,
     :return: None
     """
     context = locals()
+    from distutils import dir_util
     templates_path = os.path.join(conductor_dir, 'templates', 'role')
     timestamp = datetime.now().strftime('%Y%m%d%H%M%s')
 
@@ -221,21 +213,143 @@ def create_role_from_templates(role_name=None, role_path=None,
         os.rename(tasks_file, new_tasks_file)
 
 
+@container.conductor_only
+def _get_variable_manager(loader):
+    try:
+        from ansible.vars.manager import VariableManager
+    except ImportError:
+        # Prior to ansible/ansible@8f97aef1a365, this was not in its own module
+        from ansible.vars import VariableManager
+    try:
+        return VariableManager(loader=loader)
+    except TypeError:
+        # If Ansible prior to ansible/ansible@8f97aef1a365
+        return VariableManager()
+
+
+class RoleRegistry(object):
+    """
+    Resolves and parses the roles referenced by a project once per conductor session. Role paths,
+    meta/container.yml, defaults/main.yml and meta/main.yml dependencies are indexed here, so that
+    config processing and build fingerprinting don't hit the filesystem for every service.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """ Forget everything resolved and parsed, so that a new build sees changes to its roles """
+        self._paths = {}
+        self._content = {}
+        self._dependencies = {}
+        self._references = {}
+
+    @staticmethod
+    def role_key(role):
+        if isinstance(role, string_types):
+            return role
+        return role.get('role') or role.get('name') or json.dumps(role, sort_keys=True)
+
+    @container.conductor_only
+    def resolve(self, role):
+        key = self.role_key(role)
+        if key not in self._paths:
+            from ansible.parsing.dataloader import DataLoader
+            from ansible.playbook.role.include import RoleInclude
+            loader = DataLoader()
+            variable_manager = _get_variable_manager(loader)
+            role_obj = RoleInclude.load(data=role, play=None,
+                                        variable_manager=variable_manager,
+                                        loader=loader)
+            self._paths[key] = role_obj._role_path
+        return self._paths[key]
+
+    @container.conductor_only
+    def content(self, role, relative_path):
+        content_path = os.path.join(self.resolve(role), relative_path)
+        if content_path not in self._content:
+            content = None
+            if os.path.exists(content_path):
+                with open(content_path) as ifs:
+                    content = yaml.round_trip_load(ifs)
+            self._content[content_path] = content or yaml.compat.ordereddict()
+        # Callers merge and mutate what they get back, so never hand out the cached copy
+        return copy.deepcopy(self._content[content_path])
+
+    @container.conductor_only
+    def dependencies(self, role_path):
+        if role_path not in self._dependencies:
+            dependencies = []
+            meta_main_path = os.path.join(role_path, 'meta', 'main.yml')
+            if os.path.exists(meta_main_path):
+                with open(meta_main_path) as ifs:
+                    meta_main = yaml.safe_load(ifs)
+                if meta_main:
+                    for dependency in meta_main.get('dependencies') or []:
+                        if isinstance(dependency, dict):
+                            dependency = dependency.get('role', None)
+                        if dependency:
+                            dependencies.append(dependency)
+            self._dependencies[role_path] = dependencies
+        return list(self._dependencies[role_path])
+
+    @container.conductor_only
+    def references(self, role_path):
+        """
+        Return the names referenced by a role and the roles it depends on, or None when they can't
+        all be found by scanning the roles' files, or the roles depend on each other in a cycle.
+        """
+        names = self._role_references(role_path, set())
+        return None if names is None else set(names)
+
+    def _role_references(self, role_path, visiting):
+        if role_path not in self._references:
+            visiting = visiting | set([role_path])
+            try:
+                names = references.role_references(role_path)
+            except references.UnknownReferences as exc:
+                logger.debug('Role may use any variable', role_path=role_path, reason=text_type(exc))
+                names = None
+            for dependency in self.dependencies(role_path):
+                if names is None:
+                    break
+                dependency_path = self.resolve(dependency)
+                if dependency_path in visiting:
+                    logger.debug('Role dependencies are circular', role_path=role_path, dependency=dependency_path)
+                    names = None
+                    break
+                dependency_names = self._role_references(dependency_path, visiting)
+                names = None if dependency_names is None else names | dependency_names
+            self._references[role_path] = names
+        return self._references[role_path]
+
+    @container.conductor_only
+    def index(self, roles):
+        """
+        Resolve and parse each role, and every role it depends on, ahead of time.
+        """
+        seen = set()
+        to_index = list(roles)
+        while to_index:
+            role = to_index.pop()
+            role_path = self.resolve(role)
+            if role_path in seen:
+                continue
+            seen.add(role_path)
+            self.content(role, os.path.join('meta', 'container.yml'))
+            self.content(role, os.path.join('defaults', 'main.yml'))
+            to_index.extend(self.dependencies(role_path))
+        logger.debug('Indexed roles', roles=sorted(seen))
+
+role_registry = RoleRegistry()
+
+
 @container.conductor_only
 def resolve_role_to_path(role):
     """
     Given a role definition from a service's list of roles, returns the file path to the role
     """
-    loader = DataLoader()
-    try:
-        variable_manager = VariableManager(loader=loader)
-    except TypeError:
-        # If Ansible prior to ansible/ansible@8f97aef1a365
-        variable_manager = VariableManager()
-    role_obj = RoleInclude.load(data=role, play=None,
-                                variable_manager=variable_manager,
-                                loader=loader)
-    return role_obj._role_path
+    return role_registry.resolve(role)
 
 @container.conductor_only
 def generate_playbook_for_role(service_name, vars, role):
@@ -252,12 +366,38 @@ def generate_playbook_for_role(service_name, vars, role):
     logger.debug('Playbook generated: %s', playbook)
     return playbook
 
+class _TeeHash(object):
+    """ Feeds the same data to several hash objects, so a fingerprint's components get digests of their own """
+
+    def __init__(self, *hash_objs):
+        self.hash_objs = hash_objs
+
+    def update(self, data):
+        for hash_obj in self.hash_objs:
+            hash_obj.update(data)
+
+
 @container.conductor_only
-def get_role_fingerprint(role, service_name, config_vars):
+def get_role_fingerprint(role, service_name, config_vars, components=None):
     """
     Given a role definition from a service's list of roles, returns a hexdigest based on the role definition,
     the role contents, and the hexdigest of each dependency
+
+    Only the project variables the role and its dependencies refer to are part of the fingerprint, so
+    changing a variable doesn't invalidate the layers of roles that never use it. When the role reaches
+    variables indirectly, through vars or hostvars, or templates files outside of itself, every variable is.
+
+    If a components dict is given, it's filled in with a hexdigest for each input to the fingerprint: the
+    role definition, each variable, the role's files, each dependency, and each file or directory outside
+    of the role copied by its tasks.
     """
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.playbook.play import Play
+    from ansible.playbook.play_context import PlayContext
+    from ansible.executor.play_iterator import PlayIterator
+    from ansible.inventory.manager import InventoryManager
+    from ansible.inventory.host import Host
+
     def hash_file(hash_obj, file_path):
         blocksize = 64 * 1024
         with open(file_path, 'rb') as ifs:
@@ -276,18 +416,26 @@ def get_role_fingerprint(role, service_name, config_vars):
                 hash_obj.update('::')
                 hash_file(hash_obj, abs_file_path)
 
-    def hash_role(hash_obj, role_path):
+    component_hashes = {}
+
+    def component(hash_obj, name, top_level):
+        if components is None or not top_level:
+            return hash_obj
+        component_hash = component_hashes.setdefault(name, hashlib.sha256())
+        return _TeeHash(hash_obj, component_hash)
+
+    def hash_role(hash_obj, role_path, top_level=False):
         # Role content is easy to hash - the hash of the role content with the
         # hash of any role dependencies it has
-        hash_dir(hash_obj, role_path)
-        for dependency in get_dependencies_for_role(role_path):
-            if dependency:
-                dependency_path = resolve_role_to_path(dependency)
-                hash_role(hash_obj, dependency_path)
+        hash_dir(component(hash_obj, u'role files', top_level), role_path)
+        for dependency in role_registry.dependencies(role_path):
+            dependency_path = role_registry.resolve(dependency)
+            hash_role(component(hash_obj, u'dependency %s' % RoleRegistry.role_key(dependency), top_level),
+                      dependency_path)
         # However tasks within that role might reference files outside of the
         # role, like source code
         loader = DataLoader()
-        var_man = VariableManager(loader=loader)
+        var_man = _get_variable_manager(loader)
         play = Play.load(generate_playbook_for_role(service_name, config_vars, role)[0],
                          variable_manager=var_man, loader=loader)
         play_context = PlayContext(play=play)
@@ -302,36 +450,59 @@ def get_role_fingerprint(role, service_name, config_vars):
                 if src is not None:
                     if not os.path.exists(src) or not src.startswith(('/', '..')): continue
                     src = os.path.realpath(src)
+                    # Sources are a component of their own, even when reached through a dependency
+                    source_hash = component(fingerprint_hash, u'source %s' % src, True)
                     if os.path.isfile(src):
-                        hash_file(hash_obj, src)
+                        hash_file(source_hash, src)
                     else:
-                        hash_dir(hash_obj, src)
+                        hash_dir(source_hash, src)
 
-    def get_dependencies_for_role(role_path):
-        meta_main_path = os.path.join(role_path, 'meta', 'main.yml')
-        if os.path.exists(meta_main_path):
-            meta_main = yaml.safe_load(open(meta_main_path))
-            if meta_main:
-                for dependency in meta_main.get('dependencies', []):
-                    yield dependency.get('role', None)
-
-    hash_obj = hashlib.sha256()
+    fingerprint_hash = hashlib.sha256()
     # Account for variables passed to the role by including the invocation string
-    hash_obj.update((json.dumps(role) if not isinstance(role, string_types) else role) + '::')
+    component(fingerprint_hash, u'role definition', True).update(
+        (json.dumps(role) if not isinstance(role, string_types) else role) + '::')
+    # Account for the project variables the role refers to, or all of them when that can't be told
+    names = role_registry.references(role_registry.resolve(role))
+    if names is not None:
+        try:
+            names |= references.data_references(role)
+        except references.UnknownReferences:
+            names = None
+    scoped_vars = references.scope_variables(config_vars, names)
+    for name in sorted(scoped_vars):
+        component(fingerprint_hash, u'variable %s' % name, True).update(
+            (u'%s=%s::' % (name, json.dumps(scoped_vars[name], sort_keys=True, default=text_type))).encode('utf-8'))
     # Add each of the role's files and directories
-    hash_role(hash_obj, resolve_role_to_path(role))
-    return hash_obj.hexdigest()
+    hash_role(fingerprint_hash, role_registry.resolve(role), top_level=True)
+    if components is not None:
+        components.update((name, component_hash.hexdigest()) for name, component_hash in iteritems(component_hashes))
+    return fingerprint_hash.hexdigest()
+
+
+def explain_fingerprint_change(previous, current):
+    """
+    Compare the components of two fingerprints, as filled in by get_role_fingerprint, and describe
+    each input that was added, removed or changed. The parent layer is only blamed when nothing
+    else explains the change.
+    """
+    changes = []
+    for name in sorted(set(previous) | set(current)):
+        if name == u'parent layer':
+            continue
+        if name not in previous:
+            changes.append(u'%s was added' % name)
+        elif name not in current:
+            changes.append(u'%s was removed' % name)
+        elif previous[name] != current[name]:
+            changes.append(u'%s changed' % name)
+    if not changes and previous.get(u'parent layer') != current.get(u'parent layer'):
+        changes.append(u'parent layer changed')
+    return changes
 
 
 @container.conductor_only
 def get_content_from_role(role_name, relative_path):
-    role_path = resolve_role_to_path(role_name)
-    metadata_file = os.path.join(role_path, relative_path)
-    if os.path.exists(metadata_file):
-        with open(metadata_file) as ifs:
-            metadata = yaml.round_trip_load(ifs)
-        return metadata or yaml.compat.ordereddict()
-    return yaml.compat.ordereddict()
+    return role_registry.content(role_name, relative_path)
 
 
 @container.conductor_only
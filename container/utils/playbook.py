@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import json
+
+from ruamel import yaml
+from six import iteritems, text_type
+
+PLAYBOOK_FORMATS = ('yaml', 'json')
+
+# Play keys holding lists of tasks, written a task at a time
+TASK_LISTS = ('pre_tasks', 'tasks', 'post_tasks', 'handlers')
+
+
+def _dumps(value):
+    return json.dumps(value, default=text_type)
+
+
+def _write_play(play, ofs):
+    ofs.write(u'  {')
+    for index, (key, value) in enumerate(iteritems(play)):
+        ofs.write(u',\n    ' if index else u'\n    ')
+        ofs.write(u'%s: ' % _dumps(key))
+        if key in TASK_LISTS and value is not None:
+            # Any iterable of tasks, so a generator's tasks are written as it yields them
+            ofs.write(u'[')
+            empty = True
+            for task_index, task in enumerate(value):
+                ofs.write(u',\n      ' if task_index else u'\n      ')
+                ofs.write(_dumps(task))
+                empty = False
+            ofs.write(u']' if empty else u'\n    ]')
+        else:
+            ofs.write(_dumps(value))
+    ofs.write(u'\n  }')
+
+
+def write_playbook(playbook, ofs, playbook_format='json'):
+    """
+    Write a playbook to the open file ofs. The json format, which ansible-playbook reads as YAML,
+    is written a play and a task at a time, rather than serialized as one string. Plays and task
+    lists may be generators, whose items are written as they're yielded. The engines still build
+    their playbooks in memory before calling this, so only the serialization is streamed. The yaml
+    format round-trips through ruamel, keeping the comments added to plays, needs the whole
+    playbook, and is meant for playbooks people read.
+    """
+    if playbook_format == 'yaml':
+        ofs.write(yaml.round_trip_dump(playbook, indent=4, block_seq_indent=2, default_flow_style=False))
+        return
+    ofs.write(u'[')
+    for index, play in enumerate(playbook):
+        ofs.write(u',\n' if index else u'\n')
+        _write_play(play, ofs)
+    ofs.write(u'\n]\n')
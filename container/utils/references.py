@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from .visibility import getLogger
+logger = getLogger(__name__)
+
+import os
+import re
+
+from ruamel import yaml
+from six import iteritems, string_types
+
+# Jinja expressions and statements embedded in a string
+JINJA_BLOCK = re.compile(r'{{(.*?)}}|{%(.*?)%}', re.DOTALL)
+IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Task and play keywords whose values are bare Jinja expressions
+EXPRESSION_KEYS = ('when', 'failed_when', 'changed_when', 'until', 'loop', 'with_items', 'with_dict',
+                   'with_list', 'with_together', 'with_nested', 'with_subelements', 'with_sequence')
+
+# Names that reach variables indirectly, so what a role uses can't be told from its source
+INDIRECT_NAMES = ('vars', 'hostvars')
+
+# Role directories that are never templated
+UNTEMPLATED_DIRS = ('files', 'tests', '.git')
+
+# Role directories holding task lists
+TASK_DIRS = ('tasks', 'handlers')
+
+# Paths referenced by tasks that point outside of the role, whose content is not scanned, given either
+# as a YAML key or as a key=value argument
+EXTERNAL_SRC = re.compile(r'''(^\s*-?\s*src:\s*|\bsrc=)['"]?(/|\.\.)''', re.MULTILINE)
+EXTERNAL_PATH = re.compile(r'^\s*(/|\.\.)')
+
+# Task keywords pulling in tasks or roles that are decided at run time, or live outside of the role
+DYNAMIC_INCLUDES = ('include', 'include_tasks', 'include_role', 'import_role')
+
+
+class UnknownReferences(Exception):
+    """ Raised when a role may use variables in a way that can't be found by scanning it """
+    pass
+
+
+def expression_names(expression):
+    names = set(IDENTIFIER.findall(expression))
+    if names.intersection(INDIRECT_NAMES):
+        raise UnknownReferences(expression)
+    return names
+
+
+def text_references(content):
+    """ Return the names used by the Jinja expressions and statements in a string """
+    names = set()
+    for match in JINJA_BLOCK.finditer(content):
+        names.update(expression_names(match.group(1) or match.group(2) or u''))
+    return names
+
+
+def data_references(data):
+    """ Return the names used in loaded YAML, including the bare expressions of conditionals and loops """
+    names = set()
+    if isinstance(data, dict):
+        for key, value in iteritems(data):
+            if key in EXPRESSION_KEYS or (isinstance(key, string_types) and key.startswith('with_')):
+                for expression in (value if isinstance(value, list) else [value]):
+                    if isinstance(expression, string_types):
+                        names.update(expression_names(expression))
+            names.update(data_references(value))
+    elif isinstance(data, list):
+        for item in data:
+            names.update(data_references(item))
+    elif isinstance(data, string_types):
+        names.update(text_references(data))
+    return names
+
+
+def check_includes(data):
+    """
+    Raise UnknownReferences for tasks including tasks or roles that scanning the role can't follow.
+    Only a static import_tasks of a file within the role is allowed, since that file is scanned too.
+    """
+    if isinstance(data, dict):
+        for key, value in iteritems(data):
+            if key in DYNAMIC_INCLUDES:
+                raise UnknownReferences(u'%s: %s' % (key, value))
+            if key == 'import_tasks' and (not isinstance(value, string_types) or JINJA_BLOCK.search(value) or
+                                          EXTERNAL_PATH.match(value)):
+                raise UnknownReferences(u'%s: %s' % (key, value))
+            check_includes(value)
+    elif isinstance(data, list):
+        for item in data:
+            check_includes(item)
+
+
+def file_references(file_path, tasks=False):
+    with open(file_path, 'rb') as ifs:
+        try:
+            content = ifs.read().decode('utf-8')
+        except UnicodeDecodeError:
+            # Binary content isn't templated
+            return set()
+    if file_path.endswith(('.yml', '.yaml')):
+        if EXTERNAL_SRC.search(content):
+            raise UnknownReferences(file_path)
+        try:
+            data = yaml.safe_load(content)
+        except yaml.YAMLError:
+            raise UnknownReferences(file_path)
+        if tasks:
+            check_includes(data)
+        return data_references(data)
+    return text_references(content)
+
+
+def role_references(role_path):
+    """
+    Return the names a role's tasks, handlers, templates, defaults and metadata refer to, not
+    including its dependencies. Raises UnknownReferences when the role reaches variables
+    indirectly, templates files outside of itself, or includes tasks or roles dynamically.
+    """
+    names = set()
+    for root, dirs, files in os.walk(role_path, topdown=True):
+        if root == role_path:
+            dirs[:] = [d for d in dirs if d not in UNTEMPLATED_DIRS]
+        tasks = os.path.relpath(root, role_path).split(os.sep)[0] in TASK_DIRS
+        for file_name in files:
+            names.update(file_references(os.path.join(root, file_name), tasks=tasks))
+    return names
+
+
+def scope_variables(config_vars, names):
+    """
+    Return the subset of config_vars named in names, along with every variable their values refer
+    to in turn, and the ansible_ connection variables, which apply without being referenced. With
+    names of None, every variable is in scope.
+    """
+    config_vars = config_vars or {}
+    if names is None:
+        return dict(config_vars)
+    scoped = {}
+    pending = [name for name in config_vars if name in names or name.startswith('ansible_')]
+    while pending:
+        name = pending.pop()
+        if name in scoped:
+            continue
+        scoped[name] = config_vars[name]
+        try:
+            referenced = data_references(config_vars[name])
+        except UnknownReferences:
+            return dict(config_vars)
+        pending.extend(name for name in referenced if name in config_vars and name not in scoped)
+    return scoped
+
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import os
+import subprocess
+import sys
+
+import container
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(container.__file__)))
+
+
+def import_times(statement, conductor=False, environ=None):
+    """
+    Run statement in a fresh interpreter with -X importtime. Returns a dict of module name to
+    cumulative import time in microseconds, and the total time spent importing. With
+    conductor=True the interpreter behaves as if it were running inside the conductor container.
+    Variables in environ are added to its environment.
+    """
+    env = dict(os.environ)
+    env.update(environ or {})
+    if conductor:
+        env['ANSIBLE_CONTAINER'] = '1'
+    else:
+        env.pop('ANSIBLE_CONTAINER', None)
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = proc.communicate()
+    assert proc.returncode == 0, stderr
+    times = {}
+    total = 0
+    for line in stderr.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            # The header row
+            continue
+        if not name.startswith('  '):
+            # Nested imports are indented, and already counted by their top-level parent
+            total += int(cumulative)
+    return times, total
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import timeit
+
+import pytest
+
+string_utils = pytest.importorskip('string_utils')
+
+from container.k8s import base_deploy
+from container.k8s.deploy import Deploy
+
+from .test_deploy_templates import container_yml, services  # noqa: F401 (fixture)
+
+
+def convert(key):
+    return string_utils.snake_case_to_camel(key, upper_case_first=False)
+
+
+def test_manifest_generation_timing(services, monkeypatch, record_property):
+    # Conversions are checked in test/unit/container/k8s/test_casing.py; this only compares the time
+    # manifests take with the memoized conversion and with string_utils on every key
+    def generate():
+        deploy = Deploy(services=services, project_name='demo', namespace_name='demo')
+        return list(deploy.get_manifest_templates())
+
+    memoized = min(timeit.repeat(generate, number=1, repeat=3))
+    monkeypatch.setattr(base_deploy, 'snake_to_camel', convert)
+    unmemoized = min(timeit.repeat(generate, number=1, repeat=3))
+    record_property('memoized_seconds', memoized)
+    record_property('string_utils_seconds', unmemoized)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+if sys.version_info < (3, 7):
+    pytest.skip('-X importtime requires Python 3.7 or newer', allow_module_level=True)
+
+pytest.importorskip('ansible')
+
+from .importtime import import_times
+
+CONDUCTOR_COMMANDS = ['build', 'deploy', 'install', 'push', 'run', 'restart', 'stop', 'destroy']
+
+# Ansible machinery only needed for fingerprinting layers or talking to Galaxy. Resolving the web
+# service's role is part of every start-up that processes services.
+DEFERRED_MODULES = ['ansible.playbook.play', 'ansible.executor.play_iterator', 'ansible.inventory.manager',
+                    'ansible.galaxy']
+
+CONFIG = {
+    'version': '2',
+    'settings': {'pwd': '/src'},
+    'defaults': {'http_port': 8080},
+    'registries': {'local': {'url': 'http://localhost:5000', 'namespace': 'demo'}},
+    'services': {
+        'web': {'from': 'centos:7', 'roles': ['web'], 'ports': ['{{ http_port }}:80']},
+        'cache': {'from': 'redis:3'},
+    },
+}
+
+# The role the web service applies, resolved and indexed as each conductor command starts
+ROLE_FILES = {
+    'meta/main.yml': 'dependencies: []\n',
+    'meta/container.yml': 'command: [httpd, -DFOREGROUND]\n',
+    'defaults/main.yml': 'document_root: /var/www/html\n',
+    'tasks/main.yml': '- debug: msg="{{ document_root }}"\n',
+}
+
+# Mirrors the work conductor_commandline does before dispatching to conductorcmd_*
+STARTUP = '''
+import container.cli
+from container import core
+from container.cli import BYPASS_SERVICE_PROCESSING
+from container.config import AnsibleContainerConductorConfig
+from container.utils import list_to_ordereddict
+AnsibleContainerConductorConfig(list_to_ordereddict(%r), skip_services=%r in BYPASS_SERVICE_PROCESSING)
+'''
+
+
+@pytest.fixture(scope='module')
+def roles_path():
+    path = tempfile.mkdtemp()
+    for relative_path, content in ROLE_FILES.items():
+        file_path = os.path.join(path, 'web', relative_path)
+        if not os.path.isdir(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+        with open(file_path, 'w') as ofs:
+            ofs.write(content)
+    yield path
+    shutil.rmtree(path)
+
+
+@pytest.mark.parametrize('command', CONDUCTOR_COMMANDS)
+def test_conductor_cold_start(command, roles_path, record_property):
+    times, total = import_times(STARTUP % (CONFIG, command), conductor=True,
+                                environ={'ANSIBLE_ROLES_PATH': roles_path})
+    record_property('import_ms', total / 1000.0)
+    loaded = [module for module in DEFERRED_MODULES if module in times]
+    assert not loaded, 'Imported at conductor start-up: %s' % ', '.join(loaded)
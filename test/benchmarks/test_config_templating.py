@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import timeit
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible.template import Templar
+from ruamel import yaml
+
+from container.config import AnsibleContainerConductorConfig
+
+
+SERVICE_COUNT = 200
+
+
+def roundtrip_template(value, templar):
+    # The approach _process_section used before walking the structure directly
+    buffer = BytesIO()
+    yaml.round_trip_dump(value, buffer)
+    return yaml.round_trip_load(templar.template(buffer.getvalue()))
+
+
+def make_services():
+    services = yaml.compat.ordereddict()
+    for idx in range(SERVICE_COUNT):
+        service = yaml.compat.ordereddict()
+        service['from'] = 'centos:7'
+        service['command'] = ['/usr/bin/dumb-init', 'httpd', '-DFOREGROUND']
+        service['ports'] = ['{{ http_port }}:80', '8443:443']
+        service['environment'] = yaml.compat.ordereddict([
+            ('SERVICE_INDEX', idx),
+            ('DEBUG', '{{ debug }}'),
+            ('LOG_LEVEL', 'info'),
+        ])
+        service['volumes'] = ['/var/log/service-%d:/var/log' % idx, 'static:/srv/static']
+        services['service-%d' % idx] = service
+    return services
+
+
+@pytest.fixture
+def templar():
+    return Templar(loader=None, variables={'http_port': 8080, 'debug': 1})
+
+
+def test_template_value_timing(templar, record_property):
+    # Behavior is covered by test/unit/container/test_config.py; this only reports timings,
+    # which vary too much between machines to assert on
+    services = make_services()
+    direct = min(timeit.repeat(
+        lambda: AnsibleContainerConductorConfig._template_value(services, templar), number=3, repeat=3))
+    roundtrip = min(timeit.repeat(lambda: roundtrip_template(services, templar), number=3, repeat=3))
+    record_property('direct_seconds', direct)
+    record_property('roundtrip_seconds', roundtrip)
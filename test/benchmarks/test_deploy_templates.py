@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import timeit
+
+import pytest
+
+pytest.importorskip('string_utils')
+
+from ruamel import yaml
+
+from container.k8s.deploy import Deploy
+
+
+SERVICE_COUNT = 500
+
+SERVICE_TEMPLATE = u'''
+  service-{idx}:
+    image: demo-service-{idx}:latest
+    command: [/usr/bin/dumb-init, httpd, -DFOREGROUND]
+    ports:
+      - 8080:80
+      - 8443:443
+    environment:
+      SERVICE_INDEX: {idx}
+      LOG_LEVEL: info
+    volumes:
+      - /var/log/service-{idx}:/var/log
+      - static:/srv/static
+      - /tmp
+    k8s:
+      deployment:
+        replicas: 2
+        strategy:
+          type: rolling_update
+          rolling_update:
+            max_surge: 1
+            max_unavailable: 0
+        security_context:
+          run_as_user: 1000
+          fs_group: 1000
+'''
+
+
+def container_yml():
+    return u'version: "2"\nservices:' + u''.join(SERVICE_TEMPLATE.format(idx=idx) for idx in range(SERVICE_COUNT))
+
+
+@pytest.fixture(scope='module')
+def services():
+    return yaml.safe_load(container_yml())['services']
+
+
+def make_deploy(services):
+    return Deploy(services=services, project_name='demo', namespace_name='demo')
+
+
+def test_memoized_template_timing(services, record_property):
+    # Behavior is covered by test/unit/container/k8s/test_deploy.py; this only reports timings,
+    # which vary too much between hosts to assert on
+    generate = min(timeit.repeat(lambda: make_deploy(services).get_deployment_templates(), number=1, repeat=3))
+    deploy = make_deploy(services)
+    deploy.get_deployment_templates()
+    memoized = min(timeit.repeat(deploy.get_deployment_templates, number=1, repeat=3))
+    record_property('generate_seconds', generate)
+    record_property('memoized_seconds', memoized)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import sys
+
+import pytest
+
+if sys.version_info < (3, 7):
+    pytest.skip('-X importtime requires Python 3.7 or newer', allow_module_level=True)
+
+from .importtime import import_times
+
+# Subsystems the host CLI should only import once a subcommand needs them
+DEFERRED_MODULES = ['container.core', 'container.config', 'docker', 'requests', 'jsonschema', 'jinja2']
+
+
+def test_host_cli_defers_subsystems(record_property):
+    times, total = import_times('import container.cli')
+    record_property('import_ms', total / 1000.0)
+    loaded = [module for module in DEFERRED_MODULES if module in times]
+    assert not loaded, 'Imported at CLI startup: %s' % ', '.join(loaded)
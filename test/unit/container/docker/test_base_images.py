@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from container.docker.base_images import BaseImageResolver, BaseImageRecord
+from container.exceptions import AnsibleContainerException
+
+
+class FakeEngine(object):
+
+    project_name = 'demo'
+
+    def __init__(self, local, remote):
+        self.local = dict(local)
+        self.remote = dict(remote)
+        self.pulls = []
+        self._lock = threading.Lock()
+
+    def get_image_id_by_tag(self, tag):
+        return self.local.get(tag)
+
+    def pull_image_by_tag(self, tag):
+        with self._lock:
+            self.pulls.append(tag)
+        if tag not in self.remote:
+            raise AnsibleContainerException('Failed to pull %s' % tag)
+        self.local[tag] = self.remote[tag]
+
+    def get_repo_digest(self, image_id, repository):
+        return 'sha256:digest-of-%s' % image_id if image_id in self.remote.values() else None
+
+
+class TestBaseImageResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.tmpdir, 'state.json')
+        self.now = [1000]
+        self.engine = FakeEngine(local={'centos:7': 'old', 'local:dev': 'dev'},
+                                 remote={'centos:7': 'new', 'redis:3': 'redis'})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def resolver(self, ttl=60):
+        return BaseImageResolver(self.engine, BaseImageRecord(self.state_path), ttl=ttl,
+                                 clock=lambda: self.now[0])
+
+    def test_pulls_once_then_uses_record(self):
+        resolver = self.resolver()
+        resolver.start(['centos:7', 'redis:3', 'centos:7'])
+        self.assertEqual(resolver.get('centos:7'), ('new', 'sha256:digest-of-new'))
+        self.assertEqual(resolver.get('redis:3'), ('redis', 'sha256:digest-of-redis'))
+        resolver.close()
+        self.assertEqual(sorted(self.engine.pulls), ['centos:7', 'redis:3'])
+
+        self.now[0] += 30
+        self.assertEqual(self.resolver().get('centos:7'), ('new', 'sha256:digest-of-new'))
+        self.assertEqual(len(self.engine.pulls), 2)
+
+    def test_expired_tags_are_pulled_again(self):
+        self.resolver().get('centos:7')
+        self.now[0] += 61
+        self.engine.remote['centos:7'] = 'newer'
+        self.assertEqual(self.resolver().get('centos:7'), ('newer', 'sha256:digest-of-newer'))
+        with open(self.state_path) as ifs:
+            record = json.load(ifs)['ansibleContainerBaseImages']['demo']['centos:7']
+        self.assertEqual(record['image_id'], 'newer')
+
+    def test_local_images(self):
+        self.assertEqual(self.resolver().get('local:dev'), ('dev', None))
+        with self.assertRaises(AnsibleContainerException):
+            self.resolver().get('missing:1')
+
+    def test_failed_pulls_are_recorded(self):
+        self.assertEqual(self.resolver().get('local:dev'), ('dev', None))
+        self.now[0] += 30
+        self.assertEqual(self.resolver().get('local:dev'), ('dev', None))
+        self.assertEqual(self.engine.pulls, ['local:dev'])
+
+        self.now[0] += 31
+        self.assertEqual(self.resolver().get('local:dev'), ('dev', None))
+        self.assertEqual(self.engine.pulls, ['local:dev', 'local:dev'])
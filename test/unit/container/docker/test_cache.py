@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from container.docker.cache import BuildRecord, service_layers, hit_ratio
+
+FINGERPRINT = 'com.ansible.container.fingerprint'
+ROLE = 'com.ansible.container.role'
+MB = 1024 ** 2
+
+
+def image(id, parent=None, tags=None, created=0, size=0, role=None):
+    labels = {FINGERPRINT: 'fp-%s' % id, ROLE: role} if role else {}
+    return {'Id': id, 'ParentId': parent or '', 'RepoTags': tags or ['<none>:<none>'],
+            'Created': created, 'Size': size, 'Labels': labels}
+
+
+class TestBuildRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.tmpdir, 'state.json')
+        with open(self.state_path, 'w') as ofs:
+            json.dump({'ansibleContainerPushes': {}}, ofs)
+        self.now = [1000]
+        self.record = BuildRecord(self.state_path, history=2, clock=lambda: self.now[0])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_role_stats(self):
+        self.record.add('demo', [('web', 'common', 'fp1', 'bust'), ('web', 'web', 'fp2', 'miss')])
+        self.now[0] = 2000
+        self.record.add('demo', [('web', 'common', 'fp1', 'hit'), ('web', 'web', 'fp3', 'bust')])
+        stats = self.record.role_stats('demo')
+        self.assertEqual(stats['common'], {'hit': 1, 'miss': 0, 'bust': 1})
+        self.assertEqual(stats['web'], {'hit': 0, 'miss': 1, 'bust': 1})
+        self.assertEqual(hit_ratio(stats['common']), 0.5)
+        self.assertEqual(self.record.last_used('demo'), {'fp1': 2000, 'fp2': 1000, 'fp3': 2000})
+        self.assertEqual(self.record.role_stats('other'), {})
+
+    def test_history_is_capped(self):
+        for n in range(3):
+            self.record.add('demo', [('web', 'web', 'fp%d' % n, 'hit')])
+        self.assertEqual(self.record.builds('demo'), 2)
+        with open(self.state_path) as ifs:
+            self.assertEqual(json.load(ifs)['ansibleContainerPushes'], {})
+
+    def test_last_used_follows_history(self):
+        for n in range(4):
+            self.now[0] = 1000 * (n + 1)
+            self.record.add('demo', [('web', 'common', 'fp-common', 'hit'), ('web', 'web', 'fp%d' % n, 'bust')])
+        self.assertEqual(self.record.last_used('demo'), {'fp-common': 4000, 'fp2': 3000, 'fp3': 4000})
+
+
+class TestServiceLayers(unittest.TestCase):
+
+    def test_layers_by_service(self):
+        images = [
+            image('base', tags=['centos:7'], size=100 * MB),
+            image('common', parent='base', created=1, size=150 * MB, role='common'),
+            image('web', parent='common', tags=['demo-web:1', 'demo-web:latest'], created=2, size=160 * MB,
+                  role='web'),
+            image('db', parent='common', tags=['demo-db:1'], created=3, size=170 * MB, role='db'),
+            image('orphan', parent='common', created=4, size=155 * MB, role='web'),
+            image('other', parent='base', created=5, size=110 * MB, role='other'),
+        ]
+        layers = service_layers(images, ['demo-web', 'demo-db'], ['common', 'web', 'db'], FINGERPRINT, ROLE,
+                                last_used={'fp-web': 42})
+        self.assertEqual([layer.id for layer in layers['demo-web']], ['web', 'common'])
+        self.assertEqual([layer.id for layer in layers['demo-db']], ['db', 'common'])
+        self.assertEqual([layer.id for layer in layers[None]], ['orphan'])
+        self.assertEqual(layers['demo-web'][0].size, 10 * MB)
+        self.assertEqual(layers['demo-web'][0].last_used, 42)
+        self.assertEqual(layers['demo-web'][1].label(ROLE), 'common')
@@ -0,0 +1,108 @@
+import unittest
+
+from container.docker.gc import GarbageCollector, build_containers, parse_size
+from container.exceptions import AnsibleContainerRequestException
+
+FINGERPRINT = 'com.ansible.container.fingerprint'
+ROLE = 'com.ansible.container.role'
+MB = 1024 ** 2
+
+
+def image(id, parent=None, tags=None, created=0, size=0, role=None):
+    labels = {FINGERPRINT: 'fp-%s' % id, ROLE: role} if role else {}
+    return {'Id': id, 'ParentId': parent or '', 'RepoTags': tags or ['<none>:<none>'],
+            'Created': created, 'Size': size, 'Labels': labels}
+
+
+def build(n, created, base='base'):
+    """ A build of demo-web: a layer for role common, then one for role web, tagged with its build number """
+    return [
+        image('common%d' % n, parent=base, created=created, size=150 * MB, role='common'),
+        image('web%d' % n, parent='common%d' % n, tags=['demo-web:%d' % n], created=created + 1,
+              size=(150 + n) * MB, role='web'),
+    ]
+
+
+class TestGarbageCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.images = [image('base', tags=['centos:7'], size=100 * MB)]
+        for n in range(1, 6):
+            self.images.extend(build(n, created=n * 100))
+        # Build 2 is tagged latest
+        self.images[4]['RepoTags'].append('demo-web:latest')
+        # A layer left behind by a failed build, and another project's layer
+        self.images.append(image('orphan', parent='common5', created=600, size=160 * MB, role='web'))
+        self.images.append(image('other', parent='base', created=700, size=110 * MB, role='other'))
+
+    def plan(self, **kwargs):
+        collector = GarbageCollector(self.images, ['demo-web'], ['common', 'web'], FINGERPRINT, ROLE, **kwargs)
+        return collector.plan()
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size('512'), 512)
+        self.assertEqual(parse_size('1.5G'), int(1.5 * 1024 ** 3))
+        self.assertEqual(parse_size('20mb'), 20 * MB)
+        with self.assertRaises(AnsibleContainerRequestException):
+            parse_size('lots')
+
+    def test_keep_recent_builds(self):
+        removals = self.plan(keep=2)
+        self.assertEqual(sorted(r.id for r in removals), ['common1', 'common3', 'orphan', 'web1', 'web3'])
+        self.assertEqual(dict((r.id, r.reason) for r in removals)['web1'], 'old build')
+        self.assertEqual(dict((r.id, r.reason) for r in removals)['orphan'], 'unused layer')
+        self.assertEqual(dict((r.id, r.size) for r in removals)['web3'], 3 * MB)
+
+    def test_latest_counts_towards_keep(self):
+        # Tag the newest build latest instead, so keeping 3 keeps builds 5, 4 and 3 and nothing more
+        self.images[4]['RepoTags'].remove('demo-web:latest')
+        self.images[10]['RepoTags'].append('demo-web:latest')
+        removed = set(r.id for r in self.plan(keep=3))
+        self.assertEqual(set(['web1', 'web2']), removed & set('web%d' % n for n in range(1, 6)))
+
+    def test_children_are_removed_first(self):
+        removals = [r.id for r in self.plan(keep=1)]
+        for n in (1, 3, 4):
+            self.assertLess(removals.index('web%d' % n), removals.index('common%d' % n))
+
+    def test_disk_budget(self):
+        # Each build adds 50 MB for common, and n MB for web. Builds 2 (latest) to 5 take 214 MB, so the
+        # oldest, 3 then 4, are evicted to fit.
+        removals = self.plan(keep=3, max_bytes=110 * MB)
+        reasons = dict((r.id, r.reason) for r in removals)
+        self.assertEqual(reasons['web3'], 'over disk budget')
+        self.assertEqual(reasons['web4'], 'over disk budget')
+        self.assertEqual(reasons['common4'], 'over disk budget')
+        self.assertNotIn('web5', reasons)
+        self.assertNotIn('web2', reasons)
+
+    def test_latest_is_kept_over_budget(self):
+        reasons = dict((r.id, r.reason) for r in self.plan(keep=1, max_bytes=0))
+        self.assertNotIn('web2', reasons)
+        self.assertNotIn('common2', reasons)
+        self.assertNotIn('base', reasons)
+        self.assertNotIn('other', reasons)
+
+
+class FakeContainer(object):
+
+    def __init__(self, name, project=None):
+        self.name = name
+        self.labels = {'com.docker.compose.project': project} if project else {}
+
+
+class TestBuildContainers(unittest.TestCase):
+
+    def test_only_intermediate_build_containers(self):
+        containers = [
+            FakeContainer('demo_web-0123abcd-common'),
+            FakeContainer('demo_web-api-89abcdef-nginx.conf'),
+            FakeContainer('demo_web-api_1', project='demo'),
+            FakeContainer('demo_web-deadbeef-run', project='demo'),
+            FakeContainer('demo_web'),
+            FakeContainer('demo_web-notafingerprint-common'),
+            FakeContainer('demo_db-0123abcd-postgres'),
+        ]
+        self.assertEqual([c.name for c in build_containers(containers, ['demo_web', 'demo_web-api'])],
+                         ['demo_web-0123abcd-common', 'demo_web-api-89abcdef-nginx.conf'])
+        self.assertEqual(build_containers(containers, []), [])
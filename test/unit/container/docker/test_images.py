@@ -0,0 +1,199 @@
+import unittest
+
+import container
+from container.docker.engine import Engine
+from container.docker.images import ImageIndex, split_tag
+
+
+class FakeImage(object):
+
+    def __init__(self, id, tags):
+        self.id = id
+        self.short_id = id[:10]
+        self.tags = tags
+
+
+class FakeContainer(object):
+
+    def __init__(self, name, image=None, project=None):
+        self.name = name
+        self.image = image
+        self.labels = {'com.docker.compose.project': project} if project else {}
+        self.removed = False
+
+    def remove(self, **kwargs):
+        self.removed = True
+
+
+class FakeContainers(object):
+
+    def __init__(self, containers):
+        self._containers = containers
+
+    def list(self, **kwargs):
+        return list(self._containers)
+
+    def get(self, name):
+        return [c for c in self._containers if c.name == name][0]
+
+
+class FakeImages(object):
+
+    def __init__(self, images):
+        self._images = images
+        self.list_calls = 0
+        self.removed = []
+
+    def remove(self, image, force=False):
+        self.removed.append(image)
+
+    def list(self, **kwargs):
+        self.list_calls += 1
+        return list(self._images)
+
+    def get(self, name):
+        raise AssertionError('Unexpected lookup of %s' % name)
+
+
+class FakeClient(object):
+
+    def __init__(self, images, containers=()):
+        self.images = FakeImages(images)
+        self.containers = FakeContainers(containers)
+        self.layers_size = 10 * 1024 ** 2
+
+    def df(self):
+        # Each removal frees a megabyte
+        return {'LayersSize': self.layers_size - len(self.images.removed) * 1024 ** 2}
+
+
+IMAGES = [
+    FakeImage('sha256:web1', ['demo-web:20170101000000']),
+    FakeImage('sha256:web2', ['demo-web:20170102000000', 'demo-web:latest']),
+    FakeImage('sha256:db1', ['demo-db:20170101000000']),
+    FakeImage('sha256:db2', ['demo-db:20170103000000']),
+    FakeImage('sha256:conductor', ['demo-conductor:latest']),
+    FakeImage('sha256:centos', ['centos:7', 'centos:latest']),
+    FakeImage('sha256:local', ['localhost:5000/tools:1.0']),
+]
+
+
+class TestImageIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ImageIndex(IMAGES)
+
+    def test_split_tag(self):
+        self.assertEqual(split_tag('centos:7'), ('centos', '7'))
+        self.assertEqual(split_tag('centos'), ('centos', None))
+        self.assertEqual(split_tag('localhost:5000/tools'), ('localhost:5000/tools', None))
+        self.assertEqual(split_tag('localhost:5000/tools:1.0'), ('localhost:5000/tools', '1.0'))
+
+    def test_get(self):
+        self.assertEqual(self.index.get('centos').id, 'sha256:centos')
+        self.assertEqual(self.index.get('localhost:5000/tools:1.0').id, 'sha256:local')
+        self.assertIsNone(self.index.get('localhost:5000/tools'))
+
+    def test_latest(self):
+        self.assertEqual(self.index.latest('demo-web').id, 'sha256:web2')
+        self.assertEqual(self.index.latest('demo-db').id, 'sha256:db2')
+        self.assertIsNone(self.index.latest('demo-cache'))
+
+    def test_tags(self):
+        self.assertEqual(sorted(self.index.tags('demo-db')),
+                         ['demo-db:20170101000000', 'demo-db:20170103000000'])
+
+
+class TestOrchestrationPlaybook(unittest.TestCase):
+
+    def setUp(self):
+        self._env = container.ENV
+        container.ENV = 'conductor'
+        services = {
+            'web': {'roles': ['web'], 'from': 'centos:7'},
+            'db': {'roles': ['db'], 'from': 'centos:7'},
+            'cache': {'from': 'redis:3'},
+        }
+        self.engine = Engine('demo', services)
+        self.engine._client = FakeClient(IMAGES)
+
+    def tearDown(self):
+        container.ENV = self._env
+
+    def test_single_image_listing(self):
+        playbook = self.engine.generate_orchestration_playbook()
+        self.assertEqual(self.engine.client.images.list_calls, 1)
+
+        definition = playbook[0]['tasks'][0]['docker_service']['definition']
+        self.assertEqual(definition['services']['web']['image'], 'demo-web:20170102000000')
+        self.assertEqual(definition['services']['db']['image'], 'demo-db:20170103000000')
+        self.assertEqual(definition['services']['cache']['image'], 'redis:3')
+
+        removed = [task['with_items'] for task in playbook[0]['tasks'] if 'docker_image' in task]
+        self.assertEqual(len(removed), 1)
+        self.assertEqual(sorted(removed[0]), ['demo-conductor:latest', 'demo-db:20170101000000', 'demo-db:20170103000000',
+                                   'demo-web:20170101000000', 'demo-web:20170102000000', 'demo-web:latest'])
+
+    def test_single_state(self):
+        playbook = self.engine.generate_orchestration_playbook(states=['start'])
+        tasks = playbook[0]['tasks']
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0]['tags'], ['start'])
+        self.assertEqual(tasks[0]['docker_service']['state'], 'present')
+
+    def test_destroy_state(self):
+        playbook = self.engine.generate_orchestration_playbook(states=['destroy'])
+        tasks = playbook[0]['tasks']
+        self.assertEqual([task['tags'] for task in tasks if 'docker_service' in task], [['destroy']])
+        self.assertEqual(len([task for task in tasks if 'docker_image' in task]), 1)
+
+    def test_destroy_without_image_removal(self):
+        playbook = self.engine.generate_orchestration_playbook(states=['destroy'], remove_images=False)
+        self.assertEqual([task for task in playbook[0]['tasks'] if 'docker_image' in task], [])
+
+    def test_parallel_startup(self):
+        playbook = self.engine.generate_orchestration_playbook(states=['start'], startup_workers=2)
+        started = [task['docker_service']['services'] for task in playbook[0]['tasks'] if 'docker_service' in task]
+        self.assertEqual(started, [['cache'], ['db'], ['web']])
+
+    def test_deployed_playbook_starts_services_together(self):
+        playbook = self.engine.generate_orchestration_playbook(startup_workers=2)
+        start = [task for task in playbook[0]['tasks'] if task['tags'] == ['start']]
+        self.assertEqual(len(start), 1)
+        self.assertNotIn('services', start[0]['docker_service'])
+
+
+class TestDestroyCleanup(unittest.TestCase):
+
+    def setUp(self):
+        self._env = container.ENV
+        container.ENV = 'conductor'
+        images = IMAGES + [FakeImage('sha256:shared', ['demo-web:20161231000000', 'registry/ns/demo-web:1'])]
+        self.containers = [
+            FakeContainer('demo_conductor', image=IMAGES[4]),
+            FakeContainer('demo_web-web'),
+            FakeContainer('demo_db'),
+            FakeContainer('demo_web_1', project='demo'),
+            FakeContainer('custom-name', project='demo'),
+            FakeContainer('other_web_1', project='other'),
+            FakeContainer('demo_v2_web_1', project='demo_v2'),
+            FakeContainer('demo_v2_conductor'),
+        ]
+        self.engine = Engine('demo', {'web': {'roles': ['web']}, 'db': {'roles': ['db']}})
+        self.engine._client = FakeClient(images, self.containers)
+
+    def tearDown(self):
+        container.ENV = self._env
+
+    def test_bulk_removal(self):
+        reclaimed = self.engine.post_destroy_cleanup(workers=2)
+        self.assertEqual([c.name for c in self.containers if c.removed],
+                         ['demo_web-web', 'demo_db', 'demo_web_1', 'custom-name'])
+        self.assertEqual(sorted(self.engine.client.images.removed),
+                         ['demo-conductor:latest', 'demo-web:20161231000000',
+                          'sha256:db1', 'sha256:db2', 'sha256:web1', 'sha256:web2'])
+        self.assertEqual(reclaimed, 6 * 1024 ** 2)
+
+    def test_projects_sharing_the_prefix_are_kept(self):
+        self.engine.post_destroy_cleanup(workers=2)
+        self.assertEqual([c.name for c in self.containers if c.name.startswith('demo_v2') and c.removed], [])
@@ -0,0 +1,73 @@
+import logging
+import unittest
+
+from container.docker.progress import PushProgress, human_size
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPushProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.progress = PushProgress('ns/app:latest', interval=5, clock=self.clock)
+
+    def test_human_size(self):
+        self.assertEqual(human_size(512), '512 B')
+        self.assertEqual(human_size(2048), '2.0 KB')
+        self.assertEqual(human_size(3 * 1024 ** 3), '3.0 GB')
+
+    def test_aggregates_layers(self):
+        stream = [
+            {'status': 'The push refers to a repository [docker.io/ns/app]'},
+            {'status': 'Preparing', 'progressDetail': {}, 'id': 'aaa'},
+            {'status': 'Preparing', 'progressDetail': {}, 'id': 'bbb'},
+            {'status': 'Preparing', 'progressDetail': {}, 'id': 'ccc'},
+            {'status': 'Layer already exists', 'progressDetail': {}, 'id': 'ccc'},
+            {'status': 'Pushing', 'progressDetail': {'current': 512, 'total': 2048}, 'id': 'aaa'},
+            {'status': 'Pushing', 'progressDetail': {'current': 1024, 'total': 4096}, 'id': 'bbb'},
+            {'status': 'Pushing', 'progressDetail': {'current': 2048, 'total': 2048}, 'id': 'aaa'},
+            {'status': 'Pushed', 'progressDetail': {}, 'id': 'aaa'},
+            {'status': 'Mounted from library/base', 'progressDetail': {}, 'id': 'ddd'},
+        ]
+        for line in stream:
+            self.progress.update(line)
+        self.assertEqual(self.progress.bytes_pushed, 2048 + 1024)
+        self.assertEqual(self.progress.bytes_total, 2048 + 4096)
+        self.assertEqual(self.progress.pushed, set(['aaa']))
+        self.assertEqual(self.progress.skipped, set(['ccc', 'ddd']))
+
+    def test_pushed_without_progress(self):
+        # Small layers can go from Preparing to Pushed without any Pushing message
+        self.progress.update({'status': 'Pushing', 'progressDetail': {'current': 100, 'total': 300}, 'id': 'aaa'})
+        self.progress.update({'status': 'Pushed', 'progressDetail': {}, 'id': 'aaa'})
+        self.progress.update({'status': 'Pushed', 'progressDetail': {}, 'id': 'bbb'})
+        self.assertEqual(self.progress.bytes_pushed, 300)
+        self.assertEqual(self.progress.pushed, set(['aaa', 'bbb']))
+
+    def test_periodic_summary(self):
+        logger = logging.getLogger('container.docker.progress')
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        try:
+            for i in range(100):
+                self.clock.now += 0.2
+                self.progress.update({'status': 'Pushing', 'id': 'aaa',
+                                      'progressDetail': {'current': i * 1024, 'total': 100 * 1024}})
+            self.progress.report()
+        finally:
+            logger.removeHandler(handler)
+        # 20 seconds of messages produce four periodic summaries and the final report
+        self.assertEqual(len(records), 5)
+        self.assertIn('ns/app:latest: 0/1 layers pushed', records[0].getMessage())
+        self.assertIn('in 20.0s', records[-1].getMessage())
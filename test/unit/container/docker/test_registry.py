@@ -0,0 +1,347 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from six.moves import BaseHTTPServer
+
+import container
+from container.docker.engine import Engine
+from container.docker.registry import RegistryClient, PushRecord, LoginRecord, DOCKER_HUB_REGISTRY_URL
+
+MANIFEST = b'{"schemaVersion": 2}'
+DIGEST = 'sha256:0123456789abcdef'
+TOKEN = 'secret-token'
+
+
+class StubRegistryHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ A registry holding a single manifest for repository 'ns/app', reachable by digest or tag. """
+
+    def log_message(self, *args):
+        pass
+
+    def _authorized(self):
+        if not self.server.require_token:
+            return True
+        if self.headers.get('Authorization') == 'Bearer %s' % TOKEN:
+            return True
+        self.send_response(401)
+        self.send_header('WWW-Authenticate',
+                         'Bearer realm="http://%s:%s/token",service="stub",scope="repository:ns/app:pull,push"'
+                         % self.server.server_address)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        return False
+
+    def _manifest(self):
+        reference = self.path.rsplit('/', 1)[-1]
+        if self.path.startswith('/v2/ns/app/manifests/') and \
+                (reference == DIGEST or reference in self.server.tags):
+            return MANIFEST
+        return None
+
+    def do_GET(self):
+        if self.path.startswith('/token'):
+            self.server.token_requests += 1
+            body = json.dumps({'token': TOKEN}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if not self._authorized():
+            return
+        manifest = self._manifest()
+        if manifest is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.docker.distribution.manifest.v2+json')
+        self.send_header('Docker-Content-Digest', DIGEST)
+        self.send_header('Content-Length', str(len(manifest)))
+        self.end_headers()
+        self.wfile.write(manifest)
+
+    def do_HEAD(self):
+        if not self._authorized():
+            return
+        manifest = self._manifest()
+        self.send_response(200 if manifest else 404)
+        if manifest:
+            self.send_header('Docker-Content-Digest', DIGEST)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_PUT(self):
+        if not self._authorized():
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if body == MANIFEST:
+            self.server.tags.add(self.path.rsplit('/', 1)[-1])
+        self.send_response(201 if body == MANIFEST else 400)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class TestRegistryClient(unittest.TestCase):
+
+    require_token = False
+
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), StubRegistryHandler)
+        self.server.require_token = self.require_token
+        self.server.token_requests = 0
+        self.server.tags = set(['latest'])
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://%s:%s' % self.server.server_address
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_api_url(self):
+        self.assertEqual(RegistryClient.api_url('https://index.docker.io/v1/'), DOCKER_HUB_REGISTRY_URL)
+        self.assertEqual(RegistryClient.api_url('registry.example.com:5000/v2'),
+                         'https://registry.example.com:5000')
+
+    def test_get_manifest_digest(self):
+        client = RegistryClient(self.url)
+        self.assertEqual(client.get_manifest_digest('ns/app', 'latest'), DIGEST)
+        self.assertEqual(client.get_manifest_digest('ns/app', DIGEST), DIGEST)
+        self.assertIsNone(client.get_manifest_digest('ns/app', '20170101'))
+
+    def test_tag_manifest(self):
+        client = RegistryClient(self.url)
+        self.assertTrue(client.tag_manifest('ns/app', DIGEST, '20170101'))
+        self.assertEqual(client.get_manifest_digest('ns/app', '20170101'), DIGEST)
+        self.assertFalse(client.tag_manifest('ns/app', 'sha256:missing', '20170102'))
+
+
+class TestRegistryClientWithToken(TestRegistryClient):
+
+    require_token = True
+
+    def test_token_is_reused(self):
+        client = RegistryClient(self.url, username='user', password='pass')
+        self.assertEqual(client.get_manifest_digest('ns/app', 'latest'), DIGEST)
+        self.assertEqual(client.get_manifest_digest('ns/app', DIGEST), DIGEST)
+        self.assertEqual(self.server.token_requests, 1)
+
+
+class FakeImage(object):
+
+    def __init__(self, id, tags):
+        self.id = id
+        self.tags = tags
+        self.attrs = {'RepoDigests': []}
+
+
+class FakeImages(object):
+
+    def __init__(self, images):
+        self._images = dict((image.id, image) for image in images)
+
+    def get(self, image_id):
+        return self._images[image_id]
+
+
+class FakeApi(object):
+
+    def __init__(self):
+        self.tags = []
+        self.pushes = []
+
+    def tag(self, image_id, repository, tag=None):
+        self.tags.append((image_id, repository, tag))
+
+    def push(self, repository, tag=None, **kwargs):
+        self.pushes.append((repository, tag))
+        return iter([{'aux': {'Digest': DIGEST}}])
+
+
+class FakeClient(object):
+
+    def __init__(self, images):
+        self.images = FakeImages(images)
+        self.api = FakeApi()
+
+
+class TestEnginePush(unittest.TestCase):
+
+    def setUp(self):
+        self._env = container.ENV
+        container.ENV = 'conductor'
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), StubRegistryHandler)
+        self.server.require_token = False
+        self.server.token_requests = 0
+        self.server.tags = set(['latest'])
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.registry = '%s:%s' % self.server.server_address
+        self.test_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.test_dir, 'state.json')
+        self.engine = Engine('demo', {'app': {'roles': ['app']}})
+        self.engine._client = FakeClient([FakeImage('sha256:image', ['demo-app:20170101000000'])])
+
+    def tearDown(self):
+        container.ENV = self._env
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.test_dir)
+
+    def push(self, tag):
+        return self.engine.push('sha256:image', 'app', tag=tag, namespace='ns', url='http://' + self.registry,
+                                repository_prefix='', state_path=self.state_path)
+
+    def test_push_is_recorded(self):
+        self.assertEqual(self.push('20170101'), DIGEST)
+        self.assertEqual(self.engine.client.api.pushes, [(self.registry + '/ns/app', '20170101')])
+        self.assertEqual(PushRecord(self.state_path).get(self.registry, self.registry + '/ns/app', 'sha256:image'),
+                         DIGEST)
+
+    def test_http_registry_already_has_image(self):
+        PushRecord(self.state_path).set(self.registry, self.registry + '/ns/app', 'sha256:image', DIGEST)
+        self.assertEqual(self.push('latest'), DIGEST)
+        self.assertEqual(self.engine.client.api.pushes, [])
+
+    def test_http_registry_is_tagged_remotely(self):
+        PushRecord(self.state_path).set(self.registry, self.registry + '/ns/app', 'sha256:image', DIGEST)
+        self.assertEqual(self.push('20170101'), DIGEST)
+        self.assertEqual(self.engine.client.api.pushes, [])
+        self.assertIn('20170101', self.server.tags)
+
+
+class TestPushRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.test_dir, 'state.json')
+        with open(self.state_path, 'w') as ofs:
+            json.dump({LoginRecord.RECORD_KEY: {'registry.example.com': {'verified_at': 1}}}, ofs)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_round_trip(self):
+        record = PushRecord(self.state_path)
+        self.assertIsNone(record.get('registry.example.com', 'ns/app', 'sha256:image'))
+        record.set('registry.example.com', 'ns/app', 'sha256:image', DIGEST)
+        self.assertEqual(PushRecord(self.state_path).get('registry.example.com', 'ns/app', 'sha256:image'),
+                         DIGEST)
+
+    def test_other_records_are_preserved(self):
+        PushRecord(self.state_path).set('registry.example.com', 'ns/app', 'sha256:image', DIGEST)
+        with open(self.state_path) as ifs:
+            state = json.load(ifs)
+        self.assertIn('registry.example.com', state[LoginRecord.RECORD_KEY])
+        self.assertEqual(os.listdir(self.test_dir), ['state.json'])
+
+    def test_malformed_state_is_not_overwritten(self):
+        with open(self.state_path, 'w') as ofs:
+            ofs.write('{"ansibleContainerLogins": ')
+        record = PushRecord(self.state_path)
+        self.assertIsNone(record.get('registry.example.com', 'ns/app', 'sha256:image'))
+        record.set('registry.example.com', 'ns/app', 'sha256:image', DIGEST)
+        with open(self.state_path) as ifs:
+            self.assertEqual(ifs.read(), '{"ansibleContainerLogins": ')
+
+    def test_missing_state(self):
+        state_path = os.path.join(self.test_dir, 'missing', 'state.json')
+        record = PushRecord(state_path)
+        self.assertIsNone(record.get('registry.example.com', 'ns/app', 'sha256:image'))
+        record.set('registry.example.com', 'ns/app', 'sha256:image', DIGEST)
+        self.assertEqual(PushRecord(state_path).get('registry.example.com', 'ns/app', 'sha256:image'), DIGEST)
+
+
+class TestLoginRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.test_dir, 'state.json')
+        self.now = 1000.0
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def record(self):
+        return LoginRecord(self.state_path, ttl=60, clock=lambda: self.now)
+
+    def test_verified_within_ttl(self):
+        self.assertFalse(self.record().is_verified('/root/.docker/config.json', 'registry.example.com'))
+        self.record().verified('/root/.docker/config.json', 'registry.example.com')
+        self.now += 30
+        self.assertTrue(self.record().is_verified('/root/.docker/config.json', 'registry.example.com'))
+        self.now += 30
+        self.assertFalse(self.record().is_verified('/root/.docker/config.json', 'registry.example.com'))
+
+    def test_keyed_by_config_file_and_registry(self):
+        self.record().verified('/root/.docker/config.json', 'registry.example.com')
+        self.assertFalse(self.record().is_verified('/tmp/config.json', 'registry.example.com'))
+        self.assertFalse(self.record().is_verified('/root/.docker/config.json', 'other.example.com'))
+
+    def test_credentials_are_not_stored(self):
+        self.record().verified('/root/.docker/config.json', 'registry.example.com')
+        with open(self.state_path) as ifs:
+            login = json.load(ifs)[LoginRecord.RECORD_KEY]['/root/.docker/config.json']['registry.example.com']
+        self.assertEqual(login, {'verified_at': 1000})
+
+
+class FakeLoginClient(object):
+
+    def __init__(self):
+        self.logins = []
+
+    def login(self, username=None, password=None, email=None, registry=None, reauth=False):
+        self.logins.append((registry, username))
+
+
+class TestEngineLogin(unittest.TestCase):
+
+    def setUp(self):
+        self._env = container.ENV
+        container.ENV = 'conductor'
+        self.test_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.test_dir, 'state.json')
+        self.engine = Engine('demo', {'app': {'roles': ['app']}})
+        self.engine._client = FakeLoginClient()
+
+    def tearDown(self):
+        container.ENV = self._env
+        shutil.rmtree(self.test_dir)
+
+    def config_path(self, name='config.json'):
+        path = os.path.join(self.test_dir, name)
+        if not os.path.exists(path):
+            with open(path, 'w') as ofs:
+                ofs.write('{}')
+        return path
+
+    def login(self, config_path, password='pass'):
+        return self.engine.login('user', password, None, 'registry.example.com', config_path, self.state_path)
+
+    def test_recent_login_is_reused(self):
+        config_path = self.config_path()
+        self.assertEqual(self.login(config_path), ('user', 'pass'))
+        self.assertEqual(self.login(config_path), ('user', 'pass'))
+        self.assertEqual(len(self.engine.client.logins), 1)
+
+    def test_other_config_file_logs_in(self):
+        self.login(self.config_path())
+        self.assertEqual(self.login(self.config_path('other.json')), ('user', 'pass'))
+        self.assertEqual(len(self.engine.client.logins), 2)
+
+    def test_logout_or_changed_credentials_log_in(self):
+        config_path = self.config_path()
+        self.login(config_path)
+        with open(config_path, 'w') as ofs:
+            ofs.write('{"auths": {}}')
+        self.assertEqual(self.login(config_path), ('user', 'pass'))
+        self.assertEqual(self.login(config_path, password='other'), ('user', 'other'))
+        self.assertEqual(len(self.engine.client.logins), 3)
@@ -0,0 +1,94 @@
+import unittest
+
+from container.docker.startup import StartupTasks, startup_levels, readiness_probe, service_network
+from container.exceptions import AnsibleContainerConfigException
+
+SERVICES = {
+    'db': {'from': 'postgres:9.6', 'docker': {'readiness': {'port': 5432}}},
+    'cache': {'from': 'redis:3'},
+    'web': {'from': 'centos:7', 'depends_on': ['db'], 'links': ['cache:redis'],
+            'docker': {'readiness': {'command': 'curl -sf http://localhost:8000', 'timeout': 10, 'interval': 2}}},
+    'worker': {'from': 'centos:7', 'depends_on': ['db', 'cache']},
+    'proxy': {'from': 'nginx', 'links': ['web']},
+}
+
+
+class TestStartupLevels(unittest.TestCase):
+
+    def test_levels(self):
+        self.assertEqual(startup_levels(SERVICES), [['cache', 'db'], ['web', 'worker'], ['proxy']])
+
+    def test_unrequested_dependencies_are_ignored(self):
+        services = dict((name, SERVICES[name]) for name in ('web', 'proxy'))
+        self.assertEqual(startup_levels(services), [['web'], ['proxy']])
+
+    def test_circular_dependencies(self):
+        services = {'a': {'depends_on': ['b']}, 'b': {'links': ['a']}, 'c': {}}
+        with self.assertRaises(AnsibleContainerConfigException):
+            startup_levels(services)
+
+    def test_readiness_probe(self):
+        self.assertIsNone(readiness_probe(SERVICES['cache']))
+        self.assertEqual(readiness_probe(SERVICES['db']), {'port': 5432, 'timeout': 60, 'interval': 1})
+        with self.assertRaises(AnsibleContainerConfigException):
+            readiness_probe({'docker': {'readiness': {'timeout': 5}}})
+
+    def test_service_network(self):
+        self.assertEqual(service_network('My-App', {}), 'my-app_default')
+        self.assertEqual(service_network('demo', {'networks': {'front': {}, 'back': {}}}), 'demo_back')
+
+
+class TestStartupTasks(unittest.TestCase):
+
+    def setUp(self):
+        task_params = {'project_name': 'demo', 'state': 'present',
+                       'definition': {'version': '2', 'services': {},
+                                      'volumes': {'data': {}, 'secrets': {'external': True},
+                                                  'logs': {'driver': 'local', 'name': 'shared-logs'}}}}
+        self.tasks = list(StartupTasks('demo', 'demo_conductor', task_params, SERVICES, workers=1))
+
+    def names(self, module):
+        return [task['name'] for task in self.tasks if module in task]
+
+    def test_services_start_in_order(self):
+        self.assertEqual(self.names('docker_service'),
+                         ['Start cache', 'Start db', 'Start web', 'Start worker', 'Start proxy'])
+        for task in self.tasks:
+            self.assertEqual(task['tags'], ['start'])
+            if 'docker_service' in task:
+                self.assertFalse(task['docker_service']['dependencies'])
+                self.assertEqual(task['docker_service']['services'], [task['name'].split()[-1]])
+
+    def test_workers_limit_concurrency(self):
+        task_params = {'project_name': 'demo', 'definition': {}, 'state': 'present'}
+        tasks = list(StartupTasks('demo', 'demo_conductor', task_params, SERVICES, workers=2))
+        modules = [('start' if 'docker_service' in task else 'wait') for task in tasks
+                   if 'docker_service' in task or 'async_status' in task]
+        self.assertEqual(modules, ['start', 'start', 'wait', 'wait', 'start', 'start', 'wait', 'wait',
+                                   'start', 'wait'])
+
+    def test_networks_and_volumes_are_created_first(self):
+        modules = [module for task in self.tasks for module in ('docker_network', 'docker_volume', 'docker_service')
+                   if module in task]
+        self.assertEqual(modules[:3], ['docker_network', 'docker_volume', 'docker_volume'])
+        self.assertEqual(self.tasks[1]['docker_network'], {'name': 'demo_default'})
+        self.assertEqual([task['docker_volume'] for task in self.tasks[2:4]],
+                         [{'name': 'demo_data'}, {'name': 'shared-logs', 'driver': 'local'}])
+
+    def test_probes(self):
+        self.assertEqual(self.names('docker_network'),
+                         ['Create network demo_default', 'Connect the conductor to demo_default'])
+        wait_for = [task for task in self.tasks if 'wait_for' in task][0]
+        self.assertEqual(wait_for['wait_for'], {'host': 'db', 'port': 5432, 'timeout': 60})
+        lookup = [task for task in self.tasks if 'command' in task][0]
+        self.assertEqual(lookup['command'], 'docker ps --quiet --no-trunc --filter label=com.docker.compose.project=demo '
+                                            '--filter label=com.docker.compose.service=web')
+        raw = [task for task in self.tasks if 'raw' in task][0]
+        self.assertEqual(raw['delegate_to'], '{{ container_web.stdout_lines[0] }}')
+        self.assertEqual(raw['retries'], 5)
+        self.assertEqual(raw['delay'], 2)
+
+    def test_report(self):
+        report = self.tasks[-1]['debug']['msg']
+        self.assertEqual(len(report), len(SERVICES))
+        self.assertTrue(report[0].startswith('cache ready after'))
@@ -0,0 +1,60 @@
+import unittest
+
+try:
+    import string_utils
+    from container.k8s import base_deploy, casing
+    from container.k8s.deploy import Deploy
+except ImportError:
+    string_utils = None
+
+
+def convert(key):
+    return string_utils.snake_case_to_camel(key, upper_case_first=False)
+
+
+@unittest.skipIf(string_utils is None, 'requires string_utils')
+class TestSnakeToCamel(unittest.TestCase):
+
+    def setUp(self):
+        self._memo = casing._memo
+        self._memo_size = casing.MEMO_SIZE
+        casing._memo = {}
+
+    def tearDown(self):
+        casing._memo = self._memo
+        casing.MEMO_SIZE = self._memo_size
+        base_deploy.snake_to_camel = casing.snake_to_camel
+
+    def test_known_fields_match_string_utils(self):
+        for key, camel in casing.KNOWN_FIELDS.items():
+            self.assertEqual(convert(key), camel)
+
+    def test_conversion_matches_string_utils(self):
+        for key in ('replicas', 'rolling_update', 'rollingUpdate', 'x_y_z', '_private', 'a__b', 'UPPER'):
+            # Once converted, then from the memo
+            self.assertEqual(casing.snake_to_camel(key), convert(key))
+            self.assertEqual(casing.snake_to_camel(key), convert(key))
+
+    def test_memo_is_bounded(self):
+        casing.MEMO_SIZE = 10
+        for idx in range(25):
+            self.assertEqual(casing.snake_to_camel('field_%d' % idx), 'field%d' % idx)
+        self.assertLessEqual(len(casing._memo), 10)
+
+    def test_manifests_match_string_utils(self):
+        services = {
+            'web': {
+                'image': 'demo-web:latest',
+                'ports': ['8080:80'],
+                'k8s': {'deployment': {'strategy': {'type': 'rolling_update',
+                                                    'rolling_update': {'max_surge': 1}},
+                                       'security_context': {'run_as_user': 1000, 'custom_field_name': 1}}},
+            },
+        }
+
+        def manifests():
+            return list(Deploy(services=services, project_name='demo', namespace_name='demo').get_manifest_templates())
+
+        expected = manifests()
+        base_deploy.snake_to_camel = convert
+        self.assertEqual(manifests(), expected)
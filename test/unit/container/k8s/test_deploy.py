@@ -0,0 +1,53 @@
+import unittest
+
+try:
+    from container.k8s.deploy import Deploy
+except ImportError:
+    # The K8s deploy module converts keys with string_utils
+    Deploy = None
+
+SERVICES = {
+    'web': {
+        'image': 'demo-web:latest',
+        'ports': ['8080:80'],
+        'k8s': {
+            'deployment': {
+                'replicas': 2,
+                'strategy': {'type': 'rolling_update', 'rolling_update': {'max_surge': 1, 'max_unavailable': 0}},
+            },
+        },
+    },
+    'db': {'image': 'postgres:9.6', 'environment': {'POSTGRES_DB': 'demo'}},
+    'worker': {'image': 'demo-worker:latest', 'command': ['celery', 'worker']},
+}
+
+
+@unittest.skipIf(Deploy is None, 'requires string_utils')
+class TestDeploymentTemplates(unittest.TestCase):
+
+    def deploy(self, services=SERVICES):
+        return Deploy(services=services, project_name='demo', namespace_name='demo')
+
+    def test_service_order(self):
+        templates = self.deploy().get_deployment_templates()
+        self.assertEqual([t['metadata']['name'] for t in templates], list(SERVICES))
+        self.assertEqual(templates[0]['spec']['strategy'],
+                         {'type': 'rolling_update', 'rollingUpdate': {'maxSurge': 1, 'maxUnavailable': 0}})
+
+    def test_memoized_templates_match_and_are_independent(self):
+        deploy = self.deploy()
+        first = deploy.get_deployment_templates()
+        first[0].pop('force')
+        second = deploy.get_deployment_templates()
+        self.assertIn('force', second[0])
+        self.assertEqual(list(second[1:]), list(first[1:]))
+        self.assertEqual(list(second), list(self.deploy().get_deployment_templates()))
+
+    def test_memo_follows_options_and_config(self):
+        deploy = self.deploy()
+        deploy.get_deployment_templates()
+        self.assertEqual(deploy.get_deployment_templates(engine_state='stop')[0]['spec']['replicas'], 0)
+        services = dict(SERVICES, worker=dict(SERVICES['worker'], image='demo-worker:2'))
+        deploy._services = services
+        templates = deploy.get_deployment_templates()
+        self.assertEqual(templates[2]['spec']['template']['spec']['containers'][0]['image'], 'demo-worker:2')
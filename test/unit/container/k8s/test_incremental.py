@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ruamel import yaml
+
+from container.k8s.incremental import ResourceHashes
+
+
+def deployment_task(name, image, tags=('start', 'restart')):
+    return {
+        'name': 'Create deployment, and scale replicas up',
+        'k8s_apps_v1beta1_deployment': {
+            'state': 'present',
+            'force': False,
+            'resource_definition': {
+                'kind': 'deployment',
+                'metadata': {'name': name, 'namespace': 'demo'},
+                'spec': {'template': {'spec': {'containers': [{'name': name, 'image': image}]}}},
+            },
+        },
+        'tags': list(tags),
+    }
+
+
+def service_task(name):
+    return {
+        'name': 'Create service',
+        'k8s_v1_service': {
+            'state': 'present',
+            'force': False,
+            'resource_definition': {'kind': 'Service', 'metadata': {'name': name, 'namespace': 'demo'}},
+        },
+        'tags': ['start'],
+    }
+
+
+def tasks(web_image='demo-web:1'):
+    return [
+        {'name': 'Create namespace demo', 'k8s_v1_namespace': {'name': 'demo', 'state': 'present'},
+         'tags': ['start']},
+        service_task('web'),
+        deployment_task('web', 'demo-web:1', tags=['stop', 'restart']),
+        deployment_task('web', web_image),
+        deployment_task('db', 'demo-db:1'),
+    ]
+
+
+def batched_deployment_task(images, tags=('start', 'restart')):
+    task = deployment_task('', '', tags=tags)
+    definitions = [deployment_task(name, image)['k8s_apps_v1beta1_deployment'] for name, image in images]
+    task['k8s_apps_v1beta1_deployment'].update(force='{{ item.force }}',
+                                               resource_definition='{{ item.resource_definition }}')
+    task['with_items'] = [dict(force=d['force'], resource_definition=d['resource_definition']) for d in definitions]
+    return task
+
+
+class TestResourceHashes(unittest.TestCase):
+
+    def setUp(self):
+        self.output_path = tempfile.mkdtemp()
+        self.hashes = ResourceHashes(self.output_path, 'demo')
+
+    def tearDown(self):
+        shutil.rmtree(self.output_path)
+
+    def test_first_deploy_keeps_everything(self):
+        pruned, skipped = self.hashes.prune(tasks())
+        self.assertEqual(len(pruned), 5)
+        self.assertEqual(skipped, [])
+        self.assertEqual(len(self.hashes.load()), 3)
+
+    def test_unchanged_resources_are_skipped(self):
+        self.hashes.prune(tasks())
+        pruned, skipped = self.hashes.prune(tasks(web_image='demo-web:2'))
+        self.assertEqual(sorted(d['metadata']['name'] for d in skipped), ['db', 'web'])
+        self.assertEqual([task.get('tags') for task in pruned],
+                         [['start'], ['stop', 'restart'], ['start', 'restart'], ['restart']])
+        with open(self.hashes.manifest_path) as ifs:
+            manifest = yaml.safe_load(ifs)
+        self.assertEqual(sorted((r['kind'], r['name']) for r in manifest), [('Service', 'web'), ('deployment', 'db')])
+
+    def test_clear(self):
+        self.hashes.prune(tasks())
+        self.hashes.clear()
+        self.assertFalse(os.path.exists(self.hashes.path))
+        pruned, skipped = self.hashes.prune(tasks())
+        self.assertEqual(skipped, [])
+
+    def test_batched_tasks_are_split(self):
+        self.hashes.prune([batched_deployment_task([('web', 'demo-web:1'), ('db', 'demo-db:1')])])
+        pruned, skipped = self.hashes.prune([batched_deployment_task([('web', 'demo-web:2'), ('db', 'demo-db:1')])])
+        self.assertEqual([d['metadata']['name'] for d in skipped], ['db'])
+        self.assertEqual([(task['tags'], [i['resource_definition']['metadata']['name'] for i in task['with_items']])
+                          for task in pruned],
+                         [(['start', 'restart'], ['web']), (['restart'], ['db'])])
+
+    def test_batched_and_single_tasks_share_hashes(self):
+        self.hashes.prune([deployment_task('web', 'demo-web:1')])
+        pruned, skipped = self.hashes.prune([batched_deployment_task([('web', 'demo-web:1')], tags=['start'])])
+        self.assertEqual(pruned, [])
+        self.assertEqual(len(skipped), 1)
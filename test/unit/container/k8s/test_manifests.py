@@ -0,0 +1,42 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from ruamel import yaml
+
+from container.k8s.manifests import write_manifests
+
+
+def templates():
+    yield {'apiVersion': 'v1', 'kind': 'Namespace', 'metadata': {'name': 'demo'}}
+    yield {'apiVersion': 'v1', 'kind': 'Service', 'metadata': {'name': 'web', 'namespace': 'demo'}}
+
+
+class TestWriteManifests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'demo-manifests')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_yaml(self):
+        self.assertEqual(write_manifests(templates(), self.path), 2)
+        with open(self.path) as ifs:
+            documents = list(yaml.safe_load_all(ifs))
+        self.assertEqual([d['kind'] for d in documents], ['Namespace', 'Service'])
+
+    def test_json(self):
+        self.assertEqual(write_manifests(templates(), self.path, manifest_format='json'), 2)
+        with open(self.path) as ifs:
+            manifest = json.load(ifs)
+        self.assertEqual(manifest['kind'], 'List')
+        self.assertEqual([item['metadata']['name'] for item in manifest['items']], ['demo', 'web'])
+
+    def test_empty(self):
+        self.assertEqual(write_manifests(iter([]), self.path, manifest_format='json'), 0)
+        with open(self.path) as ifs:
+            self.assertEqual(json.load(ifs)['items'], [])
@@ -0,0 +1,197 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import urlparse, parse_qs
+
+# container.exceptions can't be imported ahead of the package's utils, so it's reached through rollout
+from container.k8s import rollout
+from container.k8s.rollout import (ApiClient, RolloutWatcher, load_kubeconfig, rollout_status,
+                                   READY, PROGRESSING, STALLED)
+
+PATH = '/apis/apps/v1beta1/namespaces/demo/deployments'
+
+
+def deployment(name, replicas=1, updated=1, available=1, total=None, generation=2, observed=2, conditions=None):
+    return {
+        'metadata': {'name': name, 'namespace': 'demo', 'generation': generation},
+        'spec': {'replicas': replicas},
+        'status': {
+            'observedGeneration': observed,
+            'replicas': updated if total is None else total,
+            'updatedReplicas': updated,
+            'availableReplicas': available,
+            'conditions': conditions or [],
+        },
+    }
+
+
+class FakeApiServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """ Serves a list of deployments, and a watch that streams events then ends """
+
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), FakeApiHandler)
+        self.items = []
+        self.events = []
+        self.requests = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+
+class FakeApiHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.requests.append((url.path, query, self.headers.get('Authorization')))
+        if url.path != PATH:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        if query.get('watch') == ['true']:
+            events, self.server.events = self.server.events, []
+            for event in events:
+                self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+                self.wfile.flush()
+        else:
+            listing = {'kind': 'DeploymentList', 'metadata': {'resourceVersion': '10'}, 'items': self.server.items}
+            self.wfile.write(json.dumps(listing).encode('utf-8'))
+
+
+class TestRolloutStatus(unittest.TestCase):
+
+    def test_ready(self):
+        self.assertEqual(rollout_status(deployment('web', replicas=2, updated=2, available=2)), (READY, None))
+
+    def test_scaled_to_zero_is_ready(self):
+        self.assertEqual(rollout_status(deployment('web', replicas=0, updated=0, available=0))[0], READY)
+
+    def test_progressing(self):
+        for resource in (deployment('web', observed=1), deployment('web', replicas=2, updated=1),
+                         deployment('web', total=2), deployment('web', available=0)):
+            self.assertEqual(rollout_status(resource)[0], PROGRESSING)
+
+    def test_stalled(self):
+        conditions = [{'type': 'Progressing', 'status': 'False', 'reason': 'ProgressDeadlineExceeded'}]
+        self.assertEqual(rollout_status(deployment('web', available=0, conditions=conditions)),
+                         (STALLED, 'ProgressDeadlineExceeded'))
+
+
+class TestRolloutWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeApiServer()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.client = ApiClient(self.server.url, api_key='secret')
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_watches_until_ready(self):
+        self.server.items = [deployment('db'), deployment('web', available=0)]
+        self.server.events = [
+            {'type': 'MODIFIED', 'object': deployment('other', available=0)},
+            {'type': 'MODIFIED', 'object': deployment('web')},
+        ]
+        ready, failed = RolloutWatcher(self.client, PATH, timeout=10).wait(['web', 'db'])
+        self.assertEqual(sorted(ready), ['db', 'web'])
+        self.assertEqual(failed, {})
+        watches = [query for path, query, _ in self.server.requests if 'watch' in query]
+        self.assertEqual(watches[0]['resourceVersion'], ['10'])
+        self.assertTrue(all(auth == 'Bearer secret' for _, _, auth in self.server.requests))
+
+    def test_stalled_rollout_fails(self):
+        conditions = [{'type': 'Progressing', 'status': 'False', 'message': 'deadline exceeded'}]
+        self.server.items = [deployment('web', available=0)]
+        self.server.events = [{'type': 'MODIFIED', 'object': deployment('web', available=0, conditions=conditions)}]
+        ready, failed = RolloutWatcher(self.client, PATH, timeout=10).wait(['web'])
+        self.assertEqual(ready, {})
+        self.assertEqual(failed, {'web': 'deadline exceeded'})
+
+    def test_times_out(self):
+        self.server.items = [deployment('web', available=0)]
+        clock = [0.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        watcher = RolloutWatcher(self.client, PATH, timeout=3, clock=lambda: clock[0], sleep=sleep)
+        ready, failed = watcher.wait(['web', 'missing'])
+        self.assertEqual(ready, {})
+        self.assertEqual(failed, {'web': 'timed out, 0 of 1 updated replicas available',
+                                  'missing': 'timed out, not found'})
+
+    def test_api_errors_are_raised(self):
+        with self.assertRaises(rollout.exceptions.AnsibleContainerException):
+            RolloutWatcher(self.client, '/oapi/v1/namespaces/demo/deploymentconfigs', timeout=10).wait(['web'])
+
+
+class TestApiClientConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.config_dir, 'config')
+        with open(self.config_file, 'w') as ofs:
+            json.dump({
+                'current-context': 'dev',
+                'contexts': [{'name': 'dev', 'context': {'cluster': 'local', 'user': 'admin'}},
+                             {'name': 'prod', 'context': {'cluster': 'remote', 'user': 'admin'}}],
+                'clusters': [
+                    {'name': 'local', 'cluster': {'server': 'https://127.0.0.1:8443',
+                                                  'certificate-authority': 'ca.crt'}},
+                    {'name': 'remote', 'cluster': {'server': 'https://k8s.example.com',
+                                                   'insecure-skip-tls-verify': True}},
+                ],
+                'users': [{'name': 'admin', 'user': {
+                    'client-certificate-data': base64.b64encode(b'cert').decode('ascii'),
+                    'client-key-data': base64.b64encode(b'key').decode('ascii')}}],
+            }, ofs)
+
+    def tearDown(self):
+        shutil.rmtree(self.config_dir)
+
+    def test_current_context(self):
+        params = load_kubeconfig(self.config_file)
+        self.assertEqual(params['host'], 'https://127.0.0.1:8443')
+        self.assertEqual(params['ssl_ca_cert'], os.path.join(self.config_dir, 'ca.crt'))
+        with open(params['cert_file'], 'rb') as ifs:
+            self.assertEqual(ifs.read(), b'cert')
+        client = ApiClient(**params)
+        client.close()
+        self.assertFalse(os.path.exists(params['cert_file']))
+
+    def test_environment_overrides_kubeconfig(self):
+        client = ApiClient.from_environment({
+            'K8S_AUTH_KUBECONFIG': self.config_file,
+            'K8S_AUTH_CONTEXT': 'prod',
+            'K8S_AUTH_API_KEY': 'token',
+        })
+        try:
+            self.assertEqual(client.host, 'https://k8s.example.com')
+            self.assertFalse(client.session.verify)
+            self.assertEqual(client.session.headers['Authorization'], 'Bearer token')
+        finally:
+            client.close()
+
+    def test_no_server(self):
+        with self.assertRaises(rollout.exceptions.AnsibleContainerException):
+            ApiClient.from_environment({'K8S_AUTH_KUBECONFIG': os.path.join(self.config_dir, 'missing')})
@@ -6,10 +6,18 @@ import os
 import yaml
 import json
 
-from container.config import AnsibleContainerConfig
+from ruamel.yaml.compat import ordereddict
+
+from container.config import AnsibleContainerConfig, AnsibleContainerConductorConfig
 from container.exceptions import AnsibleContainerConfigException
 from container import __version__
 
+try:
+    from ansible.template import Templar
+except ImportError:
+    # Ansible is only installed in the conductor
+    Templar = None
+
 class TestAnsibleContainerConfig(unittest.TestCase):
 
     '''
@@ -157,3 +165,35 @@ class TestAnsibleContainerConfig(unittest.TestCase):
         self.assertEqual(self.config._config['services']['web']['environment'][2], 'VERSION={0}'.format(__version__))
 
 
+@unittest.skipIf(Templar is None, 'requires Ansible')
+class TestTemplateValue(unittest.TestCase):
+
+    def setUp(self):
+        self.templar = Templar(loader=None, variables={'http_port': 8080, 'debug': 1})
+
+    def test_preserves_types_and_order(self):
+        service = ordereddict([
+            ('from', 'centos:7'),
+            ('ports', ['{{ http_port }}:80', '8443:443']),
+            ('environment', ordereddict([('SERVICE_INDEX', 7), ('DEBUG', '{{ debug }}'), ('LOG_LEVEL', 'info')])),
+        ])
+        processed = AnsibleContainerConductorConfig._template_value(service, self.templar)
+        self.assertIs(type(processed), type(service))
+        self.assertEqual(list(processed.keys()), list(service.keys()))
+        self.assertEqual(processed['ports'], ['8080:80', '8443:443'])
+        self.assertEqual(list(processed['environment'].keys()), ['SERVICE_INDEX', 'DEBUG', 'LOG_LEVEL'])
+        self.assertEqual(processed['environment']['SERVICE_INDEX'], 7)
+        self.assertEqual(processed['environment']['LOG_LEVEL'], 'info')
+
+    def test_keys_are_templated(self):
+        labels = ordereddict([('{{ "debug" if debug else "quiet" }}.level', 'info'), ('team', 'web')])
+        processed = AnsibleContainerConductorConfig._template_value({'labels': labels}, self.templar)
+        self.assertEqual(list(processed['labels'].items()), [('debug.level', 'info'), ('team', 'web')])
+
+    def test_templated_strings_are_plain_text(self):
+        processed = AnsibleContainerConductorConfig._template_value(['{{ http_port }}:80'], self.templar)
+        self.assertIs(type(processed[0]), str)
+
+    def test_leaves_without_markers_are_untouched(self):
+        value = 'no templating here'
+        self.assertIs(AnsibleContainerConductorConfig._template_value(value, self.templar), value)
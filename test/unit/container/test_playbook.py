@@ -0,0 +1,63 @@
+import io
+import json
+import unittest
+
+from ruamel import yaml
+from ruamel.yaml.comments import CommentedMap, CommentedSeq
+
+from container.utils.playbook import write_playbook
+
+
+def playbook():
+    play = CommentedMap()
+    play['name'] = u'Manage the lifecycle of demo'
+    play['hosts'] = 'localhost'
+    play['gather_facts'] = 'no'
+    play['roles'] = CommentedSeq([CommentedMap([('role', 'ansible.kubernetes-modules')])])
+    play['tasks'] = CommentedSeq()
+    for name in ('web', 'db'):
+        play['tasks'].append(CommentedMap([
+            ('name', 'Create service'),
+            ('k8s_v1_service', CommentedMap([
+                ('state', 'present'),
+                ('force', False),
+                ('resource_definition', {'kind': 'Service', 'metadata': {'name': name, 'replicas': 2}}),
+            ])),
+            ('tags', ['start']),
+        ]))
+    play.yaml_set_comment_before_after_key('tasks', before='Tasks for setting the application state', indent=4)
+    return CommentedSeq([play])
+
+
+class TestWritePlaybook(unittest.TestCase):
+
+    def test_json_is_read_as_yaml(self):
+        ofs = io.StringIO()
+        write_playbook(playbook(), ofs)
+        self.assertEqual(json.loads(ofs.getvalue()), json.loads(json.dumps(playbook())))
+        self.assertEqual(yaml.safe_load(ofs.getvalue()), json.loads(ofs.getvalue()))
+
+    def test_empty_task_list(self):
+        book = playbook()
+        book[0]['tasks'] = []
+        ofs = io.StringIO()
+        write_playbook(book, ofs)
+        self.assertEqual(json.loads(ofs.getvalue())[0]['tasks'], [])
+
+    def test_task_generators(self):
+        book = playbook()
+        tasks = list(book[0]['tasks'])
+        book[0]['tasks'] = (task for task in tasks)
+        ofs = io.StringIO()
+        write_playbook(iter(book), ofs)
+        self.assertEqual(json.loads(ofs.getvalue()), json.loads(json.dumps(playbook())))
+
+        book[0]['tasks'] = (task for task in [])
+        ofs = io.StringIO()
+        write_playbook(book, ofs)
+        self.assertEqual(json.loads(ofs.getvalue())[0]['tasks'], [])
+
+    def test_yaml(self):
+        ofs = io.StringIO()
+        write_playbook(playbook(), ofs, playbook_format='yaml')
+        self.assertEqual(yaml.safe_load(ofs.getvalue()), json.loads(json.dumps(playbook())))
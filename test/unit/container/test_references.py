@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from container.utils.references import (role_references, scope_variables, data_references,
+                                        UnknownReferences)
+
+
+class TestRoleReferences(unittest.TestCase):
+
+    def setUp(self):
+        self.role_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.role_path)
+
+    def write(self, relative_path, content):
+        path = os.path.join(self.role_path, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as ofs:
+            ofs.write(content)
+
+    def test_tasks_and_templates(self):
+        self.write('tasks/main.yml', '- template: src=app.conf.j2 dest=/etc/app.conf\n'
+                                     '- debug: msg="{{ greeting | default(\'hi\') }}"\n'
+                                     '  when: enable_debug and item\n'
+                                     '  with_items:\n'
+                                     '    - "{{ debug_items }}"\n')
+        self.write('templates/app.conf.j2', 'port={{ app_port }}\n{% if use_tls %}tls=on{% endif %}\n')
+        self.write('files/static.txt', '{{ not_templated }}')
+        names = role_references(self.role_path)
+        for name in ('greeting', 'enable_debug', 'debug_items', 'app_port', 'use_tls'):
+            self.assertIn(name, names)
+        self.assertNotIn('not_templated', names)
+
+    def test_indirect_references(self):
+        self.write('tasks/main.yml', '- debug: msg="{{ hostvars[inventory_hostname] }}"\n')
+        with self.assertRaises(UnknownReferences):
+            role_references(self.role_path)
+
+    def test_external_templates(self):
+        self.write('tasks/main.yml', '- template:\n    src: ../../templates/app.j2\n    dest: /etc/app\n')
+        with self.assertRaises(UnknownReferences):
+            role_references(self.role_path)
+
+    def test_external_templates_as_arguments(self):
+        for task in ('- template: src=../../templates/app.j2 dest=/etc/app\n',
+                     '- copy: dest=/etc/app src="/srv/app.conf"\n'):
+            self.write('tasks/main.yml', task)
+            with self.assertRaises(UnknownReferences):
+                role_references(self.role_path)
+
+    def test_dynamic_includes(self):
+        for task in ('- include_role:\n    name: common\n',
+                     '- import_role: name=common\n',
+                     '- include_tasks: "{{ ansible_os_family }}.yml"\n',
+                     '- include: install.yml\n',
+                     '- block:\n    - import_tasks: ../../other/tasks/main.yml\n',
+                     '- import_tasks: "{{ tasks_file }}"\n'):
+            self.write('tasks/main.yml', task)
+            with self.assertRaises(UnknownReferences):
+                role_references(self.role_path)
+
+    def test_static_imports(self):
+        self.write('tasks/main.yml', '- import_tasks: install.yml\n')
+        self.write('tasks/install.yml', '- debug: msg="{{ app_version }}"\n')
+        self.write('defaults/main.yml', 'include: []\n')
+        self.assertIn('app_version', role_references(self.role_path))
+
+
+class TestScopeVariables(unittest.TestCase):
+
+    config_vars = {
+        'app_port': 8000,
+        'app_url': 'http://{{ app_host }}:{{ app_port }}',
+        'app_host': 'localhost',
+        'db_password': 'secret',
+        'ansible_python_interpreter': '/usr/bin/python3',
+    }
+
+    def test_scope(self):
+        self.assertEqual(sorted(scope_variables(self.config_vars, set(['app_url', 'item']))),
+                         ['ansible_python_interpreter', 'app_host', 'app_port', 'app_url'])
+
+    def test_unknown_scope(self):
+        self.assertEqual(scope_variables(self.config_vars, None), self.config_vars)
+        self.assertEqual(scope_variables(None, set(['app_url'])), {})
+
+    def test_role_definition(self):
+        self.assertEqual(data_references({'role': 'web', 'port': '{{ app_port }}'}), set(['app_port']))
@@ -4,7 +4,10 @@ from os import path
 import unittest
 import os
 import pytest
-from container.utils import assert_initialized
+import yaml
+
+import container
+from container.utils import assert_initialized, explain_fingerprint_change, RoleRegistry
 from container.exceptions import AnsibleContainerNotInitializedException
 
 
@@ -29,3 +32,99 @@ class TestMissingFiles(unittest.TestCase):
         f.write('')
         with pytest.raises(AnsibleContainerNotInitializedException):
             assert_initialized(self.test_dir)
+
+
+class TestExplainFingerprintChange(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = {
+            u'base image': u'sha256:1',
+            u'variables': u'a',
+            u'parent layer': u'p1',
+            u'role definition': u'd',
+            u'role files': u'f1',
+            u'dependency common': u'c1',
+        }
+
+    def test_changed_inputs(self):
+        current = dict(self.previous)
+        current.update({u'role files': u'f2', u'parent layer': u'p2', u'source /src/app': u's'})
+        del current[u'dependency common']
+        self.assertEqual(explain_fingerprint_change(self.previous, current),
+                         [u'dependency common was removed', u'role files changed', u'source /src/app was added'])
+
+    def test_parent_layer(self):
+        current = dict(self.previous, **{u'parent layer': u'p2'})
+        self.assertEqual(explain_fingerprint_change(self.previous, current), [u'parent layer changed'])
+        self.assertEqual(explain_fingerprint_change(self.previous, dict(self.previous)), [])
+
+
+class LocalRoleRegistry(RoleRegistry):
+    """ Treats each role as the path to it, rather than resolving it with Ansible """
+
+    def resolve(self, role):
+        return role
+
+
+class TestRoleRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.env = container.ENV
+        container.ENV = 'conductor'
+        self.roles_dir = tempfile.mkdtemp()
+        self.registry = LocalRoleRegistry()
+
+    def tearDown(self):
+        container.ENV = self.env
+        shutil.rmtree(self.roles_dir)
+
+    def make_role(self, name, defaults=None, dependencies=None):
+        role_path = path.join(self.roles_dir, name)
+        for directory in ('defaults', 'meta'):
+            os.makedirs(path.join(role_path, directory))
+        self.write(role_path, 'defaults/main.yml', defaults or {})
+        self.write(role_path, 'meta/main.yml', {'dependencies': dependencies or []})
+        return role_path
+
+    @staticmethod
+    def write(role_path, relative_path, data):
+        with open(path.join(role_path, relative_path), 'w') as ofs:
+            yaml.safe_dump(data, ofs)
+
+    def test_content_is_cached_and_copied(self):
+        role_path = self.make_role('web', defaults={'port': 80})
+        defaults = self.registry.content(role_path, 'defaults/main.yml')
+        defaults['port'] = 8080
+        self.write(role_path, 'defaults/main.yml', {'port': 443})
+        self.assertEqual(self.registry.content(role_path, 'defaults/main.yml'), {'port': 80})
+
+    def test_missing_content_is_empty(self):
+        role_path = self.make_role('web')
+        self.assertEqual(self.registry.content(role_path, 'meta/container.yml'), {})
+
+    def test_dependencies_are_cached(self):
+        role_path = self.make_role('web', dependencies=['common', {'role': 'users'}])
+        self.assertEqual(self.registry.dependencies(role_path), ['common', 'users'])
+        self.write(role_path, 'meta/main.yml', {'dependencies': []})
+        self.assertEqual(self.registry.dependencies(role_path), ['common', 'users'])
+
+    def test_reset(self):
+        role_path = self.make_role('web', defaults={'port': 80}, dependencies=['common'])
+        self.registry.index([role_path])
+        self.write(role_path, 'defaults/main.yml', {'port': 443})
+        self.write(role_path, 'meta/main.yml', {'dependencies': []})
+        self.registry.reset()
+        self.assertEqual(self.registry.content(role_path, 'defaults/main.yml'), {'port': 443})
+        self.assertEqual(self.registry.dependencies(role_path), [])
+
+    def test_references_include_dependencies(self):
+        common_path = self.make_role('common', defaults={'motd': '{{ greeting }}'})
+        web_path = self.make_role('web', defaults={'url': '{{ web_host }}'}, dependencies=[common_path])
+        self.assertEqual(self.registry.references(web_path), set(['web_host', 'greeting']))
+
+    def test_circular_dependencies_have_unknown_references(self):
+        web_path = path.join(self.roles_dir, 'web')
+        common_path = self.make_role('common', defaults={'motd': '{{ greeting }}'}, dependencies=[web_path])
+        self.make_role('web', defaults={'url': '{{ web_host }}'}, dependencies=[common_path])
+        self.assertIsNone(self.registry.references(web_path))
+        self.assertIsNone(self.registry.references(common_path))